@@ -0,0 +1 @@
+# Núcleo compartilhado pelos apps Streamlit de análise de recomendações.
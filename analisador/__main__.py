@@ -0,0 +1,5 @@
+import sys
+
+from analisador.cli import main
+
+sys.exit(main())
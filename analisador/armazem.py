@@ -0,0 +1,157 @@
+import json
+import os
+
+from analisador.pipeline import COLUNAS_LINHA_RESULTADO, salvar_xlsx
+from analisador.recomendacoes import formatar_recomendacoes
+
+FORMATO_JSONL = "jsonl"
+FORMATO_PARQUET = "parquet"
+FORMATOS = (FORMATO_JSONL, FORMATO_PARQUET)
+
+# Linhas guardadas em memória antes de cada gravação (um row group no Parquet)
+LINHAS_POR_LOTE = 10_000
+
+# Confiança da recomendação por palavras-chave: cada palavra-chave distinta na frase
+# reduz à metade a chance de um falso positivo (1 → 0.5, 2 → 0.75, 3 → 0.875)
+def confianca(recomendacao):
+    return round(1 - 0.5 ** len(recomendacao["palavras_chave"]), 3)
+
+
+# Tabelas do armazém: uma linha por documento analisado e uma por recomendação encontrada,
+# ligadas pelo número do documento (a ordem em que foram analisados)
+def _esquemas():
+    # Dependência opcional, só para o formato Parquet
+    import pyarrow as pa
+
+    documentos = pa.schema([
+        ("documento", pa.int64()), ("empresa", pa.string()), ("arquivo", pa.string()), ("status", pa.string()),
+        ("recomendacoes", pa.int32()),
+    ])
+    recomendacoes = pa.schema([
+        ("documento", pa.int64()), ("empresa", pa.string()), ("arquivo", pa.string()), ("pagina", pa.int32()),
+        ("palavra_chave", pa.string()), ("idioma", pa.string()), ("confianca", pa.float64()), ("frase", pa.string()),
+        ("palavras_chave", pa.string()), ("idiomas", pa.string()),
+    ])
+    return {"documentos": documentos, "recomendacoes": recomendacoes}
+
+
+def _caminho(pasta, tabela, formato):
+    return os.path.join(pasta, f"{tabela}.{formato}")
+
+
+# Armazém colunar dos resultados, gravado aos poucos durante a execução: documentos.<formato>
+# e recomendacoes.<formato> numa pasta, em JSONL ou Parquet. A memória fica limitada a
+# LINHAS_POR_LOTE linhas por tabela, seja qual for o tamanho do acervo; o .xlsx sai dele
+# quando pedido (salvar_xlsx_do_armazem). Abrir uma pasta existente substitui o conteúdo
+class ArmazemResultados:
+    def __init__(self, pasta, formato=FORMATO_JSONL):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de armazém desconhecido: {formato} (use {' ou '.join(FORMATOS)})")
+        os.makedirs(pasta, exist_ok=True)
+        self.pasta = pasta
+        self.formato = formato
+        self.documentos = 0
+        self._pendentes = {"documentos": [], "recomendacoes": []}
+        self._escritores = {}
+        for tabela, outro in ((t, o) for t in self._pendentes for o in FORMATOS if o != formato):
+            # Restos de uma execução anterior no outro formato confundiriam a leitura
+            if os.path.exists(_caminho(pasta, tabela, outro)):
+                os.remove(_caminho(pasta, tabela, outro))
+        if formato == FORMATO_PARQUET:
+            import pyarrow.parquet as pq
+
+            for tabela, esquema in _esquemas().items():
+                self._escritores[tabela] = pq.ParquetWriter(_caminho(pasta, tabela, formato), esquema)
+        else:
+            for tabela in self._pendentes:
+                self._escritores[tabela] = open(_caminho(pasta, tabela, formato), "w", encoding="utf-8")
+
+    # Função para guardar o resultado de uma linha (de lote.processar_em_lote ou processar_arquivos)
+    def adicionar(self, resultado):
+        documento = self.documentos
+        self.documentos += 1
+        recomendacoes = resultado.get("recomendacoes") or []
+        self._pendentes["documentos"].append({
+            "documento": documento,
+            "empresa": resultado["Empresa"],
+            "arquivo": resultado["Arquivo"],
+            "status": resultado["Status"],
+            "recomendacoes": len(recomendacoes),
+        })
+        for rec in recomendacoes:
+            self._pendentes["recomendacoes"].append({
+                "documento": documento,
+                "empresa": resultado["Empresa"],
+                "arquivo": resultado["Arquivo"],
+                "pagina": rec.get("pagina"),
+                "palavra_chave": rec["palavra_chave"],
+                "idioma": rec["idioma"],
+                "confianca": confianca(rec),
+                "frase": rec["frase"],
+                "palavras_chave": ", ".join(rec["palavras_chave"]),
+                "idiomas": ", ".join(rec["idiomas"]),
+            })
+        for tabela, linhas in self._pendentes.items():
+            if len(linhas) >= LINHAS_POR_LOTE:
+                self._gravar(tabela)
+
+    def _gravar(self, tabela):
+        linhas = self._pendentes[tabela]
+        if not linhas:
+            return
+        if self.formato == FORMATO_PARQUET:
+            import pyarrow as pa
+
+            escritor = self._escritores[tabela]
+            escritor.write_table(pa.Table.from_pylist(linhas, schema=escritor.schema))
+        else:
+            self._escritores[tabela].writelines(json.dumps(linha, ensure_ascii=False) + "\n" for linha in linhas)
+        self._pendentes[tabela] = []
+
+    def fechar(self):
+        for tabela in self._pendentes:
+            self._gravar(tabela)
+            self._escritores[tabela].close()
+
+
+# Função para ler uma tabela do armazém ("documentos" ou "recomendacoes") linha a linha, em qualquer formato
+def ler_tabela(pasta, tabela):
+    if os.path.exists(_caminho(pasta, tabela, FORMATO_PARQUET)):
+        import pyarrow.parquet as pq
+
+        arquivo = pq.ParquetFile(_caminho(pasta, tabela, FORMATO_PARQUET))
+        for lote in arquivo.iter_batches(batch_size=LINHAS_POR_LOTE):
+            yield from lote.to_pylist()
+        return
+    caminho = _caminho(pasta, tabela, FORMATO_JSONL)
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Tabela {tabela} não encontrada em {pasta}")
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            yield json.loads(linha)
+
+
+# Linhas no formato de pipeline.linha_resultado (uma por documento, recomendações numa célula),
+# montadas a partir das duas tabelas lidas em paralelo: ambas estão na ordem dos documentos
+def linhas_do_armazem(pasta):
+    recomendacoes = ler_tabela(pasta, "recomendacoes")
+    proxima = next(recomendacoes, None)
+    for documento in ler_tabela(pasta, "documentos"):
+        do_documento = []
+        while proxima is not None and proxima["documento"] == documento["documento"]:
+            do_documento.append(proxima)
+            proxima = next(recomendacoes, None)
+        yield {
+            "Empresa": documento["empresa"],
+            "Arquivo": documento["arquivo"],
+            "Status": documento["status"],
+            "Recomendações": formatar_recomendacoes(do_documento),
+            "Palavras-chave": ", ".join(sorted({kw for rec in do_documento for kw in rec["palavras_chave"].split(", ")})) or "-",
+            "Idiomas": ", ".join(sorted({i for rec in do_documento for i in rec["idiomas"].split(", ") if i})) or "-",
+        }
+
+
+# Função para gerar do armazém a planilha de resultado .xlsx, sem carregar as tabelas
+# inteiras em memória (openpyxl em modo write-only)
+def salvar_xlsx_do_armazem(pasta, destino):
+    salvar_xlsx(linhas_do_armazem(pasta), destino, COLUNAS_LINHA_RESULTADO)
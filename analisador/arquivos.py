@@ -0,0 +1,118 @@
+import os
+import re
+import unicodedata
+from collections import Counter, namedtuple
+from difflib import SequenceMatcher
+
+STATUS_PASTA_NAO_ENCONTRADA = "Pasta FINAL não encontrada"
+STATUS_ARQUIVO_NAO_ENCONTRADO = "Arquivo não encontrado (nome parecido não encontrado)"
+STATUS_ARQUIVO_AMBIGUO = "Arquivo ambíguo (mais de um nome parecido)"
+
+# Mesmo corte de similaridade usado antes com get_close_matches
+CORTE_SIMILARIDADE = 0.7
+# Diferença mínima entre o melhor e o segundo candidato para não considerar ambíguo
+MARGEM_AMBIGUIDADE = 0.02
+# Quantos candidatos do filtro de trigramas seguem para a comparação fina
+MAX_CANDIDATOS = 20
+
+# caminho é None quando não há arquivo único; candidatos lista os nomes em disputa
+Localizacao = namedtuple("Localizacao", ["caminho", "status", "candidatos"])
+
+_SEPARADORES = re.compile(r"[\s_\-\.]+")
+
+
+# Normaliza um nome para comparação: sem acentos, sem caixa, sem extensão .pdf e
+# com espaços, "_", "-" e "." tratados como o mesmo separador
+def normalizar_nome(nome):
+    nome = unicodedata.normalize("NFKD", nome)
+    nome = "".join(c for c in nome if not unicodedata.combining(c)).casefold().strip()
+    if nome.endswith(".pdf"):
+        nome = nome[:-4]
+    return _SEPARADORES.sub(" ", nome).strip()
+
+
+def _trigramas(nome):
+    nome = f"  {nome} "
+    return {nome[i:i + 3] for i in range(len(nome) - 2)}
+
+
+# Arquivos PDF de uma pasta FINAL, indexados por nome normalizado e por trigramas
+class _PastaIndexada:
+    def __init__(self, caminho, arquivos):
+        self.caminho = caminho
+        self.arquivos = arquivos
+        self.normalizados = [normalizar_nome(a) for a in arquivos]
+        self.exatos = {}
+        self.trigramas = {}
+        for i, nome in enumerate(self.normalizados):
+            self.exatos.setdefault(nome, []).append(i)
+            for tri in _trigramas(nome):
+                self.trigramas.setdefault(tri, []).append(i)
+
+    def localizar(self, nome_arquivo):
+        alvo = normalizar_nome(nome_arquivo)
+
+        exatos = self.exatos.get(alvo)
+        if exatos:
+            return self._resultado([(1.0, i) for i in exatos])
+
+        # Filtra por trigramas em comum antes da comparação fina, que é quadrática
+        comuns = Counter()
+        for tri in _trigramas(alvo):
+            comuns.update(self.trigramas.get(tri, ()))
+        pontuados = []
+        for i, _ in comuns.most_common(MAX_CANDIDATOS):
+            matcher = SequenceMatcher(None, alvo, self.normalizados[i])
+            if matcher.real_quick_ratio() >= CORTE_SIMILARIDADE and matcher.quick_ratio() >= CORTE_SIMILARIDADE:
+                razao = matcher.ratio()
+                if razao >= CORTE_SIMILARIDADE:
+                    pontuados.append((razao, i))
+        if not pontuados:
+            return Localizacao(None, STATUS_ARQUIVO_NAO_ENCONTRADO, [])
+        return self._resultado(pontuados)
+
+    def _resultado(self, pontuados):
+        pontuados.sort(key=lambda p: p[0], reverse=True)
+        melhor = pontuados[0][0]
+        empatados = [i for razao, i in pontuados if melhor - razao < MARGEM_AMBIGUIDADE]
+        if len(empatados) > 1:
+            return Localizacao(None, STATUS_ARQUIVO_AMBIGUO, [self.arquivos[i] for i in empatados])
+        arquivo = self.arquivos[empatados[0]]
+        return Localizacao(os.path.join(self.caminho, arquivo), None, [arquivo])
+
+
+# Índice de pdfs/<Empresa>/FINAL, montado uma vez por execução em vez de
+# os.listdir + get_close_matches a cada linha da planilha
+class IndiceArquivos:
+    def __init__(self, raiz="pdfs"):
+        self.raiz = raiz
+        self.pastas = {}
+        self.empresas = {}
+        if not os.path.isdir(raiz):
+            return
+        for entrada in os.scandir(raiz):
+            pasta_final = os.path.join(entrada.path, "FINAL")
+            if not entrada.is_dir() or not os.path.isdir(pasta_final):
+                continue
+            arquivos = sorted(
+                e.name for e in os.scandir(pasta_final)
+                if e.is_file() and e.name.lower().endswith(".pdf")
+            )
+            self.pastas[entrada.name] = _PastaIndexada(pasta_final, arquivos)
+            self.empresas.setdefault(normalizar_nome(entrada.name), []).append(entrada.name)
+
+    def _pasta(self, empresa):
+        if empresa in self.pastas:
+            return self.pastas[empresa]
+        nomes = self.empresas.get(normalizar_nome(empresa), [])
+        if len(nomes) == 1:
+            return self.pastas[nomes[0]]
+        return None
+
+    # Função para localizar o PDF de uma linha da planilha em <raiz>/<Empresa>/FINAL
+    def localizar(self, empresa, nome_arquivo):
+        pasta = self._pasta(empresa)
+        if pasta is None:
+            return Localizacao(None, STATUS_PASTA_NAO_ENCONTRADA, [])
+        return pasta.localizar(nome_arquivo)
+
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timezone
+
+from azure.storage.blob import BlobServiceClient
+
+from analisador.cache import DIRETORIO_CACHE
+
+# Downloads simultâneos de blobs diferentes e conexões por download
+DOWNLOADS_SIMULTANEOS = 8
+CONEXOES_POR_DOWNLOAD = 4
+
+_clientes = {}
+_trava_clientes = threading.Lock()
+
+
+# Função para obter o cliente do container, reaproveitando o BlobServiceClient (e suas conexões)
+# entre chamadas com a mesma connection string
+def cliente_container(conn_str, container_name):
+    with _trava_clientes:
+        if conn_str not in _clientes:
+            _clientes[conn_str] = BlobServiceClient.from_connection_string(conn_str)
+        return _clientes[conn_str].get_container_client(container_name)
+
+
+def _como_datetime(data):
+    if data is None or isinstance(data, datetime):
+        return data
+    return datetime.combine(data, time.min, tzinfo=timezone.utc)
+
+
+# Função para listar os PDFs do container filtrando por prefixo (no servidor) e data de modificação.
+# Retorna dicionários com nome, etag, tamanho e data de modificação
+def listar_pdfs(container_client, prefixo=None, desde=None, ate=None):
+    desde, ate = _como_datetime(desde), _como_datetime(ate)
+    blobs = []
+    for blob in container_client.list_blobs(name_starts_with=prefixo or None):
+        if not blob.name.lower().endswith(".pdf"):
+            continue
+        if desde and blob.last_modified < desde:
+            continue
+        if ate and blob.last_modified >= ate:
+            continue
+        blobs.append({
+            "nome": blob.name,
+            "etag": blob.etag,
+            "tamanho": blob.size,
+            "modificado": blob.last_modified,
+        })
+    return blobs
+
+
+# Cópias locais dos blobs, reaproveitadas enquanto o ETag não mudar
+class CacheBlobs:
+    def __init__(self, pasta=None):
+        self.pasta = pasta or os.path.join(DIRETORIO_CACHE, "blobs")
+        os.makedirs(self.pasta, exist_ok=True)
+        self.caminho_indice = os.path.join(self.pasta, "indice.sqlite")
+        with self._conectar() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "container TEXT NOT NULL, nome TEXT NOT NULL, etag TEXT NOT NULL, caminho TEXT NOT NULL, "
+                "PRIMARY KEY (container, nome))"
+            )
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho_indice, timeout=30)
+
+    def caminho_local(self, container, nome):
+        chave = hashlib.sha256(f"{container}/{nome}".encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.pasta, f"{chave}.pdf")
+
+    def obter(self, container, nome, etag):
+        with self._conectar() as con:
+            linha = con.execute(
+                "SELECT etag, caminho FROM blobs WHERE container = ? AND nome = ?", (container, nome)
+            ).fetchone()
+        if linha and linha[0] == etag and os.path.exists(linha[1]):
+            return linha[1]
+        return None
+
+    def registrar(self, container, nome, etag, caminho):
+        with self._conectar() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO blobs (container, nome, etag, caminho) VALUES (?, ?, ?, ?)",
+                (container, nome, etag, caminho),
+            )
+
+
+def _id_container(container_client):
+    return getattr(container_client, "url", None) or container_client.container_name
+
+
+# Função para baixar um blob para o disco (em streaming, sem carregá-lo inteiro na memória).
+# Se o ETag for o mesmo da cópia local, nada é baixado. Retorna o caminho local
+def baixar_pdf(container_client, nome, etag=None, cache=None, max_concurrency=CONEXOES_POR_DOWNLOAD):
+    cache = cache or CacheBlobs()
+    container = _id_container(container_client)
+    blob_client = container_client.get_blob_client(nome)
+    if etag is None:
+        etag = blob_client.get_blob_properties().etag
+
+    caminho = cache.obter(container, nome, etag)
+    if caminho:
+        return caminho
+
+    caminho = cache.caminho_local(container, nome)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.parcial"
+    stream = blob_client.download_blob(max_concurrency=max_concurrency)
+    try:
+        with open(temporario, "wb") as f:
+            stream.readinto(f)
+        os.replace(temporario, caminho)
+    except BaseException:
+        # Download interrompido: a cópia parcial não pode ficar para trás
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    cache.registrar(container, nome, stream.properties.etag or etag, caminho)
+    return caminho
+
+
+# Função para baixar vários blobs em paralelo. Devolve (blob, caminho ou erro) na ordem da lista,
+# à medida que ficam prontos
+def baixar_pdfs(container_client, blobs, max_workers=DOWNLOADS_SIMULTANEOS, max_concurrency=CONEXOES_POR_DOWNLOAD):
+    cache = CacheBlobs()
+
+    def baixar(blob):
+        try:
+            return blob, baixar_pdf(container_client, blob["nome"], blob.get("etag"), cache, max_concurrency), None
+        except Exception as e:
+            return blob, None, e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(baixar, blobs)
+
+
+# Empresa de um blob: a primeira "pasta" do nome (ex.: "Empresa A/FINAL/Relatório_1.pdf")
+def empresa_do_blob(nome):
+    return nome.split("/", 1)[0] if "/" in nome else ""
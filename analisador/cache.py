@@ -0,0 +1,143 @@
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+
+# Diretório do cache em disco; pode ser trocado pela variável de ambiente ANALISADOR_CACHE_DIR
+DIRETORIO_CACHE = os.environ.get("ANALISADOR_CACHE_DIR", ".cache")
+
+LIMITE_PADRAO_BYTES = 512 * 1024 * 1024
+
+
+# Hashes já calculados neste processo: caminho -> ((tamanho, mtime), hash)
+_hashes = {}
+
+
+def _calcular_hash(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+# Função para obter o hash do conteúdo de um arquivo. O arquivo só é relido quando o
+# tamanho ou a data de modificação mudam: antes disso o hash vem da memória ou do cache
+# "hashes" em disco, compartilhado entre processos e execuções
+def hash_arquivo(caminho):
+    info = os.stat(caminho)
+    caminho = os.path.abspath(caminho)
+    assinatura = (info.st_size, info.st_mtime_ns)
+    guardado = _hashes.get(caminho)
+    if guardado is not None and guardado[0] == assinatura:
+        return guardado[1]
+
+    cache = obter_cache("hashes")
+    chave = f"hash:{caminho}:{info.st_size}:{info.st_mtime_ns}"
+    hash_conteudo = cache.obter(chave)
+    if hash_conteudo is None:
+        hash_conteudo = _calcular_hash(caminho)
+        cache.guardar(chave, hash_conteudo)
+    _hashes[caminho] = (assinatura, hash_conteudo)
+    return hash_conteudo
+
+
+# Função para esquecer os hashes guardados em memória (ex.: para medir uma execução a frio)
+def esquecer_hashes():
+    _hashes.clear()
+
+
+# Cache chave -> texto em SQLite, com valores comprimidos e despejo LRU por tamanho total.
+# Pode ser usado por vários processos ao mesmo tempo (modo WAL)
+class CacheDisco:
+    def __init__(self, caminho, limite_bytes=LIMITE_PADRAO_BYTES):
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self.limite_bytes = limite_bytes
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "chave TEXT PRIMARY KEY, valor BLOB NOT NULL, "
+                "tamanho INTEGER NOT NULL, acesso REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_cache_acesso ON cache (acesso)")
+            # Tamanho total mantido a cada gravação, para não somar a tabela inteira a cada guardar
+            con.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+            con.execute(
+                "INSERT OR IGNORE INTO meta (chave, valor) "
+                "SELECT 'total', COALESCE(SUM(tamanho), 0) FROM cache"
+            )
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def obter(self, chave):
+        with self._conectar() as con:
+            linha = con.execute("SELECT valor FROM cache WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                return None
+            con.execute("UPDATE cache SET acesso = ? WHERE chave = ?", (time.time(), chave))
+        return zlib.decompress(linha[0]).decode("utf-8")
+
+    def guardar(self, chave, valor):
+        dados = zlib.compress(valor.encode("utf-8"), 6)
+        with self._conectar() as con:
+            # Transação de escrita desde a leitura do tamanho anterior: o total fica certo
+            # mesmo com outros processos gravando ao mesmo tempo
+            con.execute("BEGIN IMMEDIATE")
+            anterior = con.execute("SELECT tamanho FROM cache WHERE chave = ?", (chave,)).fetchone()
+            con.execute(
+                "INSERT OR REPLACE INTO cache (chave, valor, tamanho, acesso) VALUES (?, ?, ?, ?)",
+                (chave, dados, len(dados), time.time()),
+            )
+            total = self._somar(con, len(dados) - (anterior[0] if anterior else 0))
+            if total > self.limite_bytes:
+                self._despejar(con, total)
+
+    def remover(self, chave):
+        with self._conectar() as con:
+            con.execute("BEGIN IMMEDIATE")
+            anterior = con.execute("SELECT tamanho FROM cache WHERE chave = ?", (chave,)).fetchone()
+            if anterior:
+                con.execute("DELETE FROM cache WHERE chave = ?", (chave,))
+                self._somar(con, -anterior[0])
+
+    def limpar(self):
+        with self._conectar() as con:
+            con.execute("BEGIN IMMEDIATE")
+            con.execute("DELETE FROM cache")
+            con.execute("UPDATE meta SET valor = 0 WHERE chave = 'total'")
+
+    def tamanho_total(self):
+        with self._conectar() as con:
+            return con.execute("SELECT valor FROM meta WHERE chave = 'total'").fetchone()[0]
+
+    def _somar(self, con, delta):
+        con.execute("UPDATE meta SET valor = valor + ? WHERE chave = 'total'", (delta,))
+        return con.execute("SELECT valor FROM meta WHERE chave = 'total'").fetchone()[0]
+
+    # Remove as entradas menos usadas até o total caber no limite
+    def _despejar(self, con, total):
+        removidas = []
+        liberados = 0
+        for chave, tamanho in con.execute("SELECT chave, tamanho FROM cache ORDER BY acesso"):
+            if total - liberados <= self.limite_bytes:
+                break
+            removidas.append((chave,))
+            liberados += tamanho
+        con.executemany("DELETE FROM cache WHERE chave = ?", removidas)
+        self._somar(con, -liberados)
+
+
+_caches = {}
+
+
+# Cache compartilhado por nome (um arquivo .sqlite por nome dentro de DIRETORIO_CACHE)
+def obter_cache(nome, limite_bytes=LIMITE_PADRAO_BYTES):
+    if nome not in _caches:
+        _caches[nome] = CacheDisco(os.path.join(DIRETORIO_CACHE, f"{nome}.sqlite"), limite_bytes)
+    return _caches[nome]
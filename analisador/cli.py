@@ -0,0 +1,234 @@
+import argparse
+import logging
+import os
+import sys
+
+from analisador.armazem import FORMATO_JSONL, FORMATOS, ArmazemResultados, linhas_do_armazem, salvar_xlsx_do_armazem
+from analisador.indice import CAMINHO_INDICE_PADRAO, IndiceBusca
+from analisador.lote import workers_padrao
+from analisador.manifesto import Manifesto
+from analisador.ocr import ocr_workers_padrao
+from analisador.pipeline import (
+    COLUNAS_LINHA_RESULTADO, ETAPA_LEITURA, executar, resultados_com_aba, resultados_por_linha, salvar_consolidado, salvar_resultados,
+)
+from analisador.planilha import abrir_planilha, ler_planilha, linhas_da_planilha, linhas_de_todas_as_abas
+from analisador.recomendacoes import KEYWORDS_POR_IDIOMA, MATCHER, MatcherPalavrasChave
+from analisador.tempos import ETAPA_PLANILHA, PERFIS, Cronometro
+from analisador.trechos import ORCAMENTO_TOKENS_PADRAO
+
+MODOS = ("palavras", "openai", "llama")
+
+
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m analisador",
+        description="Verifica recomendações nos relatórios PDF listados numa planilha, sem interface web. "
+        "Para buscar no acervo: python -m analisador buscar <termos>; para gerar o .xlsx de um armazém: python -m analisador exportar <pasta> <saida.xlsx>.",
+    )
+    parser.add_argument("planilha", help="arquivo .xlsx com os projetos")
+    parser.add_argument("--aba", help="aba a analisar (padrão: a primeira)")
+    parser.add_argument("--coluna-empresa", default="Empresa", help="coluna com o nome da empresa")
+    parser.add_argument("--coluna-arquivo", default="Nome do arquivo salvo", help="coluna com o nome do arquivo")
+    parser.add_argument("--empresa", help="analisa só as linhas desta empresa")
+    parser.add_argument("--todas-abas", action="store_true", help="analisa todas as abas numa só execução; com saída .xlsx, grava um consolidado com o resumo dos status e uma aba por empresa")
+    parser.add_argument("--raiz", default="pdfs", help="pasta com pdfs/<Empresa>/FINAL (padrão: pdfs)")
+    parser.add_argument("--workers", type=int, default=workers_padrao(), help="processos de leitura de PDF")
+    parser.add_argument("--ocr-workers", type=int, default=ocr_workers_padrao(), help="processos de OCR das páginas sem texto (0 desativa; requer o Tesseract)")
+    parser.add_argument("--saida", default="resultado_recomendacoes.xlsx", help="arquivo de saída .xlsx, .csv ou .jsonl")
+    parser.add_argument("--planilha-saida", help="grava também uma cópia da planilha com Status e Recomendações na própria aba, em streaming (fórmulas são mantidas; células mescladas, estilos, gráficos e imagens, não)")
+    parser.add_argument("--preservar-formatacao", action="store_true", help="com --planilha-saida, mantém também células mescladas e estilos, abrindo a planilha inteira em memória")
+    parser.add_argument("--armazem", help="pasta onde gravar, durante a execução, uma linha por documento e uma por recomendação (para BI); sem --modo openai/llama, as linhas não ficam em memória e a --saida é gerada a partir dela")
+    parser.add_argument("--formato-armazem", choices=FORMATOS, default=FORMATO_JSONL, help="formato das tabelas do armazém (parquet requer o pyarrow)")
+    parser.add_argument("--manifesto", help="manifesto da execução (padrão: <saida>.manifesto.sqlite)")
+    parser.add_argument("--sem-manifesto", action="store_true", help="reprocessa todas as linhas, sem reaproveitar a execução anterior")
+    parser.add_argument("--modo", choices=MODOS, default="palavras", help="extração por palavras-chave, OpenAI ou LLaMA local")
+    parser.add_argument("--idiomas", help="idiomas das palavras-chave, separados por vírgula (ex.: pt,en)")
+    parser.add_argument("--modelo-llama", default=None, help="arquivo .gguf do LLaMA local")
+    parser.add_argument("--instancias-llama", type=int, default=1, help="instâncias do LLaMA em paralelo")
+    parser.add_argument("--prefiltro", action="store_true", help="com openai/llama, envia ao modelo só os trechos com palavras-chave, em vez das conclusões")
+    parser.add_argument("--orcamento-tokens", type=int, default=ORCAMENTO_TOKENS_PADRAO, help="tokens dos trechos enviados por documento, com --prefiltro")
+    parser.add_argument("--tempos", help="grava os tempos por etapa e por linha em .json ou, com outra extensão (ex.: .prom), no formato do Prometheus")
+    parser.add_argument("--perfil", choices=PERFIS, help="perfila a execução (com --workers 1 inclui a leitura dos PDFs)")
+    return parser.parse_args(argv)
+
+
+def _matcher(idiomas):
+    if not idiomas:
+        return MATCHER
+    escolhidos = [i.strip() for i in idiomas.split(",") if i.strip()]
+    desconhecidos = [i for i in escolhidos if i not in KEYWORDS_POR_IDIOMA]
+    if desconhecidos:
+        raise SystemExit(f"Idiomas desconhecidos: {', '.join(desconhecidos)} (disponíveis: {', '.join(KEYWORDS_POR_IDIOMA)})")
+    return MatcherPalavrasChave({i: KEYWORDS_POR_IDIOMA[i] for i in escolhidos})
+
+
+def _modelo(args):
+    if args.modo == "openai":
+        from analisador.openai_cliente import ClienteOpenAI
+
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise SystemExit("Defina OPENAI_API_KEY para usar --modo openai.")
+        return ClienteOpenAI(api_key)
+    if args.modo == "llama":
+        from analisador.llama_local import MODELO_PADRAO, PoolLlama
+
+        return PoolLlama(caminho_modelo=args.modelo_llama or MODELO_PADRAO, n_instancias=args.instancias_llama)
+    return None
+
+
+def _mostrar_progresso(resultados, feitos, total, etapa):
+    rotulo = "relatórios lidos" if etapa == ETAPA_LEITURA else "respostas do modelo"
+    print(f"\r{feitos}/{total} {rotulo}", end="" if feitos < total else "\n", file=sys.stderr, flush=True)
+
+
+def _argumentos_busca(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m analisador buscar",
+        description="Busca de texto completo no acervo pdfs/<Empresa>/FINAL; o índice é atualizado antes com os PDFs novos ou alterados.",
+    )
+    parser.add_argument("consulta", help='termos a buscar; use aspas para frase exata (ex.: \'"drenagem vertical"\')')
+    parser.add_argument("--empresa", help="busca só nos relatórios desta empresa")
+    parser.add_argument("--recomendacoes", action="store_true", help="busca só nas frases de recomendação")
+    parser.add_argument("--limite", type=int, default=20, help="número máximo de resultados")
+    parser.add_argument("--raiz", default="pdfs", help="pasta com pdfs/<Empresa>/FINAL (padrão: pdfs)")
+    parser.add_argument("--indice", default=CAMINHO_INDICE_PADRAO, help="arquivo do índice de busca")
+    parser.add_argument("--sem-atualizar", action="store_true", help="busca no índice como está, sem reler o acervo")
+    parser.add_argument("--workers", type=int, default=workers_padrao(), help="processos de leitura de PDF")
+    return parser.parse_args(argv)
+
+
+def _mostrar_indexacao(feitos, total):
+    print(f"\r{feitos}/{total} relatórios indexados", end="" if feitos < total else "\n", file=sys.stderr, flush=True)
+
+
+def buscar(argv):
+    args = _argumentos_busca(argv)
+    indice = IndiceBusca(args.indice)
+    try:
+        if not args.sem_atualizar:
+            contagem = indice.atualizar(args.raiz, max_workers=args.workers, ao_progresso=_mostrar_indexacao)
+            print(", ".join(f"{n} {rotulo}" for rotulo, n in contagem.items()), file=sys.stderr)
+        resultados = indice.buscar(args.consulta, limite=args.limite, empresa=args.empresa, somente_recomendacoes=args.recomendacoes)
+    finally:
+        indice.fechar()
+
+    for r in resultados:
+        trecho = " ".join(r["trecho"].split())
+        print(f"{r['empresa']} / {r['arquivo']}, p. {r['pagina']}: {trecho}")
+    if not resultados:
+        print("Nenhum resultado.", file=sys.stderr)
+    return 0
+
+
+def _argumentos_exportar(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m analisador exportar",
+        description="Gera a planilha de resultado .xlsx a partir de um armazém gravado com --armazem.",
+    )
+    parser.add_argument("armazem", help="pasta do armazém (documentos e recomendacoes em .jsonl ou .parquet)")
+    parser.add_argument("saida", help="arquivo .xlsx a gerar")
+    return parser.parse_args(argv)
+
+
+def exportar(argv):
+    args = _argumentos_exportar(argv)
+    try:
+        salvar_xlsx_do_armazem(args.armazem, args.saida)
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
+    print(f"Planilha salva em {args.saida}", file=sys.stderr)
+    return 0
+
+
+# Subcomandos; sem eles, o primeiro argumento é a planilha a analisar
+COMANDOS = {"buscar": buscar, "exportar": exportar}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMANDOS:
+        return COMANDOS[argv[0]](argv[1:])
+    args = _argumentos(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    cronometro = Cronometro()
+
+    if args.todas_abas and args.planilha_saida:
+        raise SystemExit("--planilha-saida grava uma aba só; não use com --todas-abas.")
+    with cronometro.medir(ETAPA_PLANILHA):
+        if args.todas_abas:
+            planilha = abrir_planilha(args.planilha)
+            registros, ignoradas = linhas_de_todas_as_abas(planilha, args.coluna_empresa, args.coluna_arquivo, empresa=args.empresa)
+            planilha.close()
+            if ignoradas:
+                print(f"Abas sem as colunas {args.coluna_empresa!r} e {args.coluna_arquivo!r}: {', '.join(ignoradas)}", file=sys.stderr)
+        else:
+            aba = ler_planilha(args.planilha, args.aba)
+            try:
+                registros = aba.linhas(args.coluna_empresa, args.coluna_arquivo, empresa=args.empresa)
+            except KeyError as e:
+                raise SystemExit(e.args[0])
+
+    linhas = linhas_da_planilha(registros)
+    modelo = _modelo(args)
+    manifesto = None if args.sem_manifesto else Manifesto(args.manifesto or f"{args.saida}.manifesto.sqlite")
+    armazem = ArmazemResultados(args.armazem, args.formato_armazem) if args.armazem else None
+    try:
+        with cronometro.perfilar(args.perfil):
+            resultados = executar(
+                linhas,
+                raiz=args.raiz,
+                max_workers=args.workers,
+                matcher=_matcher(args.idiomas),
+                modelo=modelo,
+                ao_progresso=_mostrar_progresso,
+                manifesto=manifesto,
+                cronometro=cronometro,
+                prefiltro=args.prefiltro,
+                orcamento_tokens=args.orcamento_tokens,
+                ocr_workers=args.ocr_workers,
+                armazem=armazem,
+            )
+    finally:
+        if hasattr(modelo, "fechar"):
+            modelo.fechar()
+        if manifesto is not None:
+            manifesto.fechar()
+        if armazem is not None:
+            armazem.fechar()
+
+    # Com o armazém, as linhas da análise por palavras-chave só existem nele: a saída é gerada
+    # em fluxo a partir dele, e só o consolidado e a cópia da planilha precisam delas em memória
+    so_no_armazem = armazem is not None and modelo is None
+    if so_no_armazem and (args.todas_abas or args.planilha_saida):
+        resultados = list(linhas_do_armazem(args.armazem))
+        so_no_armazem = False
+    if so_no_armazem:
+        salvar_resultados(linhas_do_armazem(args.armazem), args.saida, COLUNAS_LINHA_RESULTADO)
+        print(f"{armazem.documentos} linhas salvas em {args.saida}", file=sys.stderr)
+    else:
+        if args.todas_abas:
+            resultados = resultados_com_aba(registros, resultados)
+        if args.todas_abas and args.saida.lower().endswith(".xlsx"):
+            salvar_consolidado(resultados, args.saida)
+        else:
+            salvar_resultados(resultados, args.saida)
+        print(f"{len(resultados)} linhas salvas em {args.saida}", file=sys.stderr)
+    if armazem is not None:
+        print(f"{armazem.documentos} documentos gravados no armazém {args.armazem}", file=sys.stderr)
+    if args.planilha_saida:
+        aba.gravar_com_resultados(
+            args.planilha, resultados_por_linha(registros, resultados), ["Status", "Recomendações"], args.planilha_saida,
+            preservar_formatacao=args.preservar_formatacao,
+        )
+        print(f"Planilha com resultados salva em {args.planilha_saida}", file=sys.stderr)
+    if not args.todas_abas:
+        aba.planilha.close()
+
+    cronometro.registrar_no_log()
+    if args.tempos:
+        cronometro.salvar(args.tempos)
+        print(f"Tempos salvos em {args.tempos}", file=sys.stderr)
+    if cronometro.perfil:
+        print(cronometro.perfil, file=sys.stderr)
+    return 0
@@ -0,0 +1,200 @@
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from analisador.arquivos import IndiceArquivos
+from analisador.cache import DIRETORIO_CACHE, hash_arquivo
+from analisador.pdf import VERSAO_EXTRATOR, ler_paginas
+from analisador.recomendacoes import MATCHER
+from analisador.segmentacao import VERSAO_SEGMENTACAO, frases_do_pdf
+
+CAMINHO_INDICE_PADRAO = os.path.join(DIRETORIO_CACHE, "indice.sqlite")
+
+# Busca sem acentos e sem caixa: "recomendacao" encontra "Recomendação"
+_TOKENIZADOR = "unicode61 remove_diacritics 2"
+
+# Mudar o extrator ou a segmentação faz o índice reler todos os PDFs na próxima atualização
+VERSAO_INDICE = f"{VERSAO_EXTRATOR}:{VERSAO_SEGMENTACAO}"
+
+
+# Texto de cada página de um PDF e suas recomendações, para o índice (roda no pool de processos).
+# As recomendações saem das mesmas frases do pipeline (segmentacao.frases_do_pdf), inclusive as
+# que atravessam a quebra de página, cada uma com a página onde começa
+def _extrair_para_indice(caminho):
+    try:
+        paginas = list(ler_paginas(caminho))
+        frases = list(frases_do_pdf(caminho))
+        erros = [f["frase"] for f in frases if f["pagina"] is None]
+        if erros:
+            raise RuntimeError(erros[0])
+        return caminho, paginas, list(MATCHER.extrair_de_frases(frases)), None
+    except Exception as e:
+        return caminho, [], [], str(e)
+
+
+# Converte a consulta do usuário para a sintaxe do FTS5: cada termo vira uma frase entre aspas
+# (todos precisam aparecer); trechos já entre aspas são buscados como frase exata
+def consulta_fts(texto):
+    termos = re.findall(r'"[^"]+"|\S+', texto)
+    return " ".join('"' + t.strip('"').replace('"', '""') + '"' for t in termos if t.strip('"'))
+
+
+# Índice de texto completo (SQLite FTS5) do acervo pdfs/<Empresa>/FINAL:
+# texto por página e frases de recomendação, com empresa, arquivo e número da página
+class IndiceBusca:
+    def __init__(self, caminho=CAMINHO_INDICE_PADRAO):
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        # A página de busca do Streamlit reaproveita o índice entre reruns e sessões, que rodam em
+        # outras threads: todo uso da conexão passa por _trava, e só uma atualização roda por vez
+        self.con = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        self._trava = threading.Lock()
+        self._atualizando = threading.Lock()
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.executescript(f"""
+            CREATE TABLE IF NOT EXISTS documentos (
+                id INTEGER PRIMARY KEY,
+                empresa TEXT NOT NULL,
+                arquivo TEXT NOT NULL,
+                caminho TEXT NOT NULL UNIQUE,
+                mtime REAL NOT NULL,
+                tamanho INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                total_paginas INTEGER NOT NULL,
+                erro TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS paginas USING fts5(
+                texto, documento UNINDEXED, pagina UNINDEXED, tokenize="{_TOKENIZADOR}"
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS recomendacoes USING fts5(
+                frase, palavra_chave UNINDEXED, idioma UNINDEXED, documento UNINDEXED, pagina UNINDEXED,
+                tokenize="{_TOKENIZADOR}"
+            );
+            CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+        """)
+
+    def fechar(self):
+        with self._trava:
+            self.con.close()
+
+    def _remover(self, documento):
+        self.con.execute("DELETE FROM paginas WHERE documento = ?", (documento,))
+        self.con.execute("DELETE FROM recomendacoes WHERE documento = ?", (documento,))
+        self.con.execute("DELETE FROM documentos WHERE id = ?", (documento,))
+
+    # Função para atualizar o índice com o que mudou em <raiz>: só PDFs novos ou alterados são
+    # relidos (mtime/tamanho e, se preciso, hash) e os que sumiram do disco são removidos.
+    # Retorna a contagem de novos, alterados, removidos e inalterados
+    def atualizar(self, raiz="pdfs", max_workers=None, ao_progresso=None):
+        with self._atualizando:
+            with self._trava:
+                contagem, pendentes, indexados = self._comparar_com_disco(raiz)
+
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                for n, (caminho, paginas, recomendacoes, erro) in enumerate(pool.map(_extrair_para_indice, pendentes), 1):
+                    with self._trava:
+                        self._gravar(caminho, pendentes[caminho], paginas, recomendacoes, erro, indexados.get(caminho))
+                    if ao_progresso:
+                        ao_progresso(n, len(pendentes))
+            with self._trava:
+                self.con.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('versao', ?)", (VERSAO_INDICE,))
+                self.con.commit()
+        return contagem
+
+    # Novos, alterados e inalterados em <raiz>; os que sumiram do disco já saem do índice aqui
+    def _comparar_com_disco(self, raiz):
+        indexados = {
+            caminho: (documento, mtime, tamanho, hash_conteudo)
+            for documento, caminho, mtime, tamanho, hash_conteudo in self.con.execute(
+                "SELECT id, caminho, mtime, tamanho, hash FROM documentos"
+            )
+        }
+        contagem = {"novos": 0, "alterados": 0, "removidos": 0, "inalterados": 0}
+        versao = self.con.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()
+        reler_tudo = versao is None or versao[0] != VERSAO_INDICE
+
+        pendentes = {}
+        vistos = set()
+        for empresa, pasta in IndiceArquivos(raiz).pastas.items():
+            for arquivo in pasta.arquivos:
+                caminho = os.path.join(pasta.caminho, arquivo)
+                vistos.add(caminho)
+                info = os.stat(caminho)
+                anterior = indexados.get(caminho)
+                if not reler_tudo and anterior and (anterior[1], anterior[2]) == (info.st_mtime, info.st_size):
+                    contagem["inalterados"] += 1
+                    continue
+                hash_conteudo = hash_arquivo(caminho)
+                if not reler_tudo and anterior and anterior[3] == hash_conteudo:
+                    self.con.execute(
+                        "UPDATE documentos SET mtime = ?, tamanho = ? WHERE id = ?",
+                        (info.st_mtime, info.st_size, anterior[0]),
+                    )
+                    contagem["inalterados"] += 1
+                    continue
+                contagem["alterados" if anterior else "novos"] += 1
+                pendentes[caminho] = (empresa, arquivo, info, hash_conteudo)
+
+        for caminho, (documento, _, _, _) in indexados.items():
+            if caminho not in vistos:
+                self._remover(documento)
+                contagem["removidos"] += 1
+        self.con.commit()
+        return contagem, pendentes, indexados
+
+    def _gravar(self, caminho, dados, paginas, recomendacoes, erro, anterior):
+        empresa, arquivo, info, hash_conteudo = dados
+        if anterior:
+            self._remover(anterior[0])
+        cursor = self.con.execute(
+            "INSERT INTO documentos (empresa, arquivo, caminho, mtime, tamanho, hash, total_paginas, erro) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (empresa, arquivo, caminho, info.st_mtime, info.st_size, hash_conteudo, len(paginas), erro),
+        )
+        documento = cursor.lastrowid
+        self.con.executemany(
+            "INSERT INTO paginas (texto, documento, pagina) VALUES (?, ?, ?)",
+            [(texto, documento, numero) for numero, texto in paginas],
+        )
+        self.con.executemany(
+            "INSERT INTO recomendacoes (frase, palavra_chave, idioma, documento, pagina) VALUES (?, ?, ?, ?, ?)",
+            [(rec["frase"], rec["palavra_chave"], rec["idioma"], documento, rec["pagina"]) for rec in recomendacoes],
+        )
+        self.con.commit()
+
+    # Função para buscar no acervo. Com somente_recomendacoes, busca só nas frases de recomendação.
+    # Retorna empresa, arquivo, caminho, página e um trecho com os termos marcados em **negrito**
+    def buscar(self, consulta, limite=50, empresa=None, somente_recomendacoes=False):
+        expressao = consulta_fts(consulta)
+        if not expressao:
+            return []
+        tabela, coluna = ("recomendacoes", "frase") if somente_recomendacoes else ("paginas", "texto")
+        sql = (
+            f"SELECT d.empresa, d.arquivo, d.caminho, {tabela}.pagina, "
+            f"snippet({tabela}, 0, '**', '**', '…', 16) "
+            f"FROM {tabela} JOIN documentos d ON d.id = {tabela}.documento "
+            f"WHERE {tabela} MATCH ?"
+        )
+        parametros = [f"{coluna} : ({expressao})"]
+        if empresa:
+            sql += " AND d.empresa = ?"
+            parametros.append(empresa)
+        sql += " ORDER BY rank LIMIT ?"
+        parametros.append(limite)
+        with self._trava:
+            return [
+                {"empresa": e, "arquivo": a, "caminho": c, "pagina": p, "trecho": t}
+                for e, a, c, p, t in self.con.execute(sql, parametros)
+            ]
+
+    def empresas(self):
+        with self._trava:
+            return [e for (e,) in self.con.execute("SELECT DISTINCT empresa FROM documentos ORDER BY empresa")]
+
+    def total_documentos(self):
+        with self._trava:
+            return self.con.execute("SELECT COUNT(*) FROM documentos").fetchone()[0]
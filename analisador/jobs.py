@@ -0,0 +1,274 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from analisador.armazem import FORMATO_JSONL, ArmazemResultados
+from analisador.cache import DIRETORIO_CACHE
+from analisador.manifesto import manifesto_padrao
+from analisador.pipeline import executar
+from analisador.recomendacoes import MATCHER, MatcherPalavrasChave
+from analisador.tempos import Cronometro, cronometro_de_dict
+
+CAMINHO_FILA_PADRAO = os.path.join(DIRETORIO_CACHE, "jobs.sqlite")
+
+ESTADO_PENDENTE = "pendente"
+ESTADO_EXECUTANDO = "executando"
+ESTADO_CONCLUIDO = "concluído"
+ESTADO_CANCELADO = "cancelado"
+ESTADO_ERRO = "erro"
+ESTADOS_FINAIS = (ESTADO_CONCLUIDO, ESTADO_CANCELADO, ESTADO_ERRO)
+
+# Intervalo (s) entre buscas por jobs pendentes e entre batimentos dos jobs em execução.
+# Um job "executando" sem batimento há mais de LIMITE_SEM_BATIMENTO segundos é de um
+# processo que morreu e volta para a fila, continuando das linhas que faltam
+INTERVALO_BUSCA = 1.0
+INTERVALO_BATIMENTO = 10.0
+LIMITE_SEM_BATIMENTO = 60.0
+
+
+class _Cancelado(Exception):
+    pass
+
+
+# Fila de análises de planilha em SQLite, executadas em segundo plano por threads do
+# próprio processo (cada job usa o pool de processos do lote). Os resultados são gravados
+# linha a linha: podem ser lidos durante a execução, sobrevivem a reruns do Streamlit e
+# ao fechamento da aba, e um job interrompido continua de onde parou
+class FilaJobs:
+    def __init__(self, caminho=CAMINHO_FILA_PADRAO):
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self._em_execucao = set()
+        self._threads = []
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    descricao TEXT,
+                    parametros TEXT NOT NULL,
+                    estado TEXT NOT NULL,
+                    cancelar INTEGER NOT NULL DEFAULT 0,
+                    total INTEGER NOT NULL,
+                    feitos INTEGER NOT NULL DEFAULT 0,
+                    erro TEXT,
+                    tempos TEXT,
+                    criado REAL NOT NULL,
+                    atualizado REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS resultados (
+                    job_id TEXT NOT NULL,
+                    indice INTEGER NOT NULL,
+                    resultado TEXT NOT NULL,
+                    PRIMARY KEY (job_id, indice)
+                );
+            """)
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    # Função para enviar uma análise por palavras-chave: registros são (numero, empresa, arquivo),
+    # como em AbaPlanilha.linhas. Com planilha (bytes do .xlsx) e aba, uma cópia é guardada para
+    # gravar os resultados de volta nela; com cronometro, os tempos já medidos (ex.: leitura da
+    # planilha) entram nos do job. Com armazem (uma pasta), as linhas também vão para um
+    # armazem.ArmazemResultados em <armazem>/<id do job>. Retorna o ID do job
+    def enviar(self, registros, descricao="", raiz="pdfs", max_workers=None, matcher=MATCHER, perfil=None,
+               planilha=None, aba=None, cronometro=None, armazem=None, formato_armazem=FORMATO_JSONL):
+        job_id = uuid.uuid4().hex[:12]
+        if planilha is not None:
+            os.makedirs(self._pasta_planilhas(), exist_ok=True)
+            with open(self.planilha_do_job(job_id), "wb") as f:
+                f.write(planilha)
+        parametros = {
+            "registros": [list(r) for r in registros],
+            "raiz": raiz,
+            "max_workers": max_workers,
+            "palavras_por_idioma": matcher.palavras_por_idioma(),
+            "perfil": perfil,
+            "aba": aba,
+            "tempos_envio": cronometro.como_dict() if cronometro else None,
+            "armazem": armazem,
+            "formato_armazem": formato_armazem,
+        }
+        agora = time.time()
+        with self._conectar() as con:
+            con.execute(
+                "INSERT INTO jobs (id, descricao, parametros, estado, total, criado, atualizado) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, descricao, json.dumps(parametros, ensure_ascii=False), ESTADO_PENDENTE, len(registros), agora, agora),
+            )
+        return job_id
+
+    def _pasta_planilhas(self):
+        return os.path.join(os.path.dirname(self.caminho), "planilhas_jobs")
+
+    # Caminho da cópia da planilha enviada com o job
+    def planilha_do_job(self, job_id):
+        return os.path.join(self._pasta_planilhas(), f"{job_id}.xlsx")
+
+    # Pasta do armazém de resultados do job, se ele grava em um
+    def armazem_do_job(self, job):
+        pasta = job["parametros"].get("armazem")
+        return os.path.join(pasta, job["id"]) if pasta else None
+
+    def _job(self, linha):
+        job_id, descricao, parametros, estado, cancelar, total, feitos, erro, tempos, criado, atualizado = linha
+        return {
+            "id": job_id,
+            "descricao": descricao,
+            "parametros": json.loads(parametros),
+            "estado": estado,
+            "cancelar": bool(cancelar),
+            "total": total,
+            "feitos": feitos,
+            "erro": erro,
+            "tempos": json.loads(tempos) if tempos else None,
+            "criado": criado,
+            "atualizado": atualizado,
+        }
+
+    def obter(self, job_id):
+        with self._conectar() as con:
+            linha = con.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(linha) if linha else None
+
+    def listar(self, limite=20):
+        with self._conectar() as con:
+            linhas = con.execute("SELECT * FROM jobs ORDER BY criado DESC LIMIT ?", (limite,)).fetchall()
+        return [self._job(linha) for linha in linhas]
+
+    # Resultados já gravados, na ordem das linhas da planilha (parciais enquanto o job roda)
+    def resultados(self, job_id):
+        with self._conectar() as con:
+            linhas = con.execute(
+                "SELECT indice, resultado FROM resultados WHERE job_id = ? ORDER BY indice", (job_id,)
+            ).fetchall()
+        return [(indice, json.loads(resultado)) for indice, resultado in linhas]
+
+    # Função para cancelar: um job pendente é cancelado na hora; um em execução, na próxima linha
+    def cancelar(self, job_id):
+        with self._conectar() as con:
+            con.execute(
+                "UPDATE jobs SET estado = ?, atualizado = ? WHERE id = ? AND estado = ?",
+                (ESTADO_CANCELADO, time.time(), job_id, ESTADO_PENDENTE),
+            )
+            con.execute("UPDATE jobs SET cancelar = 1 WHERE id = ? AND estado = ?", (job_id, ESTADO_EXECUTANDO))
+
+    # Função para iniciar as threads que executam os jobs; cada uma roda um job por vez
+    def iniciar_workers(self, n_threads=1):
+        for _ in range(n_threads):
+            thread = threading.Thread(target=self._trabalhar, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._bater, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _trabalhar(self):
+        while True:
+            job = self._proximo()
+            if job is None:
+                time.sleep(INTERVALO_BUSCA)
+                continue
+            self._executar(job)
+
+    # Mantém atualizado o horário dos jobs deste processo, para não serem tidos como órfãos
+    def _bater(self):
+        while True:
+            time.sleep(INTERVALO_BATIMENTO)
+            ids = list(self._em_execucao)
+            if ids:
+                with self._conectar() as con:
+                    con.executemany("UPDATE jobs SET atualizado = ? WHERE id = ?", [(time.time(), i) for i in ids])
+
+    # Pega o job pendente mais antigo (jobs órfãos voltam antes para a fila)
+    def _proximo(self):
+        con = self._conectar()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            con.execute(
+                "UPDATE jobs SET estado = CASE WHEN cancelar THEN ? ELSE ? END WHERE estado = ? AND atualizado < ?",
+                (ESTADO_CANCELADO, ESTADO_PENDENTE, ESTADO_EXECUTANDO, time.time() - LIMITE_SEM_BATIMENTO),
+            )
+            linha = con.execute(
+                "SELECT * FROM jobs WHERE estado = ? ORDER BY criado LIMIT 1", (ESTADO_PENDENTE,)
+            ).fetchone()
+            if linha is None:
+                con.commit()
+                return None
+            con.execute(
+                "UPDATE jobs SET estado = ?, atualizado = ? WHERE id = ?", (ESTADO_EXECUTANDO, time.time(), linha[0])
+            )
+            con.commit()
+            self._em_execucao.add(linha[0])
+            job = self._job(linha)
+            job["estado"] = ESTADO_EXECUTANDO
+            return job
+        finally:
+            con.close()
+
+    def _executar(self, job):
+        job_id = job["id"]
+        parametros = job["parametros"]
+        registros = parametros["registros"]
+
+        # Ao retomar um job interrompido, só as linhas ainda sem resultado são processadas.
+        # Com armazém, todas: ele é refeito do início (as já feitas vêm do manifesto)
+        pasta_armazem = self.armazem_do_job(job)
+        feitos = set() if pasta_armazem else {indice for indice, _ in self.resultados(job_id)}
+        pendentes = [i for i in range(len(registros)) if i not in feitos]
+        linhas = [(registros[i][1], registros[i][2]) for i in pendentes]
+
+        tempos_envio = parametros.get("tempos_envio")
+        cronometro = cronometro_de_dict(tempos_envio) if tempos_envio else Cronometro()
+        manifesto = manifesto_padrao()
+        armazem = None
+
+        def ao_progresso(resultados, feitos_agora, total, etapa):
+            with self._conectar() as con:
+                con.execute(
+                    "INSERT OR REPLACE INTO resultados (job_id, indice, resultado) VALUES (?, ?, ?)",
+                    (job_id, pendentes[feitos_agora - 1], json.dumps(resultados[-1], ensure_ascii=False)),
+                )
+                con.execute(
+                    "UPDATE jobs SET feitos = ?, atualizado = ? WHERE id = ?",
+                    (len(feitos) + feitos_agora, time.time(), job_id),
+                )
+                cancelar = con.execute("SELECT cancelar FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            if cancelar:
+                raise _Cancelado()
+
+        estado, erro = ESTADO_CONCLUIDO, None
+        try:
+            if pasta_armazem:
+                armazem = ArmazemResultados(pasta_armazem, parametros.get("formato_armazem", FORMATO_JSONL))
+            with cronometro.perfilar(parametros.get("perfil")):
+                executar(
+                    linhas,
+                    raiz=parametros["raiz"],
+                    max_workers=parametros["max_workers"],
+                    matcher=MatcherPalavrasChave(parametros["palavras_por_idioma"]),
+                    ao_progresso=ao_progresso,
+                    manifesto=manifesto,
+                    cronometro=cronometro,
+                    armazem=armazem,
+                )
+        except _Cancelado:
+            estado = ESTADO_CANCELADO
+        except Exception as e:
+            estado, erro = ESTADO_ERRO, str(e)
+        finally:
+            manifesto.fechar()
+            if armazem is not None:
+                armazem.fechar()
+            self._em_execucao.discard(job_id)
+
+        with self._conectar() as con:
+            con.execute(
+                "UPDATE jobs SET estado = ?, erro = ?, tempos = ?, atualizado = ? WHERE id = ?",
+                (estado, erro, cronometro.como_json(), time.time(), job_id),
+            )
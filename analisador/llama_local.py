@@ -0,0 +1,141 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from llama_cpp import Llama
+
+from analisador.cache import obter_cache
+
+MODELO_PADRAO = "models/llama-2-7b-chat.Q3_K_L.gguf"
+N_CTX_PADRAO = 2048
+MAX_TOKENS_PADRAO = 512
+
+CABECALHO_PROMPT = (
+    "### Instrução:\n"
+    "Você é um especialista técnico. Abaixo está um trecho das conclusões de um relatório técnico.\n"
+    "Extraia apenas as recomendações encontradas nas conclusões, em formato de bullet points.\n"
+    "Ignore qualquer conteúdo que não seja sugestão ou ação recomendada.\n\n"
+)
+CABECALHO_PROMPT_TRECHOS = (
+    "### Instrução:\n"
+    "Você é um especialista técnico. Abaixo estão trechos de um relatório técnico que contêm possíveis recomendações, "
+    "cada um precedido da página entre colchetes.\n"
+    "Extraia apenas as recomendações de fato, em formato de bullet points, indicando a página de cada uma.\n"
+    "Ignore qualquer conteúdo que não seja sugestão ou ação recomendada.\n\n"
+)
+RODAPE_PROMPT = "\n\n### Resposta:"
+
+# Modelo carregado em cada processo do pool
+_llm = None
+
+
+def _carregar_modelo(caminho_modelo, n_ctx, n_threads):
+    global _llm
+    # use_mmap: todas as instâncias compartilham as páginas do mesmo arquivo GGUF
+    _llm = Llama(model_path=caminho_modelo, n_ctx=n_ctx, n_threads=n_threads, use_mmap=True, verbose=False)
+
+
+def _aquecer():
+    return _llm is not None
+
+
+def _gerar(prompt, max_tokens):
+    output = _llm(prompt, max_tokens=max_tokens, stop=["###"])
+    return output["choices"][0]["text"].strip()
+
+
+# Pool de instâncias do LLaMA em processos separados, mantido aquecido entre execuções.
+# Os textos são cortados em pedaços que cabem no contexto, contando tokens antes da chamada
+class PoolLlama:
+    def __init__(self, caminho_modelo=MODELO_PADRAO, n_ctx=N_CTX_PADRAO, n_instancias=1,
+                 max_tokens=MAX_TOKENS_PADRAO, cache=None):
+        self.caminho_modelo = caminho_modelo
+        self.n_ctx = n_ctx
+        self.max_tokens = max_tokens
+        self.cache = cache or obter_cache("respostas_llama")
+        # Só o vocabulário no processo principal, para contar tokens
+        self.tokenizador = Llama(model_path=caminho_modelo, vocab_only=True, verbose=False)
+        # Tokens da instrução e tokens livres para o texto em cada prompt, por cabeçalho;
+        # conferidos antes de subir o pool
+        molduras = {
+            trechos: self.contar_tokens(cabecalho + RODAPE_PROMPT) + 1
+            for trechos, cabecalho in ((False, CABECALHO_PROMPT), (True, CABECALHO_PROMPT_TRECHOS))
+        }
+        self.espaco = {trechos: n_ctx - max_tokens - moldura for trechos, moldura in molduras.items()}
+        if min(self.espaco.values()) <= 0:
+            raise ValueError(
+                f"n_ctx={n_ctx} não comporta a instrução do prompt ({max(molduras.values())} tokens) "
+                f"e a resposta (max_tokens={max_tokens}): aumente n_ctx ou reduza max_tokens"
+            )
+
+        n_threads = max(1, (os.cpu_count() or 1) // n_instancias)
+        self.pool = ProcessPoolExecutor(
+            max_workers=n_instancias,
+            initializer=_carregar_modelo,
+            initargs=(caminho_modelo, n_ctx, n_threads),
+        )
+        # Carrega o modelo em todas as instâncias já na criação do pool
+        for futuro in [self.pool.submit(_aquecer) for _ in range(n_instancias)]:
+            futuro.result()
+
+    def contar_tokens(self, texto):
+        return len(self.tokenizador.tokenize(texto.encode("utf-8"), add_bos=False))
+
+    # Divide o texto em prompts que cabem em n_ctx junto com a resposta; com trechos, usa o
+    # cabeçalho dos trechos com palavras-chave (ver analisador.trechos)
+    def montar_prompts(self, texto, trechos=False):
+        cabecalho = CABECALHO_PROMPT_TRECHOS if trechos else CABECALHO_PROMPT
+        espaco = self.espaco[trechos]
+        tokens = self.tokenizador.tokenize(texto.encode("utf-8"), add_bos=False)
+        prompts = []
+        for inicio in range(0, max(len(tokens), 1), espaco):
+            trecho = self.tokenizador.detokenize(tokens[inicio:inicio + espaco]).decode("utf-8", errors="ignore")
+            prompts.append(cabecalho + trecho + RODAPE_PROMPT)
+        return prompts
+
+    def chave_cache(self, prompt):
+        hash_prompt = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"llama:{os.path.basename(self.caminho_modelo)}:{self.n_ctx}:{self.max_tokens}:{hash_prompt}"
+
+    # Função para extrair recomendações de vários textos; devolve as respostas na ordem dos textos.
+    # ao_concluir(i, resposta) é chamado na thread de quem chamou, à medida que cada texto termina.
+    # Com trechos, os textos são trechos com palavras-chave em vez de conclusões
+    def extrair_em_lote(self, textos, ao_concluir=None, trechos=False):
+        respostas = [None] * len(textos)
+        partes = {}
+        pendentes = {}
+        futuros = {}
+
+        for i, texto in enumerate(textos):
+            prompts = self.montar_prompts(texto, trechos)
+            partes[i] = [None] * len(prompts)
+            pendentes[i] = len(prompts)
+            for j, prompt in enumerate(prompts):
+                guardada = self.cache.obter(self.chave_cache(prompt))
+                if guardada is not None:
+                    partes[i][j] = guardada
+                    pendentes[i] -= 1
+                else:
+                    futuros[self.pool.submit(_gerar, prompt, self.max_tokens)] = (i, j, prompt)
+            if pendentes[i] == 0:
+                self._concluir(i, partes, respostas, ao_concluir)
+
+        for futuro in as_completed(futuros):
+            i, j, prompt = futuros[futuro]
+            try:
+                partes[i][j] = futuro.result()
+                self.cache.guardar(self.chave_cache(prompt), partes[i][j])
+            except Exception as e:
+                partes[i][j] = f"[Erro ao processar com LLaMA: {e}]"
+            pendentes[i] -= 1
+            if pendentes[i] == 0:
+                self._concluir(i, partes, respostas, ao_concluir)
+        return respostas
+
+    def _concluir(self, i, partes, respostas, ao_concluir):
+        respostas[i] = "\n".join(p for p in partes[i] if p)
+        if ao_concluir:
+            ao_concluir(i, respostas[i])
+
+    def fechar(self):
+        self.pool.shutdown()
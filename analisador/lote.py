@@ -0,0 +1,331 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from analisador.arquivos import IndiceArquivos
+from analisador.manifesto import versao_extrator
+from analisador.ocr import IDIOMAS_OCR, VERSAO_OCR, ocr_documento, ocr_workers_padrao, paginas_com_imagem
+from analisador.recomendacoes import MATCHER
+from analisador.secoes import CARACTERES_FINAIS, extrair_conclusoes
+from analisador.segmentacao import frases_do_pdf
+from analisador.trechos import ORCAMENTO_TOKENS_PADRAO, montar_trechos
+from analisador.tempos import (
+    ETAPA_EXTRACAO, ETAPA_LISTAGEM, ETAPA_LOCALIZACAO, ETAPA_MANIFESTO, ETAPA_OCR, ETAPA_REGEX, Cronometro, medir_em,
+    medir_iteracao,
+)
+
+STATUS_ENCONTRADO = "Encontrado"
+STATUS_SEM_RECOMENDACOES = "Sem recomendações"
+
+# Num PDF digitalizado sem seção de conclusões localizável, só as últimas páginas passam pelo OCR
+PAGINAS_OCR_FINAIS = 2
+
+# Modos de processamento: recomendações por palavras-chave, só o texto das conclusões
+# ou só os trechos em volta das palavras-chave; os dois últimos são enviados ao modelo
+# fora do pool (OpenAI, LLaMA)
+MODO_RECOMENDACOES = "recomendacoes"
+MODO_CONCLUSOES = "conclusoes"
+MODO_TRECHOS = "trechos"
+
+# Matcher e orçamento de tokens dos trechos usados pelos workers; definidos pelo inicializador do pool
+_matcher = MATCHER
+_orcamento_tokens = ORCAMENTO_TOKENS_PADRAO
+
+
+def _iniciar_worker(matcher, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO):
+    global _matcher, _orcamento_tokens
+    _matcher = matcher
+    _orcamento_tokens = orcamento_tokens
+
+
+def _resultado_vazio(empresa, nome_arquivo):
+    return {
+        "Empresa": empresa,
+        "Arquivo": nome_arquivo,
+        "Status": None,
+        "caminho": None,
+        "candidatos": [],
+        "texto": None,
+        "paginas": [],
+        "recomendacoes": [],
+        # Páginas sem texto, a reconhecer no pool de OCR, e as que o OCR reconheceu
+        "paginas_sem_texto": [],
+        "paginas_ocr": [],
+        # Tokens estimados dos trechos a enviar ao modelo (MODO_TRECHOS)
+        "tokens": 0,
+        # Segundos gastos em cada etapa desta linha, somados ao Cronometro no processo principal
+        "tempos": {},
+    }
+
+
+# Função para processar uma linha da planilha, já localizada no processo principal
+# (arquivos.Localizacao): lê o texto do PDF e extrai as recomendações
+def analisar_linha(tarefa):
+    empresa, nome_arquivo, modo, (caminho, status, candidatos) = tarefa
+    resultado = _resultado_vazio(empresa, nome_arquivo)
+    resultado["candidatos"] = candidatos
+    if caminho is None:
+        resultado["Status"] = status
+        return resultado
+    return _analisar_pdf(resultado, caminho, modo)
+
+
+# Função para processar um PDF já localizado (ex.: baixado do Azure Blob)
+def analisar_arquivo(tarefa):
+    empresa, nome_arquivo, caminho, modo = tarefa
+    return _analisar_pdf(_resultado_vazio(empresa, nome_arquivo), caminho, modo)
+
+
+def _analisar_pdf(resultado, caminho, modo):
+    resultado["caminho"] = caminho
+    _ler_pdf(resultado, caminho, modo)
+    if resultado["paginas_sem_texto"]:
+        with medir_em(resultado["tempos"], ETAPA_EXTRACAO):
+            resultado["paginas_sem_texto"] = paginas_com_imagem(caminho, resultado["paginas_sem_texto"])
+    return resultado
+
+
+def _ler_pdf(resultado, caminho, modo):
+    if modo == MODO_CONCLUSOES:
+        # Só as páginas das conclusões são lidas
+        with medir_em(resultado["tempos"], ETAPA_EXTRACAO):
+            secao = extrair_conclusoes(caminho)
+        resultado["texto"] = secao["texto"]
+        resultado["paginas"] = secao["paginas"]
+        resultado["Status"] = STATUS_ENCONTRADO
+        if not secao["texto"].strip():
+            # Conclusões sem texto (digitalizadas): vão para o OCR
+            paginas = secao["paginas"]
+            resultado["paginas_sem_texto"] = paginas[-PAGINAS_OCR_FINAIS:] if secao["origem"] == "final" else paginas
+        return resultado
+
+    if modo == MODO_TRECHOS:
+        # Palavras-chave primeiro; ao modelo vão só os trechos com elas (texto None: sem chamada)
+        tempos = resultado["tempos"]
+        inicio = time.perf_counter()
+        frases = medir_iteracao(tempos, ETAPA_EXTRACAO, frases_do_pdf(caminho, sem_texto=resultado["paginas_sem_texto"]))
+        trechos = montar_trechos(frases, _matcher, orcamento_tokens=_orcamento_tokens)
+        tempos[ETAPA_REGEX] = time.perf_counter() - inicio - tempos.get(ETAPA_EXTRACAO, 0.0)
+        resultado["texto"] = trechos["texto"]
+        resultado["paginas"] = trechos["paginas"]
+        resultado["recomendacoes"] = trechos["recomendacoes"]
+        resultado["tokens"] = trechos["tokens"]
+        resultado["Status"] = STATUS_ENCONTRADO if trechos["texto"] else STATUS_SEM_RECOMENDACOES
+        return resultado
+
+    # Página a página: o texto inteiro do documento nunca fica em memória no worker.
+    # As frases vêm já refeitas (quebras de linha, abreviações), sem repetições e com a página
+    tempos = resultado["tempos"]
+    inicio = time.perf_counter()
+    frases = medir_iteracao(tempos, ETAPA_EXTRACAO, frases_do_pdf(caminho, sem_texto=resultado["paginas_sem_texto"]))
+    resultado["recomendacoes"] = list(_matcher.extrair_de_frases(frases))
+    tempos[ETAPA_REGEX] = time.perf_counter() - inicio - tempos.get(ETAPA_EXTRACAO, 0.0)
+    resultado["Status"] = STATUS_ENCONTRADO if resultado["recomendacoes"] else STATUS_SEM_RECOMENDACOES
+    return resultado
+
+
+# Número padrão de processos do pool
+def workers_padrao():
+    return os.cpu_count() or 1
+
+
+# Função para completar o resultado de um PDF com as páginas reconhecidas pelo OCR.
+# Se o OCR falhou (ou está desativado), o status diz quantas páginas ficaram sem leitura
+def _aplicar_ocr(resultado, ocr, modo, matcher, orcamento_tokens):
+    resultado["tempos"][ETAPA_OCR] = ocr["segundos"]
+    resultado["paginas_ocr"] = ocr["paginas"]
+    frases = ocr["frases"]
+    if modo == MODO_CONCLUSOES:
+        if frases:
+            resultado["texto"] = " ".join(frase["frase"] for frase in frases)[-CARACTERES_FINAIS:]
+        elif not resultado["texto"].strip():
+            # Nada a enviar ao modelo
+            resultado["texto"] = None
+    elif modo == MODO_TRECHOS:
+        trechos = montar_trechos(frases, matcher, orcamento_tokens=max(orcamento_tokens - resultado["tokens"], 0))
+        resultado["recomendacoes"] = sorted(resultado["recomendacoes"] + trechos["recomendacoes"], key=lambda r: r["pagina"] or 0)
+        if trechos["texto"]:
+            resultado["texto"] = "\n\n".join(t for t in (resultado["texto"], trechos["texto"]) if t)
+            resultado["paginas"] = sorted(set(resultado["paginas"]) | set(trechos["paginas"]))
+            resultado["tokens"] += trechos["tokens"]
+            resultado["Status"] = STATUS_ENCONTRADO
+    else:
+        novas = list(matcher.extrair_de_frases(frases))
+        resultado["recomendacoes"] = sorted(resultado["recomendacoes"] + novas, key=lambda r: r["pagina"] or 0)
+        if novas:
+            resultado["Status"] = STATUS_ENCONTRADO
+
+    if ocr["erro"]:
+        n = len(resultado["paginas_sem_texto"])
+        resultado["Status"] += f"; {n} página(s) sem texto não lida(s) (OCR: {ocr['erro']})"
+    return resultado
+
+
+# Função para passar pelo OCR, num pool próprio e limitado, as páginas sem texto dos resultados,
+# para que documentos digitalizados não atrasem a leitura normal no outro pool. Os resultados
+# continuam na mesma ordem: cada um sai quando ele e os anteriores estão completos
+def _completar_com_ocr(resultados, modo, matcher, ocr_workers, orcamento_tokens):
+    pool = None
+    fila = deque()
+    try:
+        for resultado in resultados:
+            futuro = None
+            if resultado["paginas_sem_texto"] and ocr_workers:
+                pool = pool or ProcessPoolExecutor(max_workers=ocr_workers)
+                futuro = pool.submit(ocr_documento, (resultado["caminho"], resultado["paginas_sem_texto"], IDIOMAS_OCR))
+            fila.append((resultado, futuro))
+            while fila and (fila[0][1] is None or fila[0][1].done()):
+                yield _concluir_ocr(*fila.popleft(), modo, matcher, orcamento_tokens)
+        while fila:
+            yield _concluir_ocr(*fila.popleft(), modo, matcher, orcamento_tokens)
+    finally:
+        resultados.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _concluir_ocr(resultado, futuro, modo, matcher, orcamento_tokens):
+    if not resultado["paginas_sem_texto"]:
+        return resultado
+    if futuro is None:
+        ocr = {"frases": [], "paginas": [], "segundos": 0.0, "erro": "desativado"}
+    else:
+        ocr = futuro.result()
+    return _aplicar_ocr(resultado, ocr, modo, matcher, orcamento_tokens)
+
+
+def _executar_tarefas(funcao, tarefas, max_workers, matcher, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO):
+    if not tarefas:
+        return
+    if max_workers <= 1 or len(tarefas) <= 1:
+        _iniciar_worker(matcher, orcamento_tokens)
+        for tarefa in tarefas:
+            yield funcao(tarefa)
+        return
+
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_iniciar_worker, initargs=(matcher, orcamento_tokens)
+    )
+    try:
+        yield from pool.map(funcao, tarefas)
+    finally:
+        # Se o consumo parar antes do fim (ex.: job cancelado), as tarefas ainda na fila são descartadas
+        pool.shutdown(cancel_futures=True)
+
+
+# Função para processar as linhas (empresa, nome_arquivo) num pool de processos.
+# Os resultados são devolvidos à medida que ficam prontos, sempre na ordem das linhas.
+# Todas as linhas são localizadas antes, no processo principal, e as que levam ao mesmo PDF
+# (mesmo com o nome escrito de outro jeito, em várias linhas ou abas) são analisadas uma vez só.
+# Com um manifesto, linhas cujo PDF não mudou desde a última execução são reaproveitadas
+# dele (marcadas com "reaproveitado") e só as novas ou alteradas vão para o pool.
+# Os tempos de cada etapa são somados ao cronometro, se dado. orcamento_tokens só vale no MODO_TRECHOS.
+# Páginas sem texto passam pelo OCR em ocr_workers processos à parte (0 desativa)
+def processar_em_lote(linhas, raiz="pdfs", modo=MODO_RECOMENDACOES, max_workers=None, matcher=MATCHER, manifesto=None, cronometro=None,
+                      orcamento_tokens=ORCAMENTO_TOKENS_PADRAO, ocr_workers=None):
+    max_workers = max_workers or workers_padrao()
+    ocr_workers = ocr_workers_padrao() if ocr_workers is None else ocr_workers
+    cronometro = cronometro or Cronometro()
+    # O índice de pdfs/ é montado uma única vez
+    with cronometro.medir(ETAPA_LISTAGEM):
+        indice = IndiceArquivos(raiz)
+    with cronometro.medir(ETAPA_LOCALIZACAO):
+        localizacoes = [indice.localizar(empresa, nome_arquivo) for empresa, nome_arquivo in linhas]
+    versao = versao_extrator(modo, matcher)
+    if modo == MODO_TRECHOS:
+        versao += f":{orcamento_tokens}"
+    versao += f":ocr{VERSAO_OCR}" if ocr_workers else ":sem_ocr"
+
+    guardados = [None] * len(linhas)
+    if manifesto is not None:
+        with cronometro.medir(ETAPA_MANIFESTO):
+            _consultar_manifesto(manifesto, localizacoes, linhas, versao, guardados)
+
+    # Uma tarefa por PDF localizado; as linhas repetidas recebem uma cópia do resultado
+    tarefas = []
+    repeticoes = {}
+    for (empresa, nome_arquivo), localizacao, guardado in zip(linhas, localizacoes, guardados):
+        if guardado is None:
+            chave = _chave(empresa, nome_arquivo, localizacao)
+            if chave not in repeticoes:
+                repeticoes[chave] = 0
+                tarefas.append((empresa, nome_arquivo, modo, localizacao))
+            else:
+                repeticoes[chave] += 1
+    prontos = {}
+    lidos = _executar_tarefas(analisar_linha, tarefas, max_workers, matcher, orcamento_tokens)
+    novos = _completar_com_ocr(lidos, modo, matcher, ocr_workers, orcamento_tokens)
+
+    try:
+        for (empresa, nome_arquivo), localizacao, guardado in zip(linhas, localizacoes, guardados):
+            if guardado is not None:
+                guardado["reaproveitado"] = True
+                cronometro.contar("linhas_reaproveitadas")
+                yield guardado
+                continue
+            chave = _chave(empresa, nome_arquivo, localizacao)
+            if chave in prontos:
+                cronometro.contar("linhas_repetidas")
+                copia = _copia_repetida(prontos, chave, repeticoes, empresa, nome_arquivo)
+                # Cada linha tem sua entrada no manifesto, ou a repetida seria refeita a cada execução
+                if manifesto is not None and copia["caminho"] is not None:
+                    manifesto.registrar(empresa, nome_arquivo, versao, copia["caminho"], copia)
+                yield copia
+                continue
+            resultado = next(novos)
+            if repeticoes[chave]:
+                prontos[chave] = resultado
+            resultado["reaproveitado"] = False
+            if resultado["paginas_ocr"]:
+                cronometro.contar("paginas_ocr", len(resultado["paginas_ocr"]))
+            cronometro.registrar_linha(resultado["Empresa"], resultado["Arquivo"], resultado["tempos"])
+            if manifesto is not None and resultado["caminho"] is not None:
+                manifesto.registrar(resultado["Empresa"], resultado["Arquivo"], versao, resultado["caminho"], resultado)
+            yield resultado
+    finally:
+        novos.close()
+        if manifesto is not None:
+            manifesto.salvar()
+
+
+# Linhas com o mesmo PDF localizado são a mesma análise; sem PDF, só se o texto da linha é igual
+def _chave(empresa, nome_arquivo, localizacao):
+    if localizacao.caminho is not None:
+        return localizacao.caminho
+    return (empresa, nome_arquivo)
+
+
+# Cópia do resultado para uma linha repetida, com a empresa e o arquivo como escritos nela
+# e sem os tempos (já contados na primeira); o original é descartado depois da última repetição
+def _copia_repetida(prontos, chave, repeticoes, empresa, nome_arquivo):
+    resultado = dict(prontos[chave])
+    resultado["Empresa"] = empresa
+    resultado["Arquivo"] = nome_arquivo
+    resultado["tempos"] = {}
+    resultado["reaproveitado"] = True
+    repeticoes[chave] -= 1
+    if not repeticoes[chave]:
+        del prontos[chave]
+    return resultado
+
+
+# Linhas cujo PDF não mudou desde a execução registrada no manifesto
+def _consultar_manifesto(manifesto, localizacoes, linhas, versao, guardados):
+    for i, ((empresa, nome_arquivo), localizacao) in enumerate(zip(linhas, localizacoes)):
+        if localizacao.caminho is not None:
+            guardados[i] = manifesto.obter(empresa, nome_arquivo, versao, localizacao.caminho)
+
+
+# Função para processar PDFs já localizados, dados como (empresa, nome_arquivo, caminho),
+# no mesmo pool de processos e na mesma ordem, com o OCR como em processar_em_lote
+def processar_arquivos(arquivos, modo=MODO_RECOMENDACOES, max_workers=None, matcher=MATCHER, cronometro=None, ocr_workers=None):
+    cronometro = cronometro or Cronometro()
+    ocr_workers = ocr_workers_padrao() if ocr_workers is None else ocr_workers
+    tarefas = [(empresa, nome_arquivo, caminho, modo) for empresa, nome_arquivo, caminho in arquivos]
+    lidos = _executar_tarefas(analisar_arquivo, tarefas, max_workers or workers_padrao(), matcher)
+    for resultado in _completar_com_ocr(lidos, modo, matcher, ocr_workers, ORCAMENTO_TOKENS_PADRAO):
+        if resultado["paginas_ocr"]:
+            cronometro.contar("paginas_ocr", len(resultado["paginas_ocr"]))
+        cronometro.registrar_linha(resultado["Empresa"], resultado["Arquivo"], resultado["tempos"])
+        yield resultado
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+from analisador.cache import DIRETORIO_CACHE, hash_arquivo
+from analisador.pdf import VERSAO_EXTRATOR
+from analisador.secoes import VERSAO_LOCALIZADOR
+from analisador.segmentacao import VERSAO_SEGMENTACAO
+
+
+# Versão do que é extraído de cada PDF: muda com o extrator, o localizador de
+# conclusões, a segmentação em frases, o modo do lote e as palavras-chave do matcher
+def versao_extrator(modo, matcher):
+    palavras = json.dumps(sorted(matcher.idiomas.items()), ensure_ascii=False)
+    assinatura = hashlib.sha256(palavras.encode("utf-8")).hexdigest()[:12]
+    return f"{modo}:{VERSAO_EXTRATOR}:{VERSAO_LOCALIZADOR}:{VERSAO_SEGMENTACAO}:{assinatura}"
+
+
+# Manifesto de uma execução: para cada (empresa, arquivo) guarda o PDF encontrado,
+# seu hash e o resultado, para que a próxima execução só refaça o que mudou.
+# Cada linha é gravada na hora (modo WAL): apps e jobs que compartilham o manifesto não
+# esperam pelo fim da execução dos outros, e uma execução interrompida não perde o que já fez
+class Manifesto:
+    def __init__(self, caminho):
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self.con = sqlite3.connect(caminho, timeout=30)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS manifesto ("
+            "empresa TEXT NOT NULL, arquivo TEXT NOT NULL, versao TEXT NOT NULL, "
+            "caminho TEXT NOT NULL, mtime REAL NOT NULL, tamanho INTEGER NOT NULL, "
+            "hash TEXT NOT NULL, resultado TEXT NOT NULL, "
+            "PRIMARY KEY (empresa, arquivo, versao))"
+        )
+        self.con.commit()
+
+    # Resultado guardado, se o PDF encontrado agora for o mesmo (mesmo caminho e conteúdo)
+    def obter(self, empresa, arquivo, versao, caminho):
+        linha = self.con.execute(
+            "SELECT caminho, mtime, tamanho, hash, resultado FROM manifesto "
+            "WHERE empresa = ? AND arquivo = ? AND versao = ?",
+            (empresa, arquivo, versao),
+        ).fetchone()
+        if linha is None or linha[0] != caminho:
+            return None
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            return None
+
+        # mtime e tamanho iguais: nem é preciso reler o arquivo para o hash
+        if (info.st_mtime, info.st_size) != (linha[1], linha[2]):
+            if hash_arquivo(caminho) != linha[3]:
+                return None
+            self.con.execute(
+                "UPDATE manifesto SET mtime = ?, tamanho = ? WHERE empresa = ? AND arquivo = ? AND versao = ?",
+                (info.st_mtime, info.st_size, empresa, arquivo, versao),
+            )
+            self.con.commit()
+        return json.loads(linha[4])
+
+    def registrar(self, empresa, arquivo, versao, caminho, resultado):
+        try:
+            info = os.stat(caminho)
+            hash_conteudo = hash_arquivo(caminho)
+        except OSError:
+            return
+        self.con.execute(
+            "INSERT OR REPLACE INTO manifesto "
+            "(empresa, arquivo, versao, caminho, mtime, tamanho, hash, resultado) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (empresa, arquivo, versao, caminho, info.st_mtime, info.st_size, hash_conteudo,
+             json.dumps(resultado, ensure_ascii=False)),
+        )
+        self.con.commit()
+
+    def salvar(self):
+        self.con.commit()
+
+    def fechar(self):
+        self.con.commit()
+        self.con.close()
+
+
+# Manifesto padrão dos apps Streamlit, dentro do diretório de cache
+def manifesto_padrao():
+    return Manifesto(os.path.join(DIRETORIO_CACHE, "manifesto.sqlite"))
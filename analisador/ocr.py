@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import time
+
+import fitz  # PyMuPDF
+
+from analisador.cache import obter_cache
+from analisador.segmentacao import remover_duplicadas, segmentar_paginas
+
+# Versão do OCR; mudar invalida as páginas já reconhecidas guardadas em cache
+VERSAO_OCR = "1"
+
+# Idiomas do Tesseract (relatórios em PT/EN/FR/ES) e resolução da imagem reconhecida
+IDIOMAS_OCR = "por+eng+fra+spa"
+DPI_OCR = 300
+
+
+# Número padrão de processos de OCR: poucos, para não tomar a CPU da leitura normal dos PDFs
+def ocr_workers_padrao():
+    return max(1, (os.cpu_count() or 1) // 4)
+
+
+# Hash do conteúdo da página (operadores de desenho e imagens), para que a mesma página
+# digitalizada, mesmo em outro arquivo, só passe pelo OCR uma vez
+def hash_pagina(doc, page):
+    sha = hashlib.sha256(page.read_contents())
+    for imagem in page.get_images(full=True):
+        sha.update(doc.xref_stream_raw(imagem[0]) or b"")
+    return sha.hexdigest()
+
+
+# Só o necessário para a segmentação (ver segmentacao._linhas_da_pagina), para o cache ficar pequeno
+def _reduzir(pagina):
+    return {
+        "blocks": [
+            {"lines": [{"bbox": linha["bbox"], "spans": [{"text": s["text"]} for s in linha["spans"]]} for linha in bloco.get("lines", [])]}
+            for bloco in pagina["blocks"]
+        ]
+    }
+
+
+# Função para filtrar, das páginas sem texto, as que têm imagem (as em branco não vão para o OCR)
+def paginas_com_imagem(caminho_pdf, paginas):
+    if not paginas:
+        return []
+    doc = fitz.open(caminho_pdf)
+    try:
+        return [numero for numero in paginas if doc.load_page(numero - 1).get_images()]
+    finally:
+        doc.close()
+
+
+def _reconhecer(page, idiomas):
+    textpage = page.get_textpage_ocr(language=idiomas, dpi=DPI_OCR, full=True)
+    return _reduzir(page.get_text("dict", textpage=textpage, flags=fitz.TEXTFLAGS_TEXT))
+
+
+# Função para reconhecer as páginas sem texto de um PDF, rodada no pool de OCR.
+# tarefa: (caminho, paginas (1-based), idiomas). Retorna as frases reconhecidas, com
+# página e posição como em segmentacao.frases_do_pdf, as páginas em que havia texto,
+# os segundos gastos e o erro, se o OCR falhou (ex.: Tesseract não instalado)
+def ocr_documento(tarefa):
+    caminho, paginas, idiomas = tarefa
+    cache = obter_cache("ocr")
+    inicio = time.perf_counter()
+    reconhecidas = []
+    erro = None
+    try:
+        doc = fitz.open(caminho)
+        try:
+            for numero in paginas:
+                page = doc.load_page(numero - 1)
+                chave = f"ocr:{VERSAO_OCR}:{idiomas}:{DPI_OCR}:{hash_pagina(doc, page)}"
+                guardada = cache.obter(chave)
+                if guardada is not None:
+                    pagina = json.loads(guardada)
+                else:
+                    pagina = _reconhecer(page, idiomas)
+                    cache.guardar(chave, json.dumps(pagina, ensure_ascii=False))
+                reconhecidas.append((numero, pagina))
+        finally:
+            doc.close()
+    except Exception as e:
+        erro = str(e)
+
+    frases = list(remover_duplicadas(segmentar_paginas(reconhecidas)))
+    return {
+        "frases": frases,
+        "paginas": sorted({frase["pagina"] for frase in frases}),
+        "segundos": time.perf_counter() - inicio,
+        "erro": erro,
+    }
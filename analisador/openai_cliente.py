@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import deque
+
+import openai
+
+from analisador.cache import obter_cache
+
+MODELO_PADRAO = "gpt-3.5-turbo"
+TEMPERATURA_PADRAO = 0.2
+
+# Erros transitórios que merecem nova tentativa (429, 5xx, rede)
+_ERROS_TRANSITORIOS = (
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError,
+    openai.error.Timeout,
+    openai.error.APIConnectionError,
+)
+
+
+# Função para montar a conversa que extrai recomendações das conclusões ou, com trechos,
+# dos trechos com palavras-chave (ver analisador.trechos)
+def montar_mensagens(texto, trechos=False):
+    if trechos:
+        return _mensagens_trechos(texto)
+    prompt_inicial = (
+        "Você é um especialista técnico. Abaixo está um trecho das conclusões de um relatório técnico.\n"
+        "Extraia apenas as recomendações encontradas nas conclusões, em formato de lista com marcadores (bullet points).\n"
+        "Ignore qualquer informação que não seja uma sugestão, orientação ou ação proposta.\n\n"
+        f"Texto:\n\"\"\"\n{texto}\n\"\"\""
+    )
+    return [
+        {"role": "system", "content": "Você é um especialista técnico. Extraia recomendações das conclusões de relatórios."},
+        {"role": "user", "content": prompt_inicial},
+    ]
+
+
+def _mensagens_trechos(texto):
+    prompt_inicial = (
+        "Você é um especialista técnico. Abaixo estão trechos de um relatório técnico que contêm possíveis "
+        "recomendações, cada um precedido da página entre colchetes.\n"
+        "Extraia apenas as recomendações de fato, em formato de lista com marcadores (bullet points), "
+        "indicando a página de cada uma.\n"
+        "Ignore qualquer informação que não seja uma sugestão, orientação ou ação proposta.\n\n"
+        f"Texto:\n\"\"\"\n{texto}\n\"\"\""
+    )
+    return [
+        {"role": "system", "content": "Você é um especialista técnico. Extraia recomendações de trechos de relatórios."},
+        {"role": "user", "content": prompt_inicial},
+    ]
+
+
+# Estimativa grosseira de tokens (~4 caracteres por token), suficiente para respeitar o TPM
+def estimar_tokens(mensagens, max_tokens=0):
+    return sum(len(m["content"]) for m in mensagens) // 4 + max_tokens
+
+
+def _transitorio(erro):
+    if isinstance(erro, _ERROS_TRANSITORIOS):
+        return True
+    status = getattr(erro, "http_status", None)
+    return isinstance(erro, openai.error.APIError) and status is not None and status >= 500
+
+
+def _espera_sugerida(erro):
+    headers = getattr(erro, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+# Limite de requisições e de tokens por minuto, em janela deslizante de 60 s
+class LimitadorTaxa:
+    def __init__(self, rpm, tpm):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.janela = deque()
+        self.tokens_na_janela = 0
+        self.trava = asyncio.Lock()
+
+    def _limpar(self, agora):
+        while self.janela and agora - self.janela[0][0] >= 60:
+            _, tokens = self.janela.popleft()
+            self.tokens_na_janela -= tokens
+
+    async def aguardar(self, tokens):
+        tokens = min(tokens, self.tpm)
+        async with self.trava:
+            while True:
+                agora = time.monotonic()
+                self._limpar(agora)
+                if len(self.janela) < self.rpm and self.tokens_na_janela + tokens <= self.tpm:
+                    self.janela.append((agora, tokens))
+                    self.tokens_na_janela += tokens
+                    return
+                await asyncio.sleep(max(0.05, 60 - (agora - self.janela[0][0])))
+
+
+# Cliente OpenAI com várias requisições em voo, limites de RPM/TPM, novas tentativas
+# com backoff exponencial e cache persistente das respostas por (modelo, hash do prompt, temperatura)
+class ClienteOpenAI:
+    def __init__(self, api_key, modelo=MODELO_PADRAO, temperatura=TEMPERATURA_PADRAO,
+                 rpm=500, tpm=90000, max_concorrencia=8, max_tentativas=6,
+                 max_tokens=None, api_base=None, cache=None):
+        self.api_key = api_key
+        self.modelo = modelo
+        self.temperatura = temperatura
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concorrencia = max_concorrencia
+        self.max_tentativas = max_tentativas
+        self.max_tokens = max_tokens
+        self.api_base = api_base
+        self.cache = cache or obter_cache("respostas_openai")
+
+    def chave_cache(self, mensagens):
+        prompt = json.dumps(mensagens, ensure_ascii=False, sort_keys=True)
+        hash_prompt = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"openai:{self.modelo}:{self.temperatura}:{hash_prompt}"
+
+    async def _chamar(self, mensagens):
+        parametros = {
+            "model": self.modelo,
+            "messages": mensagens,
+            "temperature": self.temperatura,
+            "api_key": self.api_key,
+        }
+        if self.max_tokens:
+            parametros["max_tokens"] = self.max_tokens
+        if self.api_base:
+            parametros["api_base"] = self.api_base
+        response = await openai.ChatCompletion.acreate(**parametros)
+        return response["choices"][0]["message"]["content"].strip()
+
+    async def completar(self, mensagens, limitador, semaforo):
+        chave = self.chave_cache(mensagens)
+        guardada = self.cache.obter(chave)
+        if guardada is not None:
+            return guardada
+
+        tokens = estimar_tokens(mensagens, self.max_tokens or 0)
+        for tentativa in range(self.max_tentativas):
+            await limitador.aguardar(tokens)
+            try:
+                async with semaforo:
+                    resposta = await self._chamar(mensagens)
+            except Exception as e:
+                if not _transitorio(e) or tentativa == self.max_tentativas - 1:
+                    return f"[Erro ao usar OpenAI: {e}]"
+                espera = _espera_sugerida(e) or min(60, 2 ** tentativa) + random.uniform(0, 1)
+                await asyncio.sleep(espera)
+                continue
+            self.cache.guardar(chave, resposta)
+            return resposta
+
+    async def _completar_todas(self, lista_mensagens, ao_concluir):
+        limitador = LimitadorTaxa(self.rpm, self.tpm)
+        semaforo = asyncio.Semaphore(self.max_concorrencia)
+
+        async def tarefa(i, mensagens):
+            resposta = await self.completar(mensagens, limitador, semaforo)
+            if ao_concluir:
+                ao_concluir(i, resposta)
+            return resposta
+
+        return await asyncio.gather(*(tarefa(i, m) for i, m in enumerate(lista_mensagens)))
+
+    # Função para rodar todas as conversas e devolver as respostas na mesma ordem.
+    # ao_concluir(i, resposta) é chamado na thread de quem chamou, à medida que cada uma termina
+    def completar_em_lote(self, lista_mensagens, ao_concluir=None):
+        if not lista_mensagens:
+            return []
+        return asyncio.run(self._completar_todas(lista_mensagens, ao_concluir))
+
+    # Função para extrair recomendações de vários textos de conclusões ou, com trechos, de trechos
+    # com palavras-chave (mesma interface do PoolLlama)
+    def extrair_em_lote(self, textos, ao_concluir=None, trechos=False):
+        return self.completar_em_lote([montar_mensagens(texto, trechos) for texto in textos], ao_concluir)
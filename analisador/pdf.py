@@ -0,0 +1,29 @@
+import fitz  # PyMuPDF
+
+# Versão do extrator de texto; mudar invalida o texto já guardado em cache
+VERSAO_EXTRATOR = "1"
+
+# Na leitura página a página, o cache interno do MuPDF (fontes, imagens) é esvaziado
+# a cada tantas páginas, para a memória não crescer com o tamanho do documento
+PAGINAS_POR_LIMPEZA = 50
+
+# Texto acima deste tamanho (em caracteres) não vai para o cache na leitura página a página
+# (ver segmentacao.frases_do_pdf): guardá-lo exigiria manter o documento inteiro em memória
+LIMITE_TEXTO_CACHE = 4 * 1024 * 1024
+
+
+# Função para ler o PDF página a página: gera (numero_da_pagina, texto), começando em 1.
+# modo e opcoes vão para page.get_text (ex.: "dict" para blocos e linhas com posição)
+def ler_paginas(caminho_pdf, modo="text", **opcoes):
+    doc = fitz.open(caminho_pdf)
+    try:
+        for page in doc:
+            numero = page.number + 1
+            texto = page.get_text(modo, **opcoes)
+            del page
+            if numero % PAGINAS_POR_LIMPEZA == 0:
+                fitz.TOOLS.store_shrink(100)
+            yield numero, texto
+    finally:
+        doc.close()
+        fitz.TOOLS.store_shrink(100)
@@ -0,0 +1,259 @@
+import csv
+import json
+import os
+import time
+from io import BytesIO
+
+from openpyxl import Workbook
+
+from analisador.lote import MODO_CONCLUSOES, MODO_RECOMENDACOES, MODO_TRECHOS, processar_arquivos, processar_em_lote
+from analisador.recomendacoes import MATCHER, formatar_recomendacoes
+from analisador.tempos import ETAPA_DOWNLOAD, ETAPA_MODELO, Cronometro
+from analisador.trechos import ORCAMENTO_TOKENS_PADRAO
+
+# Etapas informadas ao ao_progresso; download e modelo são as mesmas do cronômetro
+ETAPA_LEITURA = "leitura"
+
+RECOMENDACAO_PENDENTE = "⏳"
+
+# Colunas de linha_resultado, para gravar as linhas em fluxo sem examinar todas antes
+COLUNAS_LINHA_RESULTADO = ["Empresa", "Arquivo", "Status", "Recomendações", "Palavras-chave", "Idiomas"]
+
+
+# Linha da planilha de resultado para a análise por palavras-chave
+def linha_resultado(resultado):
+    recomendacoes = resultado["recomendacoes"]
+    return {
+        "Empresa": resultado["Empresa"],
+        "Arquivo": resultado["Arquivo"],
+        "Status": resultado["Status"],
+        "Recomendações": formatar_recomendacoes(recomendacoes),
+        "Palavras-chave": ", ".join(sorted({kw for rec in recomendacoes for kw in rec["palavras_chave"]})) or "-",
+        "Idiomas": ", ".join(sorted({idioma for rec in recomendacoes for idioma in rec["idiomas"]})) or "-",
+    }
+
+
+# Linha da planilha de resultado para a análise por modelo (OpenAI, LLaMA), antes da resposta
+def linha_resultado_modelo(resultado):
+    return {
+        "Empresa": resultado["Empresa"],
+        "Arquivo": resultado["Arquivo"],
+        "Status": resultado["Status"],
+        "Páginas analisadas": ", ".join(str(p) for p in resultado["paginas"]) or "-",
+        "Recomendações": RECOMENDACAO_PENDENTE if resultado["texto"] is not None else "-",
+    }
+
+
+# Função para analisar as linhas (empresa, nome_arquivo) da planilha.
+# Sem modelo, usa as palavras-chave; com modelo (ClienteOpenAI ou PoolLlama), envia a ele só as conclusões.
+# Com prefiltro, o modelo recebe só os trechos em volta das palavras-chave, até orcamento_tokens
+# por documento, e documentos sem nenhuma palavra-chave não chegam a ele.
+# ao_progresso(resultados, feitos, total, etapa) é chamado a cada linha lida e a cada resposta do modelo.
+# Com um manifesto, só as linhas novas ou com PDF alterado são reprocessadas.
+# Com um cronometro, os tempos de cada etapa (por linha e no total) ficam registrados nele.
+# Páginas sem texto (PDFs digitalizados) passam pelo OCR em ocr_workers processos à parte (0 desativa).
+# Com um armazem (armazem.ArmazemResultados), cada linha é gravada nele assim que lida, com uma
+# linha por recomendação achada pelas palavras-chave. Sem modelo, as linhas vão só para o armazém,
+# sem ficar em memória: a lista devolvida fica vazia e ao_progresso recebe só a última linha.
+# Com modelo, as linhas continuam na lista, que recebe as respostas (estas não vão para o armazém)
+def executar(linhas, raiz="pdfs", max_workers=None, matcher=MATCHER, modelo=None, ao_progresso=None, manifesto=None, cronometro=None,
+             prefiltro=False, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO, ocr_workers=None, armazem=None):
+    if modelo:
+        modo = MODO_TRECHOS if prefiltro else MODO_CONCLUSOES
+    else:
+        modo = MODO_RECOMENDACOES
+    cronometro = cronometro or Cronometro()
+    resultados = []
+    textos = []
+
+    lote = processar_em_lote(
+        linhas, raiz=raiz, modo=modo, max_workers=max_workers, matcher=matcher, manifesto=manifesto, cronometro=cronometro,
+        orcamento_tokens=orcamento_tokens, ocr_workers=ocr_workers,
+    )
+    for n, resultado in enumerate(lote, 1):
+        if armazem is not None:
+            armazem.adicionar(resultado)
+            if not modelo:
+                if ao_progresso:
+                    ao_progresso([linha_resultado(resultado)], n, len(linhas), ETAPA_LEITURA)
+                continue
+        if modelo:
+            if resultado["texto"] is not None:
+                textos.append((len(resultados), resultado["texto"]))
+            if modo == MODO_TRECHOS and resultado["caminho"] is not None:
+                # Economia do prefiltro: tokens enviados e documentos que nem chegam ao modelo
+                cronometro.contar("tokens_trechos", resultado.get("tokens", 0))
+                if resultado["texto"] is None:
+                    cronometro.contar("documentos_sem_modelo")
+            resultados.append(linha_resultado_modelo(resultado))
+        else:
+            resultados.append(linha_resultado(resultado))
+        if ao_progresso:
+            ao_progresso(resultados, n, len(linhas), ETAPA_LEITURA)
+
+    if modelo and textos:
+        concluidos = []
+
+        def ao_concluir(i, resposta):
+            resultados[textos[i][0]]["Recomendações"] = resposta
+            concluidos.append(i)
+            if ao_progresso:
+                ao_progresso(resultados, len(concluidos), len(textos), ETAPA_MODELO)
+
+        inicio = time.perf_counter()
+        modelo.extrair_em_lote([texto for _, texto in textos], ao_concluir, trechos=modo == MODO_TRECHOS)
+        # As chamadas correm em paralelo; o total é o tempo de parede de todas elas
+        cronometro.somar(ETAPA_MODELO, time.perf_counter() - inicio, len(textos))
+
+    return resultados
+
+
+# Função para analisar, por palavras-chave, os blobs PDF de um container do Azure.
+# Os blobs são baixados em paralelo (só os que mudaram de ETag) e lidos no pool de processos
+def executar_blobs(container_client, blobs, max_workers=None, matcher=MATCHER, ao_progresso=None, downloads=None, cronometro=None, ocr_workers=None,
+                   armazem=None):
+    # O SDK do Azure só é necessário para este caminho
+    from analisador.azure_blob import DOWNLOADS_SIMULTANEOS, baixar_pdfs, empresa_do_blob
+
+    cronometro = cronometro or Cronometro()
+    resultados = []
+    arquivos = []
+    inicio = time.perf_counter()
+    for n, (blob, caminho, erro) in enumerate(baixar_pdfs(container_client, blobs, downloads or DOWNLOADS_SIMULTANEOS), 1):
+        if erro is not None:
+            resultados.append({
+                "Empresa": empresa_do_blob(blob["nome"]),
+                "Arquivo": blob["nome"],
+                "Status": f"Erro ao baixar o blob: {erro}",
+                "Recomendações": "-",
+            })
+            if armazem is not None:
+                armazem.adicionar(resultados[-1])
+        else:
+            arquivos.append((len(resultados), (empresa_do_blob(blob["nome"]), blob["nome"], caminho)))
+            resultados.append(None)
+        if ao_progresso:
+            ao_progresso([r for r in resultados if r], n, len(blobs), ETAPA_DOWNLOAD)
+    cronometro.somar(ETAPA_DOWNLOAD, time.perf_counter() - inicio, len(blobs))
+
+    lidos = processar_arquivos(
+        [arquivo for _, arquivo in arquivos], max_workers=max_workers, matcher=matcher, cronometro=cronometro, ocr_workers=ocr_workers
+    )
+    for n, ((i, _), resultado) in enumerate(zip(arquivos, lidos), 1):
+        resultados[i] = linha_resultado(resultado)
+        if armazem is not None:
+            armazem.adicionar(resultado)
+        if ao_progresso:
+            ao_progresso([r for r in resultados if r], n, len(arquivos), ETAPA_LEITURA)
+    return resultados
+
+
+# Resultados indexados pelo número da linha na planilha de origem, para gravar de volta nela
+def resultados_por_linha(registros, resultados):
+    return {registro[0]: resultado for registro, resultado in zip(registros, resultados)}
+
+
+# Resultados com a aba de origem na primeira coluna (registros de planilha.linhas_de_todas_as_abas)
+def resultados_com_aba(registros, resultados):
+    return [{"Aba": registro[3], **resultado} for registro, resultado in zip(registros, resultados)]
+
+
+def _colunas(resultados):
+    colunas = []
+    for resultado in resultados:
+        for coluna in resultado:
+            if coluna not in colunas:
+                colunas.append(coluna)
+    return colunas
+
+
+# Grava os resultados em .xlsx no modo write-only do openpyxl (memória constante).
+# Com as colunas dadas, resultados pode ser um gerador (ex.: armazem.linhas_do_armazem)
+def salvar_xlsx(resultados, destino, colunas=None):
+    colunas = colunas or _colunas(resultados)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Resultados")
+    ws.append(colunas)
+    for resultado in resultados:
+        ws.append([resultado.get(c) for c in colunas])
+    wb.save(destino)
+
+
+# Planilha de resultado em memória, para download
+def excel_em_bytes(resultados):
+    buffer = BytesIO()
+    salvar_xlsx(resultados, buffer)
+    return buffer.getvalue()
+
+
+# Status sem o detalhe depois de ";" (ex.: páginas não lidas pelo OCR), para agrupar no resumo
+def _status_base(status):
+    return (status or "").split(";")[0].strip()
+
+
+# Nome de aba válido no Excel (até 31 caracteres, sem []:*?/\) e ainda não usado
+def _nome_aba(nome, usados):
+    base = "".join(c for c in (nome or "(sem empresa)") if c not in "[]:*?/\\")[:31].strip() or "(sem empresa)"
+    candidato, n = base, 1
+    while candidato.lower() in usados:
+        n += 1
+        sufixo = f" ({n})"
+        candidato = base[:31 - len(sufixo)] + sufixo
+    usados.add(candidato.lower())
+    return candidato
+
+
+# Função para gravar o consolidado de uma execução com várias empresas: a aba "Resumo", com
+# a contagem de cada status por empresa e no total, e uma aba por empresa com as suas linhas
+def salvar_consolidado(resultados, destino):
+    por_empresa = {}
+    status = []
+    for resultado in resultados:
+        por_empresa.setdefault(resultado["Empresa"], []).append(resultado)
+        if _status_base(resultado["Status"]) not in status:
+            status.append(_status_base(resultado["Status"]))
+
+    wb = Workbook(write_only=True)
+    resumo = wb.create_sheet("Resumo")
+    resumo.append(["Empresa", *status, "Total"])
+    totais = [0] * len(status)
+    for empresa in sorted(por_empresa):
+        contagem = [sum(1 for r in por_empresa[empresa] if _status_base(r["Status"]) == s) for s in status]
+        totais = [t + c for t, c in zip(totais, contagem)]
+        resumo.append([empresa, *contagem, len(por_empresa[empresa])])
+    resumo.append(["Total", *totais, len(resultados)])
+
+    usados = {"resumo"}
+    for empresa in sorted(por_empresa):
+        ws = wb.create_sheet(_nome_aba(empresa, usados))
+        colunas = _colunas(por_empresa[empresa])
+        ws.append(colunas)
+        for resultado in por_empresa[empresa]:
+            ws.append([resultado.get(c) for c in colunas])
+    wb.save(destino)
+
+
+# Consolidado em memória, para download
+def consolidado_em_bytes(resultados):
+    buffer = BytesIO()
+    salvar_consolidado(resultados, buffer)
+    return buffer.getvalue()
+
+
+# Função para salvar os resultados em .xlsx, .csv ou .jsonl, conforme a extensão;
+# com as colunas dadas, resultados pode ser um gerador, gravado sem ficar em memória
+def salvar_resultados(resultados, caminho, colunas=None):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == ".xlsx":
+        salvar_xlsx(resultados, caminho, colunas)
+    elif extensao == ".csv":
+        with open(caminho, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=colunas or _colunas(resultados))
+            escritor.writeheader()
+            escritor.writerows(resultados)
+    elif extensao == ".jsonl":
+        with open(caminho, "w", encoding="utf-8") as f:
+            for resultado in resultados:
+                f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    else:
+        raise ValueError(f"Formato de saída não suportado: {extensao} (use .xlsx, .csv ou .jsonl)")
@@ -0,0 +1,150 @@
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+
+# Quantas linhas do topo são examinadas à procura do cabeçalho
+LINHAS_CABECALHO = 10
+TEXTO_CABECALHO = "Empresa"
+
+
+def _texto(valor):
+    return "" if valor is None else str(valor).strip()
+
+
+# Função para abrir a planilha uma única vez, em modo somente leitura (streaming)
+def abrir_planilha(arquivo):
+    return load_workbook(arquivo, read_only=True, data_only=True)
+
+
+# Função para listar as abas da planilha
+def listar_abas(planilha):
+    return planilha.sheetnames
+
+
+# Detectar a linha de cabeçalho (a que contém "Empresa") entre as primeiras linhas.
+# Retorna (numero_da_linha, colunas); sem cabeçalho, a linha é 0 e as colunas são as letras A, B, ...
+def detectar_cabecalho(primeiras_linhas):
+    primeiras = list(primeiras_linhas)
+    for i, valores in enumerate(primeiras):
+        if any(TEXTO_CABECALHO in _texto(v) for v in valores):
+            return i + 1, [_texto(v) for v in valores]
+    largura = max((len(v) for v in primeiras), default=0)
+    return 0, [get_column_letter(j + 1) for j in range(largura)]
+
+
+# Aba da planilha lida linha a linha, sem carregar tudo em memória
+class AbaPlanilha:
+    def __init__(self, planilha, aba):
+        self.planilha = planilha
+        self.aba = aba
+        self.ws = planilha[aba]
+        self.linha_cabecalho, self.colunas = detectar_cabecalho(
+            self.ws.iter_rows(max_row=LINHAS_CABECALHO, values_only=True)
+        )
+
+    def indice(self, coluna):
+        if coluna not in self.colunas:
+            raise KeyError(f"Coluna não encontrada: {coluna!r} (colunas: {', '.join(self.colunas)})")
+        return self.colunas.index(coluna)
+
+    # Linhas de dados, uma por vez: (numero_da_linha, valores)
+    def registros(self):
+        inicio = self.linha_cabecalho + 1
+        yield from enumerate(self.ws.iter_rows(min_row=inicio, values_only=True), inicio)
+
+    # Valores distintos de uma coluna, ordenados
+    def valores(self, coluna):
+        j = self.indice(coluna)
+        return sorted({_texto(v[j]) for _, v in self.registros() if j < len(v) and _texto(v[j])})
+
+    # Função para listar (numero_da_linha, empresa, nome_arquivo) das linhas preenchidas,
+    # opcionalmente só as de uma empresa
+    def linhas(self, empresa_col, arquivo_col, empresa=None):
+        je, ja = self.indice(empresa_col), self.indice(arquivo_col)
+        linhas = []
+        for numero, valores in self.registros():
+            nome_empresa = _texto(valores[je]) if je < len(valores) else ""
+            nome_arquivo = _texto(valores[ja]) if ja < len(valores) else ""
+            if not nome_empresa and not nome_arquivo:
+                continue
+            if empresa is not None and nome_empresa != empresa:
+                continue
+            linhas.append((numero, nome_empresa, nome_arquivo))
+        return linhas
+
+    # Função para gravar uma cópia da planilha com os resultados em novas colunas desta aba.
+    # origem: o mesmo arquivo (caminho ou arquivo enviado) de onde a aba foi lida; ele é lido de
+    # novo com as fórmulas como texto. resultados_por_linha: {numero_da_linha: {coluna: valor}}.
+    # As demais abas são copiadas como estão. Leitura e escrita em streaming (read-only /
+    # write-only), com memória constante; células mescladas e estilos não são copiados.
+    # Com preservar_formatacao, a planilha é aberta por inteiro e só as colunas novas são
+    # acrescentadas: mescladas e estilos ficam, mas tudo fica em memória (gráficos e imagens
+    # se perdem nos dois modos)
+    def gravar_com_resultados(self, origem, resultados_por_linha, colunas_novas, destino, preservar_formatacao=False):
+        if preservar_formatacao:
+            self._gravar_planilha_inteira(origem, resultados_por_linha, colunas_novas, destino)
+            return
+
+        planilha = load_workbook(origem, read_only=True, data_only=False)
+        saida = Workbook(write_only=True)
+        try:
+            for nome in planilha.sheetnames:
+                ws_saida = saida.create_sheet(nome)
+                ws = planilha[nome]
+                if nome != self.aba:
+                    for valores in ws.iter_rows(values_only=True):
+                        ws_saida.append(valores)
+                    continue
+
+                largura = max(ws.max_column or 0, len(self.colunas))
+                for numero, valores in enumerate(ws.iter_rows(values_only=True), 1):
+                    valores = list(valores) + [None] * (largura - len(valores))
+                    if numero == self.linha_cabecalho:
+                        extras = list(colunas_novas)
+                    elif numero in resultados_por_linha:
+                        extras = [resultados_por_linha[numero].get(c) for c in colunas_novas]
+                    else:
+                        extras = [None] * len(colunas_novas)
+                    ws_saida.append(valores + extras)
+        finally:
+            planilha.close()
+        saida.save(destino)
+
+    def _gravar_planilha_inteira(self, origem, resultados_por_linha, colunas_novas, destino):
+        planilha = load_workbook(origem)
+        ws = planilha[self.aba]
+        primeira = max(ws.max_column or 0, len(self.colunas)) + 1
+        if self.linha_cabecalho:
+            for j, coluna in enumerate(colunas_novas):
+                ws.cell(row=self.linha_cabecalho, column=primeira + j, value=coluna)
+        for numero, resultado in resultados_por_linha.items():
+            for j, coluna in enumerate(colunas_novas):
+                ws.cell(row=numero, column=primeira + j, value=resultado.get(coluna))
+        planilha.save(destino)
+
+
+# Função para ler uma aba: abre a planilha uma vez e detecta o cabeçalho
+def ler_planilha(arquivo, aba=None):
+    planilha = abrir_planilha(arquivo)
+    return AbaPlanilha(planilha, aba if aba is not None else planilha.sheetnames[0])
+
+
+# Função para listar as linhas de todas as abas que têm as duas colunas, como em
+# AbaPlanilha.linhas mas com a aba no fim: (numero_da_linha, empresa, nome_arquivo, aba).
+# Retorna (registros, abas_ignoradas), estas sem alguma das colunas
+def linhas_de_todas_as_abas(planilha, empresa_col, arquivo_col, empresa=None):
+    registros, ignoradas = [], []
+    for nome in listar_abas(planilha):
+        aba = AbaPlanilha(planilha, nome)
+        try:
+            linhas = aba.linhas(empresa_col, arquivo_col, empresa=empresa)
+        except KeyError:
+            ignoradas.append(nome)
+            continue
+        registros.extend((numero, nome_empresa, nome_arquivo, nome) for numero, nome_empresa, nome_arquivo in linhas)
+    return registros, ignoradas
+
+
+# Pares (empresa, nome_arquivo) de cada linha (de AbaPlanilha.linhas ou de linhas_de_todas_as_abas),
+# no formato esperado pelo lote
+def linhas_da_planilha(registros):
+    return [(registro[1], registro[2]) for registro in registros]
@@ -0,0 +1,138 @@
+import re
+from bisect import bisect_right
+
+# Palavras-chave para identificar recomendações, agrupadas por idioma
+KEYWORDS_POR_IDIOMA = {
+    "pt": [
+        "recomenda", "deve ser", "é necessário", "sugerimos",
+        "aconselhamos", "indicamos", "importante que",
+        "é essencial que", "convém que",
+    ],
+    "en": [
+        "recommend", "should", "must", "it is necessary",
+        "we suggest", "we recommend", "we advise that",
+        "critical that", "it is essential", "it is recommended that",
+        "you ought to",
+    ],
+    "fr": [
+        "recommande", "doit être", "il est nécessaire",
+        "nous suggérons", "nous conseillons", "nous indiquons",
+        "il est important que", "il est essentiel que", "il faudrait",
+        "nous recommandons", "vous devriez",
+    ],
+    "es": [
+        "recomienda", "debe ser", "es necesario",
+        "sugerimos", "aconsejamos", "indicamos",
+        "es importante que", "es esencial que", "debería",
+        "recomendamos", "conviene que",
+    ],
+}
+
+KEYWORDS = [kw for palavras in KEYWORDS_POR_IDIOMA.values() for kw in palavras]
+
+# Fim de frase: o mesmo critério do antigo re.split(r'[\.!?]\s+', texto)
+FIM_DE_FRASE = re.compile(r'[\.!?]\s+')
+
+# Na segmentação página a página, um trecho sem nenhum fim de frase maior que isto é
+# tratado como uma frase só, para a memória não crescer com texto sem pontuação
+MAX_CARACTERES_PENDENTES = 100_000
+
+
+def _recomendacao(frase, palavras_chave, idiomas):
+    return {
+        "frase": frase,
+        "palavra_chave": palavras_chave[0],
+        "idioma": idiomas[0] if idiomas else "",
+        "palavras_chave": palavras_chave,
+        "idiomas": idiomas,
+    }
+
+
+# Matcher que encontra todas as palavras-chave numa única passada pelo texto
+class MatcherPalavrasChave:
+    def __init__(self, palavras_por_idioma):
+        self.idiomas = {}
+        for idioma, palavras in palavras_por_idioma.items():
+            for kw in palavras:
+                kw = kw.lower()
+                self.idiomas.setdefault(kw, [])
+                if idioma not in self.idiomas[kw]:
+                    self.idiomas[kw].append(idioma)
+
+        # Alternativas mais longas primeiro: "we recommend" vence "recommend"
+        alternativas = sorted(self.idiomas, key=len, reverse=True)
+        self.regex = re.compile("|".join(re.escape(kw) for kw in alternativas), re.IGNORECASE)
+
+    # Palavras-chave agrupadas por idioma, no formato do construtor (ex.: para guardar o matcher de um job)
+    def palavras_por_idioma(self):
+        palavras = {}
+        for kw, idiomas in self.idiomas.items():
+            for idioma in idiomas:
+                palavras.setdefault(idioma, []).append(kw)
+        return palavras
+
+    # Gera (inicio, fim, palavra_chave, idiomas) para cada ocorrência no texto
+    def ocorrencias(self, texto):
+        for m in self.regex.finditer(texto):
+            kw = m.group(0).lower()
+            yield m.start(), m.end(), kw, self.idiomas.get(kw, [])
+
+    # Frases com recomendações, com as palavras-chave e idiomas encontrados em cada uma
+    def extrair(self, texto):
+        # Limites das frases, calculados uma única vez para o documento inteiro
+        inicios = [0]
+        fins = []
+        for m in FIM_DE_FRASE.finditer(texto):
+            fins.append(m.start())
+            inicios.append(m.end())
+        fins.append(len(texto))
+
+        achados = {}
+        for inicio, fim, kw, idiomas in self.ocorrencias(texto):
+            # Ocorrências que atravessam um fim de frase não contam, como antes
+            i = bisect_right(inicios, inicio) - 1
+            if fim > fins[i]:
+                continue
+            achado = achados.setdefault(i, {"palavras_chave": [], "idiomas": []})
+            if kw not in achado["palavras_chave"]:
+                achado["palavras_chave"].append(kw)
+            for idioma in idiomas:
+                if idioma not in achado["idiomas"]:
+                    achado["idiomas"].append(idioma)
+
+        return [
+            _recomendacao(texto[inicios[i]:fins[i]].strip(), achados[i]["palavras_chave"], achados[i]["idiomas"])
+            for i in sorted(achados)
+        ]
+
+    # Recomendações em frases já segmentadas (ver analisador.segmentacao); cada uma
+    # mantém a página e o retângulo da frase de origem
+    def extrair_de_frases(self, frases):
+        for frase in frases:
+            palavras, idiomas = [], []
+            for _, _, kw, idiomas_kw in self.ocorrencias(frase["frase"]):
+                if kw not in palavras:
+                    palavras.append(kw)
+                for idioma in idiomas_kw:
+                    if idioma not in idiomas:
+                        idiomas.append(idioma)
+            if palavras:
+                recomendacao = _recomendacao(frase["frase"], palavras, idiomas)
+                recomendacao["pagina"] = frase["pagina"]
+                recomendacao["bbox"] = frase["bbox"]
+                yield recomendacao
+
+
+# Matcher padrão, compilado uma única vez na importação
+MATCHER = MatcherPalavrasChave(KEYWORDS_POR_IDIOMA)
+
+
+# Formata as recomendações como lista numerada para a planilha de resultado,
+# com a página de cada uma quando conhecida
+def formatar_recomendacoes(recomendacoes):
+    if not recomendacoes:
+        return "-"
+    return "\n".join(
+        f"{i+1}. {rec['frase']}" + (f" (p. {rec['pagina']})" if rec.get("pagina") else "")
+        for i, rec in enumerate(recomendacoes)
+    )
@@ -0,0 +1,184 @@
+import json
+import re
+from collections import Counter
+
+import fitz  # PyMuPDF
+
+from analisador.cache import hash_arquivo, obter_cache
+
+# Versão do localizador; mudar invalida as conclusões já guardadas em cache
+VERSAO_LOCALIZADOR = "3"
+
+# Títulos de seção de conclusões/recomendações em PT/EN/FR/ES
+TITULO_CONCLUSAO = re.compile(
+    r"^\s*(?:\d+(?:\.\d+)*\.?\s+|[IVXLC]+\.\s+)?"
+    r"(conclus(?:ão|ões|ao|oes|ion|ions|iones)|recomenda(?:ção|ções|cao|coes)|"
+    r"recommendations?|recommandations?|recomendaciones|considerações finais|consideracoes finais|"
+    r"final remarks|concluding remarks|summary and recommendations)\b",
+    re.IGNORECASE,
+)
+
+# Um título é curto e com fonte maior que o corpo do texto da página
+MAX_CARACTERES_TITULO = 80
+FATOR_FONTE_TITULO = 1.15
+# Título de conclusões na mesma fonte do corpo: linha curta, iniciada em maiúscula e sem ponto final
+MAX_CARACTERES_TITULO_SEM_DESTAQUE = 40
+
+# Sem seção identificada, volta à heurística antiga: o fim do documento
+CARACTERES_FINAIS = 3000
+
+_FLAGS_TEXTO = fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE
+
+
+# Seções do sumário (get_toc) com título de conclusão, como intervalos de páginas [inicio, fim)
+# com o título: (inicio, fim, titulo)
+def _secoes_pelo_sumario(doc):
+    toc = doc.get_toc(simple=True)
+    secoes = []
+    for i, (nivel, titulo, pagina) in enumerate(toc):
+        if pagina < 1 or not TITULO_CONCLUSAO.match(titulo):
+            continue
+        fim = doc.page_count
+        for prox_nivel, _, prox_pagina in toc[i + 1:]:
+            if prox_nivel <= nivel and prox_pagina >= pagina:
+                # A próxima seção pode começar no meio da página: ela é incluída
+                fim = min(doc.page_count, prox_pagina if prox_pagina > pagina else pagina + 1)
+                break
+        secoes.append((pagina - 1, fim, titulo))
+    return secoes
+
+
+# Linhas da página que parecem títulos: (texto, é_conclusão)
+def _titulos_da_pagina(page):
+    linhas = []
+    tamanhos = Counter()
+    for bloco in page.get_text("dict", flags=_FLAGS_TEXTO)["blocks"]:
+        for linha in bloco.get("lines", []):
+            spans = [s for s in linha["spans"] if s["text"].strip()]
+            if not spans:
+                continue
+            texto = "".join(s["text"] for s in spans).strip()
+            tamanho = max(s["size"] for s in spans)
+            negrito = all(s["flags"] & 16 for s in spans)
+            linhas.append((texto, tamanho, negrito))
+            for s in spans:
+                tamanhos[round(s["size"], 1)] += len(s["text"])
+
+    if not tamanhos:
+        return []
+    corpo = tamanhos.most_common(1)[0][0]
+    titulos = []
+    for texto, tamanho, negrito in linhas:
+        if len(texto) > MAX_CARACTERES_TITULO:
+            continue
+        conclusao = TITULO_CONCLUSAO.match(texto)
+        if tamanho >= corpo * FATOR_FONTE_TITULO or (negrito and tamanho >= corpo):
+            titulos.append((texto, bool(conclusao)))
+        elif conclusao and _titulo_sem_destaque(texto, conclusao):
+            titulos.append((texto, True))
+    return titulos
+
+
+def _titulo_sem_destaque(texto, conclusao):
+    return (
+        len(texto) <= MAX_CARACTERES_TITULO_SEM_DESTAQUE
+        and conclusao.group(1)[0].isupper()
+        and not texto.endswith(".")
+    )
+
+
+# Procura o título de conclusões lendo as páginas do fim para o começo, uma por vez.
+# Anexos depois das conclusões são pulados: a seção termina no próximo título
+def _secao_pelos_titulos(doc):
+    proximo_titulo = doc.page_count
+    for numero in range(doc.page_count - 1, -1, -1):
+        titulos = _titulos_da_pagina(doc.load_page(numero))
+        for i, (texto, conclusao) in enumerate(titulos):
+            if conclusao:
+                # Outro título depois do de conclusões, na mesma página, fecha a seção nela
+                outros = [t for t, c in titulos[i + 1:] if not c]
+                fim = numero + 1 if outros else max(proximo_titulo, numero + 1)
+                return [(numero, fim, texto)]
+        if any(not c for _, c in titulos):
+            proximo_titulo = numero + 1
+    return []
+
+
+def _texto_paginas(doc, paginas):
+    return "\n".join(doc.load_page(n).get_text() for n in paginas)
+
+
+# Posição do título da seção no texto da página em que ela começa, para o texto não começar
+# com o fim da seção anterior. Os espaços podem diferir entre o título (sumário ou linha do
+# "dict") e get_text(); sem o título exato, vale a primeira linha com cara de título de conclusão
+def _inicio_do_titulo(texto, titulo):
+    if titulo:
+        palavras = titulo.split()
+        if palavras:
+            achado = re.search(r"\s+".join(re.escape(p) for p in palavras), texto, re.IGNORECASE)
+            if achado:
+                return achado.start()
+    for achado in re.finditer(r"^.*$", texto, re.MULTILINE):
+        if TITULO_CONCLUSAO.match(achado.group(0)):
+            return achado.start()
+    return 0
+
+
+# Localiza as páginas de conclusões/recomendações do documento aberto.
+# Retorna (paginas, origem, titulo) com origem "sumario", "titulos" ou "final";
+# titulo é o da seção que começa na primeira página (None na origem "final")
+def localizar_conclusoes(doc):
+    secoes, origem = _secoes_pelo_sumario(doc), "sumario"
+    if not secoes:
+        secoes, origem = _secao_pelos_titulos(doc), "titulos"
+    if secoes:
+        paginas = sorted({n for inicio, fim, _ in secoes for n in range(inicio, fim)})
+        titulo = min(secoes, key=lambda s: s[0])[2]
+        return paginas, origem, titulo
+
+    # Sem seção: as últimas páginas até somar CARACTERES_FINAIS caracteres
+    paginas = []
+    total = 0
+    for numero in range(doc.page_count - 1, -1, -1):
+        paginas.insert(0, numero)
+        total += len(doc.load_page(numero).get_text())
+        if total >= CARACTERES_FINAIS:
+            break
+    return paginas, "final", None
+
+
+# Função para extrair apenas as conclusões de um PDF, lendo só as páginas necessárias.
+# Com a seção localizada, o texto começa no título dela, não no topo da página.
+# Retorna {"texto", "paginas" (1-based), "origem"}; o resultado fica em cache pelo hash do arquivo
+def extrair_conclusoes(caminho_pdf, max_caracteres=CARACTERES_FINAIS, cache=None):
+    cache = cache or obter_cache("textos")
+    try:
+        chave = f"conclusoes:{VERSAO_LOCALIZADOR}:{hash_arquivo(caminho_pdf)}"
+        guardado = cache.obter(chave)
+        if guardado is not None:
+            secao = json.loads(guardado)
+        else:
+            doc = fitz.open(caminho_pdf)
+            try:
+                paginas, origem, titulo = localizar_conclusoes(doc)
+                texto = _texto_paginas(doc, paginas)
+                if origem != "final":
+                    texto = texto[_inicio_do_titulo(doc.load_page(paginas[0]).get_text(), titulo):]
+                secao = {
+                    "texto": texto,
+                    "paginas": [n + 1 for n in paginas],
+                    "origem": origem,
+                }
+            finally:
+                doc.close()
+            cache.guardar(chave, json.dumps(secao, ensure_ascii=False))
+    except Exception as e:
+        return {"texto": f"[Erro ao ler o PDF: {e}]", "paginas": [], "origem": "erro"}
+
+    # Seção localizada: vale o começo; heurística antiga: vale o fim
+    if max_caracteres:
+        if secao["origem"] == "final":
+            secao["texto"] = secao["texto"][-max_caracteres:]
+        else:
+            secao["texto"] = secao["texto"][:max_caracteres]
+    return secao
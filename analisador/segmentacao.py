@@ -0,0 +1,202 @@
+import json
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+import fitz  # PyMuPDF
+
+from analisador.cache import hash_arquivo, obter_cache
+from analisador.pdf import LIMITE_TEXTO_CACHE, ler_paginas
+from analisador.recomendacoes import MAX_CARACTERES_PENDENTES
+
+# Versão da segmentação; mudar invalida as frases já guardadas em cache
+VERSAO_SEGMENTACAO = "4"
+
+# Abreviações seguidas de ponto que não encerram a frase (sem o ponto final, em minúsculas).
+# As listas valem para todos os idiomas ao mesmo tempo (o idioma do relatório não é conhecido
+# aqui), então ficam de fora as que também são unidades ou palavras comuns em outro idioma:
+# "m", "min", "max" (metros e minutos nos relatórios geotécnicos), "no", "nos", "est"
+ABREVIACOES_POR_IDIOMA = {
+    "pt": [
+        "fig", "figs", "tab", "eq", "cap", "p", "pp", "pág", "págs", "vol", "n", "nº", "núm", "art",
+        "ex", "obs", "aprox", "máx", "mín", "ref", "sr", "sra", "dr", "dra", "eng", "engª", "prof",
+        "profa", "av", "ltda", "cia", "séc",
+    ],
+    "en": [
+        "fig", "figs", "tab", "eq", "eqs", "ch", "sec", "p", "pp", "vol", "e.g", "i.e",
+        "cf", "vs", "al", "approx", "ref", "mr", "mrs", "ms", "dr", "prof", "eng",
+        "inc", "ltd", "co", "dept",
+    ],
+    "fr": [
+        "fig", "tab", "éq", "chap", "p", "pp", "vol", "n°", "ex", "cf", "env", "réf",
+        "mme", "mlle", "dr", "pr", "ing", "éd", "av", "st", "ste",
+    ],
+    "es": [
+        "fig", "tab", "ec", "cap", "p", "pp", "pág", "págs", "vol", "núm", "nº", "ej", "aprox",
+        "máx", "mín", "ref", "sr", "sra", "srta", "dr", "dra", "ing", "lic", "av", "cía", "s.a",
+    ],
+}
+ABREVIACOES = {abrev for lista in ABREVIACOES_POR_IDIOMA.values() for abrev in lista}
+
+# Candidatos a fim de frase: pontuação seguida de espaço, ou quebra de parágrafo
+# (na reflow, "\n" só aparece entre blocos que não continuam um no outro)
+FIM_CANDIDATO = re.compile(r"[.!?]\s+|\n")
+PALAVRA_ANTES = re.compile(r"[^\s(\[\"“«']+$")
+NUMERACAO = re.compile(r"\d+(\.\d+)*")
+TERMINA_FRASE = re.compile(r"[.!?:;][\"”»)\]]*$")
+
+
+# Função para decidir se o candidato em m encerra a frase: não encerra após abreviações,
+# iniciais ("J. Silva"), numeração de título no início do parágrafo ("3.2. Conclusões")
+# nem quando a frase continua em minúscula ("e.g. the", "Fig. 3 mostra")
+def _fim_de_frase(texto, m):
+    if texto[m.start()] == "\n":
+        return True
+    if texto[m.start()] == ".":
+        achada = PALAVRA_ANTES.search(texto, max(0, m.start() - 20), m.start())
+        if achada:
+            palavra = achada.group(0)
+            if palavra.lower() in ABREVIACOES or (len(palavra) == 1 and palavra.isupper()):
+                return False
+            inicio_de_paragrafo = achada.start() == 0 or texto[achada.start() - 1] == "\n"
+            if inicio_de_paragrafo and NUMERACAO.fullmatch(palavra):
+                return False
+    seguinte = texto[m.end():m.end() + 1]
+    return not (seguinte and seguinte.islower())
+
+
+# Linhas de texto de uma página: (texto, bbox, inicio_de_bloco)
+def _linhas_da_pagina(pagina):
+    for bloco in pagina["blocks"]:
+        primeira = True
+        for linha in bloco.get("lines", []):
+            texto = "".join(span["text"] for span in linha["spans"]).strip()
+            if texto:
+                yield texto, tuple(round(c, 1) for c in linha["bbox"]), primeira
+                primeira = False
+
+
+# Função para refazer parágrafos e frases a partir das linhas de cada página, gerando as
+# frases com a página e o retângulo (x0, y0, x1, y1) onde começam. Linhas do mesmo bloco
+# são unidas com espaço (e palavras hifenizadas na quebra, desfeitas); um bloco que não
+# termina em pontuação continua no seguinte se este começa em minúscula, inclusive na
+# página seguinte. paginas: (numero, get_text("dict")), como gerado por pdf.ler_paginas.
+# Com uma lista sem_texto, os números das páginas sem nenhuma linha de texto (ex.: digitalizadas)
+# são acrescentados a ela
+def segmentar_paginas(paginas, sem_texto=None):
+    texto = ""
+    inicios, origens = [], []  # início de cada linha no texto e sua (página, bbox)
+    for numero, pagina in paginas:
+        vazia = True
+        for linha, bbox, novo_bloco in _linhas_da_pagina(pagina):
+            vazia = False
+            if not texto:
+                separador = ""
+            elif novo_bloco and (TERMINA_FRASE.search(texto) or not linha[0].islower()):
+                separador = "\n"
+            elif texto.endswith("-") and texto[-2:-1].isalpha() and linha[0].islower():
+                texto = texto[:-1]
+                separador = ""
+            else:
+                separador = " "
+            texto += separador
+            inicios.append(len(texto))
+            origens.append((numero, bbox))
+            texto += linha
+        if vazia and sem_texto is not None:
+            sem_texto.append(numero)
+
+        # Só a frase ainda aberta no fim da página fica pendente para a próxima
+        frases, texto, inicios, origens = _separar(texto, inicios, origens)
+        yield from frases
+    frases, _, _, _ = _separar(texto, inicios, origens, final=True)
+    yield from frases
+
+
+def _separar(texto, inicios, origens, final=False):
+    frases = []
+    inicio = 0
+    for m in FIM_CANDIDATO.finditer(texto):
+        if _fim_de_frase(texto, m):
+            frases.extend(_frase(texto, inicio, m.start() + 1, inicios, origens))
+            inicio = m.end()
+    if final or len(texto) - inicio > MAX_CARACTERES_PENDENTES:
+        frases.extend(_frase(texto, inicio, len(texto), inicios, origens))
+        inicio = len(texto)
+    if inicio == len(texto):
+        return frases, "", [], []
+    if inicio > 0:
+        # Leva junto o separador anterior: sem ele, a frase aberta pareceria começar um
+        # parágrafo na página seguinte (e "3.2." seria tomado por numeração de título)
+        inicio -= 1
+    corte = bisect_right(inicios, inicio) - 1
+    return frases, texto[inicio:], [max(i - inicio, 0) for i in inicios[corte:]], origens[corte:]
+
+
+def _frase(texto, inicio, fim, inicios, origens):
+    frase = texto[inicio:fim].strip()
+    if not frase:
+        return
+    primeira = max(bisect_right(inicios, inicio) - 1, 0)
+    ultima = max(bisect_left(inicios, fim) - 1, primeira)
+    pagina = origens[primeira][0]
+    caixas = [bbox for numero, bbox in origens[primeira:ultima + 1] if numero == pagina]
+    yield {
+        "frase": frase,
+        "pagina": pagina,
+        "bbox": (
+            min(c[0] for c in caixas), min(c[1] for c in caixas),
+            max(c[2] for c in caixas), max(c[3] for c in caixas),
+        ),
+    }
+
+
+# Chave para comparar frases ignorando caixa, acentos, pontuação e espaços
+def _normalizar(frase):
+    sem_acentos = unicodedata.normalize("NFKD", frase.lower()).encode("ascii", "ignore").decode()
+    return " ".join(re.findall(r"[a-z0-9]+", sem_acentos))
+
+
+# Função para remover frases repetidas (ex.: cabeçalhos, resumo repetido na conclusão) numa
+# única passada: guarda só o hash da forma normalizada de cada frase já vista
+def remover_duplicadas(frases):
+    vistas = set()
+    for frase in frases:
+        chave = hash(_normalizar(frase["frase"]))
+        if chave not in vistas:
+            vistas.add(chave)
+            yield frase
+
+
+# Função para ler as frases de um PDF, sem repetições, com página e posição. O documento
+# é lido página a página (pdf.ler_paginas) e só entra no cache se pequeno o bastante.
+# Em caso de erro, gera uma única frase com a mensagem, sem página.
+# sem_texto: como em segmentar_paginas (as páginas para o OCR, ver analisador.ocr)
+def frases_do_pdf(caminho_pdf, cache=None, sem_texto=None):
+    cache = cache or obter_cache("frases")
+    sem_texto = [] if sem_texto is None else sem_texto
+    try:
+        chave = f"frases:{VERSAO_SEGMENTACAO}:{hash_arquivo(caminho_pdf)}"
+        guardado = cache.obter(chave)
+        if guardado is not None:
+            guardado = json.loads(guardado)
+            sem_texto.extend(guardado["sem_texto"])
+            for frase in guardado["frases"]:
+                frase["bbox"] = tuple(frase["bbox"])
+                yield frase
+            return
+
+        guardadas = []
+        tamanho = 0
+        paginas = ler_paginas(caminho_pdf, "dict", flags=fitz.TEXTFLAGS_TEXT)
+        for frase in remover_duplicadas(segmentar_paginas(paginas, sem_texto)):
+            if guardadas is not None:
+                tamanho += len(frase["frase"])
+                guardadas.append(frase)
+                if tamanho > LIMITE_TEXTO_CACHE:
+                    guardadas = None
+            yield frase
+        if guardadas is not None:
+            cache.guardar(chave, json.dumps({"frases": guardadas, "sem_texto": sem_texto}, ensure_ascii=False))
+    except Exception as e:
+        yield {"frase": f"[Erro ao ler o PDF: {e}]", "pagina": None, "bbox": None}
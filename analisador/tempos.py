@@ -0,0 +1,174 @@
+import io
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+# Etapas medidas numa execução da planilha
+ETAPA_PLANILHA = "planilha"            # leitura do Excel (openpyxl)
+ETAPA_LISTAGEM = "listagem_pastas"     # varredura de pdfs/<Empresa>/FINAL
+ETAPA_MANIFESTO = "manifesto"          # consulta às linhas já analisadas
+ETAPA_LOCALIZACAO = "localizacao"      # busca do nome de arquivo parecido
+ETAPA_DOWNLOAD = "download"            # download dos blobs do Azure
+ETAPA_EXTRACAO = "extracao_pdf"        # texto do PDF (PyMuPDF ou cache)
+ETAPA_REGEX = "regex"                  # busca das palavras-chave
+ETAPA_OCR = "ocr"                      # OCR das páginas sem texto (pool próprio)
+ETAPA_MODELO = "modelo"                # chamadas à OpenAI / LLaMA
+
+PERFIS = ("cprofile", "pyinstrument")
+
+logger = logging.getLogger(__name__)
+
+
+# Função para medir um trecho e somar a duração em `tempos` (dict etapa -> segundos),
+# usada dentro dos workers, onde não há Cronometro
+@contextmanager
+def medir_em(tempos, etapa):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[etapa] = tempos.get(etapa, 0.0) + time.perf_counter() - inicio
+
+
+# Função para somar em `tempos` só o tempo gasto produzindo cada item de um gerador
+# (ex.: a leitura das páginas), separado do tempo de quem consome os itens
+def medir_iteracao(tempos, etapa, iteravel):
+    iterador = iter(iteravel)
+    while True:
+        with medir_em(tempos, etapa):
+            try:
+                item = next(iterador)
+            except StopIteration:
+                return
+        yield item
+
+
+# Tempos e contadores de uma execução: total e número de chamadas por etapa,
+# tempos por linha da planilha e, opcionalmente, o perfil (cProfile/pyinstrument)
+class Cronometro:
+    def __init__(self):
+        self.etapas = {}
+        self.contadores = {}
+        self.linhas = []
+        self.perfil = None
+
+    def somar(self, etapa, segundos, chamadas=1):
+        total, n = self.etapas.get(etapa, (0.0, 0))
+        self.etapas[etapa] = (total + segundos, n + chamadas)
+
+    def contar(self, nome, n=1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.somar(etapa, time.perf_counter() - inicio)
+
+    # Tempos de uma linha (vindos do worker) entram na tabela por linha e no total das etapas
+    def registrar_linha(self, empresa, arquivo, tempos):
+        for etapa, segundos in tempos.items():
+            self.somar(etapa, segundos)
+        linha = {"Empresa": empresa, "Arquivo": arquivo}
+        linha.update({f"{etapa} (ms)": round(segundos * 1000, 1) for etapa, segundos in tempos.items()})
+        self.linhas.append(linha)
+
+    # Tabela agregada por etapa, na ordem em que as etapas apareceram
+    def tabela(self):
+        return [
+            {
+                "Etapa": etapa,
+                "Chamadas": n,
+                "Total (s)": round(total, 3),
+                "Média (ms)": round(total / n * 1000, 2) if n else 0.0,
+            }
+            for etapa, (total, n) in self.etapas.items()
+        ]
+
+    def como_dict(self):
+        dados = {
+            "etapas": {etapa: {"segundos": total, "chamadas": n} for etapa, (total, n) in self.etapas.items()},
+            "contadores": self.contadores,
+            "linhas": self.linhas,
+        }
+        if self.perfil:
+            dados["perfil"] = self.perfil
+        return dados
+
+    def como_json(self):
+        return json.dumps(self.como_dict(), ensure_ascii=False, indent=2)
+
+    # Formato texto do Prometheus (ex.: para o textfile collector do node_exporter)
+    def como_prometheus(self, prefixo="analisador"):
+        saida = [
+            f"# HELP {prefixo}_etapa_segundos_total Tempo total gasto em cada etapa.",
+            f"# TYPE {prefixo}_etapa_segundos_total counter",
+        ]
+        saida += [f'{prefixo}_etapa_segundos_total{{etapa="{etapa}"}} {total:.6f}' for etapa, (total, _) in self.etapas.items()]
+        saida += [
+            f"# HELP {prefixo}_etapa_chamadas_total Número de vezes que cada etapa rodou.",
+            f"# TYPE {prefixo}_etapa_chamadas_total counter",
+        ]
+        saida += [f'{prefixo}_etapa_chamadas_total{{etapa="{etapa}"}} {n}' for etapa, (_, n) in self.etapas.items()]
+        for nome, valor in self.contadores.items():
+            saida += [f"# TYPE {prefixo}_{nome}_total counter", f"{prefixo}_{nome}_total {valor}"]
+        return "\n".join(saida) + "\n"
+
+    # Função para salvar em .json ou, com qualquer outra extensão (ex.: .prom), no formato do Prometheus
+    def salvar(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(self.como_json() if caminho.lower().endswith(".json") else self.como_prometheus())
+
+    def registrar_no_log(self):
+        for linha in self.tabela():
+            logger.info("%s: %s chamadas, %.3f s (média %.2f ms)", linha["Etapa"], linha["Chamadas"], linha["Total (s)"], linha["Média (ms)"])
+        for nome, valor in self.contadores.items():
+            logger.info("%s: %s", nome, valor)
+
+    # Função para perfilar a execução no processo principal com cProfile ou pyinstrument;
+    # o relatório em texto fica em self.perfil. Os workers do pool não entram no perfil
+    # (com 1 processo, a leitura dos PDFs roda no processo principal e entra)
+    @contextmanager
+    def perfilar(self, modo=None):
+        if not modo:
+            yield
+            return
+        if modo == "cprofile":
+            import cProfile
+            import pstats
+
+            perfilador = cProfile.Profile()
+            perfilador.enable()
+            try:
+                yield
+            finally:
+                perfilador.disable()
+                texto = io.StringIO()
+                pstats.Stats(perfilador, stream=texto).sort_stats("cumulative").print_stats(40)
+                self.perfil = texto.getvalue()
+        elif modo == "pyinstrument":
+            # Dependência opcional, só para este modo
+            from pyinstrument import Profiler
+
+            perfilador = Profiler()
+            perfilador.start()
+            try:
+                yield
+            finally:
+                perfilador.stop()
+                self.perfil = perfilador.output_text(unicode=True)
+        else:
+            raise ValueError(f"Perfil desconhecido: {modo} (use {' ou '.join(PERFIS)})")
+
+
+# Função para refazer um Cronometro a partir de como_dict (ex.: tempos guardados por um job)
+def cronometro_de_dict(dados):
+    cronometro = Cronometro()
+    cronometro.etapas = {etapa: (v["segundos"], v["chamadas"]) for etapa, v in dados["etapas"].items()}
+    cronometro.contadores = dict(dados["contadores"])
+    cronometro.linhas = list(dados["linhas"])
+    cronometro.perfil = dados.get("perfil")
+    return cronometro
@@ -0,0 +1,76 @@
+from collections import deque
+
+# Orçamento padrão de tokens dos trechos enviados ao modelo por documento
+ORCAMENTO_TOKENS_PADRAO = 1500
+# Frases vizinhas incluídas antes e depois de cada frase com palavra-chave
+FRASES_DE_CONTEXTO = 1
+# Mesma estimativa de openai_cliente.estimar_tokens (~4 caracteres por token)
+CARACTERES_POR_TOKEN = 4
+
+
+def _novo_trecho(ordem):
+    return {"ordem": ordem, "frases": [], "paginas": [], "acertos": 0}
+
+
+def _incluir(trecho, frase):
+    trecho["frases"].append(frase["frase"])
+    if frase["pagina"] is not None and frase["pagina"] not in trecho["paginas"]:
+        trecho["paginas"].append(frase["pagina"])
+
+
+def _texto_trecho(trecho):
+    paginas = ", ".join(str(p) for p in trecho["paginas"])
+    return (f"[p. {paginas}] " if paginas else "") + " ".join(trecho["frases"])
+
+
+# Função para agrupar as frases com palavras-chave, com `contexto` frases vizinhas de cada
+# lado, em trechos compactos para o modelo. Frases próximas caem no mesmo trecho. Numa
+# única passada: só as últimas `contexto` frases ficam guardadas fora dos trechos.
+# Se os trechos passam do orçamento, ficam os com mais palavras-chave, na ordem do documento.
+# Retorna as recomendações achadas e o texto a enviar (None se nenhuma frase tem palavra-chave)
+def montar_trechos(frases, matcher, contexto=FRASES_DE_CONTEXTO, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO):
+    anteriores = deque(maxlen=contexto)
+    trechos, recomendacoes = [], []
+    aberto, restantes = None, 0
+    for frase in frases:
+        achadas = list(matcher.extrair_de_frases([frase]))
+        if achadas:
+            recomendacoes.extend(achadas)
+            if aberto is None:
+                aberto = _novo_trecho(len(trechos))
+                trechos.append(aberto)
+                for anterior in anteriores:
+                    _incluir(aberto, anterior)
+            _incluir(aberto, frase)
+            aberto["acertos"] += 1
+            restantes = contexto
+            anteriores.clear()
+        elif aberto is not None and restantes > 0:
+            _incluir(aberto, frase)
+            restantes -= 1
+        else:
+            aberto = None
+            anteriores.append(frase)
+
+    limite = orcamento_tokens * CARACTERES_POR_TOKEN
+    escolhidos, usados = [], 0
+    for trecho in sorted(trechos, key=lambda t: (-t["acertos"], t["ordem"])):
+        texto = _texto_trecho(trecho)
+        if usados + len(texto) > limite:
+            if escolhidos:
+                continue
+            # Nem o trecho principal cabe: vai cortado no orçamento
+            texto = texto[:limite]
+        escolhidos.append((trecho["ordem"], texto, trecho["paginas"]))
+        usados += len(texto) + 2
+
+    escolhidos.sort()
+    paginas = sorted({p for _, _, paginas_trecho in escolhidos for p in paginas_trecho})
+    return {
+        "texto": "\n\n".join(texto for _, texto, _ in escolhidos) or None,
+        "paginas": paginas,
+        "recomendacoes": recomendacoes,
+        "trechos": len(trechos),
+        "trechos_enviados": len(escolhidos),
+        "tokens": sum(len(texto) for _, texto, _ in escolhidos) // CARACTERES_POR_TOKEN,
+    }
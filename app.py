@@ -1,103 +1,75 @@
 import streamlit as st
-import pandas as pd
-import fitz  # PyMuPDF
-import os
-import re
-from io import BytesIO
-from difflib import get_close_matches
 
 st.set_page_config(page_title="Analisador de Recomendações", layout="wide")
 st.title("📄 Verificador de Recomendações em Relatórios PDF")
 
+# Upload do Excel
+uploaded_file = st.file_uploader("📤 Envie o arquivo Excel com os projetos", type=[".xlsx"])
+
+# Módulos pesados (pandas, PyMuPDF, openpyxl) só depois do primeiro desenho da página;
+# nos reruns seguintes eles já estão carregados
+from interface import mostrar_job, mostrar_lista_jobs, opcoes_armazem
+from analisador.jobs import FilaJobs
+from analisador.lote import workers_padrao
+from analisador.planilha import AbaPlanilha, abrir_planilha, listar_abas
+from analisador.tempos import ETAPA_PLANILHA, PERFIS, Cronometro
+from analisador.recomendacoes import MatcherPalavrasChave
+
 # Palavras-chave para identificar recomendações
 KEYWORDS = [
     "recomenda", "deve ser", "é necessário", "sugerimos",
     "aconselhamos", "indicamos", "importante que"
 ]
 
-# Função para buscar frases com recomendações no texto do PDF
-def extrair_recomendacoes(texto):
-    frases = re.split(r'[\.!?]\s+', texto)
-    recomendacoes = [frase.strip() for frase in frases if any(kw in frase.lower() for kw in KEYWORDS)]
-    return recomendacoes
+# Matcher compilado uma única vez por processo do Streamlit, e não a cada rerun
+@st.cache_resource
+def carregar_matcher():
+    return MatcherPalavrasChave({"pt": KEYWORDS})
 
-# Função para ler texto do PDF
-def ler_pdf(caminho_pdf):
-    try:
-        doc = fitz.open(caminho_pdf)
-        texto = "\n".join(page.get_text() for page in doc)
-        doc.close()
-        return texto
-    except Exception as e:
-        return f"[Erro ao ler o PDF: {e}]"
+MATCHER = carregar_matcher()
 
-# Upload do Excel
-uploaded_file = st.file_uploader("📤 Envie o arquivo Excel com os projetos", type=[".xlsx"])
+# Fila de análises em segundo plano, criada uma vez por processo do Streamlit: a análise
+# continua com reruns da página e com a aba do navegador fechada
+@st.cache_resource
+def carregar_fila():
+    fila = FilaJobs()
+    fila.iniciar_workers()
+    return fila
+
+fila = carregar_fila()
+mostrar_lista_jobs(fila)
 
 if uploaded_file:
-    xls = pd.ExcelFile(uploaded_file)
-    abas = xls.sheet_names
+    cronometro = Cronometro()
+    with cronometro.medir(ETAPA_PLANILHA):
+        planilha = abrir_planilha(uploaded_file)
+    abas = listar_abas(planilha)
     aba_escolhida = st.selectbox("Escolha a aba para analisar:", abas)
-    df = pd.read_excel(uploaded_file, sheet_name=aba_escolhida, header=None)
-
-    # Detectar a linha de cabeçalho
-    for i in range(10):
-        if df.iloc[i].astype(str).str.contains("Empresa").any():
-            df.columns = df.iloc[i].astype(str).str.strip()
-            df = df[i+1:].reset_index(drop=True)
-            break
+    aba = AbaPlanilha(planilha, aba_escolhida)
 
     col1, col2 = st.columns(2)
     with col1:
-        empresa_col = st.selectbox("Coluna com o nome da empresa:", df.columns)
+        empresa_col = st.selectbox("Coluna com o nome da empresa:", aba.colunas)
     with col2:
-        arquivo_col = st.selectbox("Coluna com o nome do arquivo:", df.columns)
+        arquivo_col = st.selectbox("Coluna com o nome do arquivo:", aba.colunas)
 
-    st.markdown("---")
-    st.subheader("🔍 Resultados da Análise")
-
-    resultados = []
-
-    for _, row in df.iterrows():
-        empresa = str(row[empresa_col]).strip()
-        nome_arquivo = str(row[arquivo_col]).strip()
-
-        pasta_final = os.path.join("pdfs", empresa, "FINAL")
-        nome_desejado = f"{nome_arquivo}.pdf"
+    workers = st.sidebar.number_input("Processos paralelos", min_value=1, max_value=64, value=workers_padrao())
+    perfil = st.sidebar.selectbox("Perfil da execução", [None, *PERFIS], format_func=lambda p: p or "Nenhum")
+    pasta_armazem, formato_armazem = opcoes_armazem()
 
-        if os.path.exists(pasta_final):
-            arquivos = os.listdir(pasta_final)
-            match = get_close_matches(nome_desejado, arquivos, n=1, cutoff=0.7)
-            if match:
-                caminho_pdf = os.path.join(pasta_final, match[0])
-                texto = ler_pdf(caminho_pdf)
-                recomendacoes = extrair_recomendacoes(texto)
-                status = "Encontrado" if recomendacoes else "Sem recomendações"
-            else:
-                recomendacoes = []
-                status = "Arquivo não encontrado (nome parecido não encontrado)"
-        else:
-            recomendacoes = []
-            status = "Pasta FINAL não encontrada"
+    with cronometro.medir(ETAPA_PLANILHA):
+        registros = aba.linhas(empresa_col, arquivo_col)
 
-        recomendacoes_formatadas = "\n".join([f"{i+1}. {rec}" for i, rec in enumerate(recomendacoes)]) if recomendacoes else "-"
+    # A análise vai para a fila e o ID dela fica na URL. Só linhas novas ou com PDF
+    # alterado desde a última execução são reprocessadas
+    if st.button("▶️ Analisar"):
+        st.query_params["job"] = fila.enviar(
+            registros, f"{uploaded_file.name} · {aba_escolhida}", max_workers=workers, matcher=MATCHER,
+            perfil=perfil, planilha=uploaded_file.getvalue(), aba=aba_escolhida, cronometro=cronometro,
+            armazem=pasta_armazem, formato_armazem=formato_armazem,
+        )
 
-        resultados.append({
-            "Empresa": empresa,
-            "Arquivo": nome_arquivo,
-            "Status": status,
-            "Recomendações": recomendacoes_formatadas
-        })
-
-    df_resultado = pd.DataFrame(resultados)
-    st.dataframe(df_resultado, use_container_width=True)
-
-    # Gerar planilha para download
-    buffer = BytesIO()
-    df_resultado.to_excel(buffer, index=False)
-    st.download_button(
-        label="📥 Baixar Resultado em Excel",
-        data=buffer.getvalue(),
-        file_name="resultado_recomendacoes.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+if "job" in st.query_params:
+    st.markdown("---")
+    st.subheader("🔍 Resultados da Análise")
+    mostrar_job(fila, st.query_params["job"])
@@ -0,0 +1,50 @@
+import streamlit as st
+
+st.set_page_config(page_title="Busca nos Relatórios", layout="wide")
+st.title("🔎 Busca nos Relatórios PDF")
+
+# PyMuPDF e o pool de leitura só depois do primeiro desenho da página
+from analisador.indice import IndiceBusca
+from analisador.lote import workers_padrao
+
+# Índice de texto completo do acervo pdfs/<Empresa>/FINAL, aberto uma vez por sessão do servidor
+@st.cache_resource
+def carregar_indice():
+    return IndiceBusca()
+
+indice = carregar_indice()
+
+# Atualização incremental: só PDFs novos ou alterados são relidos
+workers = st.sidebar.number_input("Processos de leitura de PDF", min_value=1, max_value=64, value=workers_padrao())
+if st.sidebar.button("🔄 Atualizar índice") or indice.total_documentos() == 0:
+    barra = st.progress(0.0)
+
+    def ao_progresso(feitos, total):
+        barra.progress(feitos / total, text=f"{feitos}/{total} relatórios indexados")
+
+    contagem = indice.atualizar(max_workers=workers, ao_progresso=ao_progresso)
+    barra.empty()
+    st.sidebar.success(", ".join(f"{n} {rotulo}" for rotulo, n in contagem.items()))
+
+st.caption(f"{indice.total_documentos()} relatórios no índice")
+
+col1, col2, col3 = st.columns([3, 1, 1])
+with col1:
+    consulta = st.text_input("Termos da busca (use aspas para frase exata):")
+with col2:
+    empresa = st.selectbox("Empresa", ["Todas"] + indice.empresas())
+with col3:
+    somente_recomendacoes = st.checkbox("Só recomendações")
+
+if consulta:
+    resultados = indice.buscar(
+        consulta,
+        limite=100,
+        empresa=None if empresa == "Todas" else empresa,
+        somente_recomendacoes=somente_recomendacoes,
+    )
+    st.markdown(f"### {len(resultados)} resultados")
+    for r in resultados:
+        trecho = " ".join(r["trecho"].split())
+        st.markdown(f"**{r['empresa']} / {r['arquivo']}**, página {r['pagina']}  \n{trecho}")
+        st.caption(r["caminho"])
@@ -1,11 +1,4 @@
 import streamlit as st
-import pandas as pd
-import fitz  # PyMuPDF
-import os
-import re
-from io import BytesIO
-from difflib import get_close_matches
-import openai
 
 st.set_page_config(page_title="Analisador de Recomendações", layout="wide")
 st.title("📄 Verificador de Recomendações em Relatórios PDF com IA")
@@ -17,111 +10,91 @@ if not api_key:
     st.warning("Por favor, insira sua chave da API da OpenAI para continuar.")
     st.stop()
 
-openai.api_key = api_key
-
-# Função para ler texto do PDF
-def ler_pdf(caminho_pdf):
-    try:
-        doc = fitz.open(caminho_pdf)
-        texto = "\n".join(page.get_text() for page in doc)
-        doc.close()
-        return texto
-    except Exception as e:
-        return f"[Erro ao ler o PDF: {e}]"
-
-# Função para extrair recomendações com IA focando nas conclusões
-
-# Função para extrair recomendações com IA focando nas conclusões
-def extrair_recomendacoes_ia(texto):
-    # Pega os últimos 3000 caracteres, supondo que as conclusões estão no fim
-    trecho_final = texto[-3000:]
-
-    prompt_inicial = (
-        "Você é um especialista técnico. Abaixo está um trecho das conclusões de um relatório técnico.\n"
-        "Extraia apenas as recomendações encontradas nas conclusões, em formato de lista com marcadores (bullet points).\n"
-        "Ignore qualquer informação que não seja uma sugestão, orientação ou ação proposta.\n\n"
-        f"Texto:\n\"\"\"\n{trecho_final}\n\"\"\""
-    )
+# Módulos pesados (openai, pandas, PyMuPDF, openpyxl) só depois do primeiro desenho da página;
+# nos reruns seguintes eles já estão carregados
+import pandas as pd
+from io import BytesIO
+from interface import mostrar_tempos
+from analisador.lote import workers_padrao
+from analisador.manifesto import manifesto_padrao
+from analisador.openai_cliente import ClienteOpenAI
+from analisador.pipeline import ETAPA_LEITURA, excel_em_bytes, executar, resultados_por_linha
+from analisador.planilha import AbaPlanilha, abrir_planilha, linhas_da_planilha, listar_abas
+from analisador.tempos import ETAPA_PLANILHA, PERFIS, Cronometro
+from analisador.trechos import ORCAMENTO_TOKENS_PADRAO
+
+# Limites da conta OpenAI; as chamadas rodam em paralelo dentro deles
+rpm = st.sidebar.number_input("Requisições por minuto (RPM)", min_value=1, value=500)
+tpm = st.sidebar.number_input("Tokens por minuto (TPM)", min_value=1000, value=90000, step=1000)
+concorrencia = st.sidebar.number_input("Chamadas simultâneas", min_value=1, max_value=64, value=8)
 
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Você é um especialista técnico. Extraia recomendações das conclusões de relatórios."},
-                {"role": "user", "content": prompt_inicial}
-            ],
-            temperature=0.2
-        )
-        return response["choices"][0]["message"]["content"].strip()
-    except Exception as e:
-        return f"[Erro ao usar OpenAI: {e}]"
+cliente = ClienteOpenAI(api_key, rpm=rpm, tpm=tpm, max_concorrencia=concorrencia)
 
 
 # Upload do Excel
 uploaded_file = st.file_uploader("📤 Envie o arquivo Excel com os projetos", type=[".xlsx"])
 
 if uploaded_file:
-    xls = pd.ExcelFile(uploaded_file)
-    abas = xls.sheet_names
+    cronometro = Cronometro()
+    with cronometro.medir(ETAPA_PLANILHA):
+        planilha = abrir_planilha(uploaded_file)
+    abas = listar_abas(planilha)
     aba_escolhida = st.selectbox("Escolha a aba para analisar:", abas)
-    df = pd.read_excel(uploaded_file, sheet_name=aba_escolhida, header=None)
-
-    # Detectar a linha de cabeçalho
-    for i in range(10):
-        if df.iloc[i].astype(str).str.contains("Empresa").any():
-            df.columns = df.iloc[i].astype(str).str.strip()
-            df = df[i+1:].reset_index(drop=True)
-            break
+    aba = AbaPlanilha(planilha, aba_escolhida)
 
     col1, col2 = st.columns(2)
     with col1:
-        empresa_col = st.selectbox("Coluna com o nome da empresa:", df.columns)
+        empresa_col = st.selectbox("Coluna com o nome da empresa:", aba.colunas)
     with col2:
-        arquivo_col = st.selectbox("Coluna com o nome do arquivo:", df.columns)
+        arquivo_col = st.selectbox("Coluna com o nome do arquivo:", aba.colunas)
 
     st.markdown("---")
     st.subheader("🔍 Resultados da Análise com IA (Conclusões)")
 
-    resultados = []
-
-    for _, row in df.iterrows():
-        empresa = str(row[empresa_col]).strip()
-        nome_arquivo = str(row[arquivo_col]).strip()
-
-        pasta_final = os.path.join("pdfs", empresa, "FINAL")
-        nome_desejado = f"{nome_arquivo}.pdf"
-
-        if os.path.exists(pasta_final):
-            arquivos = os.listdir(pasta_final)
-            match = get_close_matches(nome_desejado, arquivos, n=1, cutoff=0.7)
-            if match:
-                caminho_pdf = os.path.join(pasta_final, match[0])
-                texto = ler_pdf(caminho_pdf)
-                recomendacoes = extrair_recomendacoes_ia(texto)
-                status = "Encontrado"
-            else:
-                recomendacoes = "-"
-                status = "Arquivo não encontrado (nome parecido não encontrado)"
-        else:
-            recomendacoes = "-"
-            status = "Pasta FINAL não encontrada"
-
-        resultados.append({
-            "Empresa": empresa,
-            "Arquivo": nome_arquivo,
-            "Status": status,
-            "Recomendações": recomendacoes
-        })
-
-    df_resultado = pd.DataFrame(resultados)
-    st.dataframe(df_resultado, use_container_width=True)
+    workers = st.sidebar.number_input("Processos de leitura de PDF", min_value=1, max_value=64, value=workers_padrao())
+    perfil = st.sidebar.selectbox("Perfil da execução", [None, *PERFIS], format_func=lambda p: p or "Nenhum")
+    # Palavras-chave primeiro: o modelo recebe só os trechos com elas e não é chamado sem nenhuma
+    prefiltro = st.sidebar.checkbox("Enviar ao modelo só trechos com palavras-chave", value=True)
+    orcamento_tokens = st.sidebar.number_input(
+        "Tokens dos trechos por documento", min_value=100, value=ORCAMENTO_TOKENS_PADRAO, step=100, disabled=not prefiltro
+    )
+
+    barra = st.progress(0.0)
+    tabela = st.empty()
+
+    # As conclusões (ou os trechos) são lidas no pool de processos e depois enviadas ao modelo
+    def ao_progresso(resultados, feitos, total, etapa):
+        rotulo = "relatórios lidos" if etapa == ETAPA_LEITURA else "respostas da IA"
+        tabela.dataframe(pd.DataFrame(resultados), use_container_width=True)
+        barra.progress(feitos / total, text=f"{feitos}/{total} {rotulo}")
+
+    with cronometro.medir(ETAPA_PLANILHA):
+        registros = aba.linhas(empresa_col, arquivo_col)
+    linhas = linhas_da_planilha(registros)
+    # Só linhas novas ou com PDF alterado desde a última execução são reprocessadas
+    manifesto = manifesto_padrao()
+    with cronometro.perfilar(perfil):
+        resultados = executar(linhas, max_workers=workers, modelo=cliente, ao_progresso=ao_progresso, manifesto=manifesto, cronometro=cronometro,
+                              prefiltro=prefiltro, orcamento_tokens=orcamento_tokens)
+    manifesto.fechar()
 
     # Gerar planilha para download
-    buffer = BytesIO()
-    df_resultado.to_excel(buffer, index=False)
     st.download_button(
         label="📥 Baixar Resultado em Excel",
-        data=buffer.getvalue(),
+        data=excel_em_bytes(resultados),
         file_name="resultado_recomendacoes_ia.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
+
+    # Gerar a planilha original com Status e Recomendações na própria aba
+    planilha_com_resultados = BytesIO()
+    aba.gravar_com_resultados(uploaded_file, resultados_por_linha(registros, resultados), ["Status", "Recomendações"], planilha_com_resultados)
+    st.download_button(
+        label="📥 Baixar planilha original com as recomendações",
+        data=planilha_com_resultados.getvalue(),
+        file_name=f"{aba_escolhida}_com_recomendacoes.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+    # Tempos por etapa (total e por linha), para descobrir onde a execução demora
+    mostrar_tempos(cronometro)
@@ -1,139 +1,78 @@
 import streamlit as st
-import pandas as pd
-import fitz  # PyMuPDF
-import os
-import re
-from io import BytesIO
-from difflib import get_close_matches
 
 st.set_page_config(page_title="Analisador de Recomendações", layout="wide")
 st.title("📄 Verificador de Recomendações em Relatórios PDF")
 
-# Palavras-chave para identificar recomendações
-KEYWORDS = [
-    # Português
-    "recomenda", "deve ser", "é necessário", "sugerimos",
-    "aconselhamos", "indicamos", "importante que",
-    "é essencial que", "convém que",
-    
-    # Inglês
-    "recommend", "should", "must", "it is necessary",
-    "we suggest", "we recommend", "we advise that",
-    "critical that", "it is essential", "it is recommended that",
-    "you ought to",
-    
-    # Francês
-    "recommande", "doit être", "il est nécessaire",
-    "nous suggérons", "nous conseillons", "nous indiquons",
-    "il est important que", "il est essentiel que", "il faudrait",
-    "nous recommandons", "vous devriez",
-    
-    # Espanhol
-    "recomienda", "debe ser", "es necesario",
-    "sugerimos", "aconsejamos", "indicamos",
-    "es importante que", "es esencial que", "debería",
-    "recomendamos", "conviene que"
-]
-
-# Função para buscar frases com recomendações no texto do PDF
-def extrair_recomendacoes(texto):
-    frases = re.split(r'[\.\!?]\s+', texto)
-    recomendacoes = [frase.strip() for frase in frases if any(kw in frase.lower() for kw in KEYWORDS)]
-    return recomendacoes
-
-# Função para ler texto do PDF
-def ler_pdf(caminho_pdf):
-    try:
-        doc = fitz.open(caminho_pdf)
-        texto = "\n".join(page.get_text() for page in doc)
-        doc.close()
-        return texto
-    except Exception as e:
-        return f"[Erro ao ler o PDF: {e}]"
-
 # Upload do Excel
 uploaded_file = st.file_uploader("📤 Envie o arquivo Excel com os projetos", type=[".xlsx"])
 
+# Módulos pesados (pandas, PyMuPDF, openpyxl) só depois do primeiro desenho da página;
+# nos reruns seguintes eles já estão carregados
+from interface import mostrar_job, mostrar_lista_jobs, opcoes_armazem
+from analisador.jobs import FilaJobs
+from analisador.lote import workers_padrao
+from analisador.planilha import AbaPlanilha, abrir_planilha, linhas_de_todas_as_abas, listar_abas
+from analisador.tempos import ETAPA_PLANILHA, PERFIS, Cronometro
+
+# Fila de análises em segundo plano, criada uma vez por processo do Streamlit: a análise
+# continua com reruns da página e com a aba do navegador fechada
+@st.cache_resource
+def carregar_fila():
+    fila = FilaJobs()
+    fila.iniciar_workers()
+    return fila
+
+fila = carregar_fila()
+mostrar_lista_jobs(fila)
+
 if uploaded_file:
+    cronometro = Cronometro()
     # Carrega todas as abas
-    xls = pd.ExcelFile(uploaded_file)
-    abas = xls.sheet_names
-    aba_escolhida = st.selectbox("Escolha a aba para analisar:", abas,index=1)
-    # Lê a aba selecionada para DataFrame sem inferir cabeçalho
-    df = pd.read_excel(uploaded_file, sheet_name=aba_escolhida, header=None)
-
-    # Detectar a linha de cabeçalho e ajustar colunas
-    for i in range(10):
-        if df.iloc[i].astype(str).str.contains("Empresa").any():
-            df.columns = df.iloc[i].astype(str).str.strip()
-            df = df[i+1:].reset_index(drop=True)
-            break
+    with cronometro.medir(ETAPA_PLANILHA):
+        planilha = abrir_planilha(uploaded_file)
+    abas = listar_abas(planilha)
 
     # Colunas fixas
     empresa_col = "Empresa"
     arquivo_col = "Nome do arquivo salvo"
 
-    # Seleção da empresa para análise
-    empresas_disponiveis = sorted(df[empresa_col].dropna().astype(str).unique())
-    empresa_selecionada = st.selectbox("Selecione a empresa para análise:", empresas_disponiveis)
-
-    # Filtrar dataframe para a empresa escolhida
-    df_filtrado = df[df[empresa_col].astype(str) == empresa_selecionada].copy()
-
+    # Todas as abas e empresas numa só análise: cada PDF é lido uma vez, mesmo citado em várias linhas
+    todas = st.checkbox("Analisar todas as abas e empresas")
+    if todas:
+        with cronometro.medir(ETAPA_PLANILHA):
+            registros, ignoradas = linhas_de_todas_as_abas(planilha, empresa_col, arquivo_col)
+        if ignoradas:
+            st.info(f"Abas sem as colunas {empresa_col!r} e {arquivo_col!r}, ignoradas: {', '.join(ignoradas)}")
+        aba_escolhida = None
+        descricao = f"{uploaded_file.name} · todas as abas"
+    else:
+        aba_escolhida = st.selectbox("Escolha a aba para analisar:", abas,index=1)
+        # Lê a aba selecionada em streaming e detecta a linha de cabeçalho
+        aba = AbaPlanilha(planilha, aba_escolhida)
+
+        # Seleção da empresa para análise
+        empresas_disponiveis = aba.valores(empresa_col)
+        empresa_selecionada = st.selectbox("Selecione a empresa para análise:", empresas_disponiveis)
+
+        # Linhas da empresa escolhida
+        with cronometro.medir(ETAPA_PLANILHA):
+            registros = aba.linhas(empresa_col, arquivo_col, empresa=empresa_selecionada)
+        descricao = f"{empresa_selecionada} · {aba_escolhida}"
+
+    workers = st.sidebar.number_input("Processos paralelos", min_value=1, max_value=64, value=workers_padrao())
+    perfil = st.sidebar.selectbox("Perfil da execução", [None, *PERFIS], format_func=lambda p: p or "Nenhum")
+    pasta_armazem, formato_armazem = opcoes_armazem()
+
+    # A análise vai para a fila e o ID dela fica na URL. Só linhas novas ou com PDF
+    # alterado desde a última execução são reprocessadas
+    if st.button("▶️ Analisar"):
+        st.query_params["job"] = fila.enviar(
+            registros, descricao, max_workers=workers,
+            perfil=perfil, planilha=uploaded_file.getvalue(), aba=aba_escolhida, cronometro=cronometro,
+            armazem=pasta_armazem, formato_armazem=formato_armazem,
+        )
+
+if "job" in st.query_params:
     st.markdown("---")
     st.subheader("🔍 Resultados da Análise")
-
-    resultados = []
-
-    for _, row in df_filtrado.iterrows():
-        empresa = str(row[empresa_col]).strip()
-        nome_arquivo = str(row[arquivo_col]).strip()
-
-        pasta_final = os.path.join("pdfs", empresa, "FINAL")
-        nome_desejado = f"{nome_arquivo}.pdf"
-
-        if os.path.exists(pasta_final):
-            arquivos = os.listdir(pasta_final)
-            match = get_close_matches(nome_desejado, arquivos, n=1, cutoff=0.7)
-            if match:
-                caminho_pdf = os.path.join(pasta_final, match[0])
-                texto = ler_pdf(caminho_pdf)
-                recomendacoes = extrair_recomendacoes(texto)
-                status = "Encontrado" if recomendacoes else "Sem recomendações"
-            else:
-                recomendacoes = []
-                status = "Arquivo não encontrado (nome parecido não encontrado)"
-        else:
-            recomendacoes = []
-            status = "Pasta FINAL não encontrada"
-
-        recomendacoes_formatadas = "\n".join([f"{i+1}. {rec}" for i, rec in enumerate(recomendacoes)]) if recomendacoes else "-"
-
-        resultados.append({
-            "Empresa": empresa,
-            "Arquivo": nome_arquivo,
-            "Status": status,
-            "Recomendações": recomendacoes_formatadas
-        })
-
-    # Mostrar resultados em DataFrame
-    df_resultado = pd.DataFrame(resultados)
-    st.dataframe(df_resultado, use_container_width=True)
-
-    # Inserir recomendações na própria aba do arquivo original
-    df_export = df.copy()
-    # Adiciona coluna de Recomendações com valores vazios
-    df_export['Recomendações'] = ""
-    # Preenche somente para as linhas filtradas
-    for idx, rec in zip(df_filtrado.index, df_resultado['Recomendações']):
-        df_export.at[idx, 'Recomendações'] = rec
-
-    # Gerar planilha para download
-    buffer = BytesIO()
-    df_resultado.to_excel(buffer, index=False)
-    st.download_button(
-        label="📥 Baixar Resultado em Excel",
-        data=buffer.getvalue(),
-        file_name="resultado_recomendacoes_ia.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    mostrar_job(fila, st.query_params["job"], nome_resultado="resultado_recomendacoes_ia.xlsx")
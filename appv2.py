@@ -1,8 +1,4 @@
 import streamlit as st
-import re
-import fitz
-from io import BytesIO
-from azure.storage.blob import BlobServiceClient
 
 st.set_page_config(page_title="Analisador V2 – Azure Blob", layout="wide")
 st.title("📄 Verificador de Recomendações (Azure Blob)")
@@ -11,58 +7,108 @@ st.title("📄 Verificador de Recomendações (Azure Blob)")
 conn_str = st.text_input("AZURE_STORAGE_CONNECTION_STRING", type="password")
 container_name = st.text_input("Container name", value="bkmrelatoriostecnicos")
 
+# Filtros da listagem: o prefixo é aplicado no próprio Azure
+col1, col2 = st.columns(2)
+with col1:
+    prefixo = st.text_input("Prefixo dos blobs (ex.: Empresa A/FINAL/)", value="")
+with col2:
+    desde = st.date_input("Modificados a partir de", value=None)
+
+# Módulos pesados (SDK do Azure, pandas, PyMuPDF, openpyxl) só depois do primeiro desenho da página;
+# nos reruns seguintes eles já estão carregados
+import pandas as pd
+from interface import mostrar_tempos, opcoes_armazem
+from analisador.armazem import ArmazemResultados
+from analisador.azure_blob import baixar_pdf, cliente_container, listar_pdfs
+from analisador.lote import workers_padrao
+from analisador.pipeline import ETAPA_DOWNLOAD, excel_em_bytes, executar_blobs
+from analisador.recomendacoes import MATCHER
+from analisador.segmentacao import frases_do_pdf
+from analisador.tempos import PERFIS, Cronometro
+
+# Cliente do container reaproveitado entre reruns
+@st.cache_resource
+def carregar_container(conn_str, container_name):
+    return cliente_container(conn_str, container_name)
+
 # 2. Conexão e listagem de blobs
+container_client = None
 if conn_str:
     try:
-        service_client = BlobServiceClient.from_connection_string(conn_str)
-        container_client = service_client.get_container_client(container_name)
-        blob_list = [b.name for b in container_client.list_blobs() if b.name.lower().endswith(".pdf")]
+        container_client = carregar_container(conn_str, container_name)
+        blobs = listar_pdfs(container_client, prefixo=prefixo, desde=desde)
     except Exception as e:
         st.error(f"Erro ao conectar ao Azure Blob: {e}")
-        blob_list = []
+        blobs = []
 else:
     st.warning("Informe a Connection String do Azure para listar os relatórios.")
-    blob_list = []
+    blobs = []
 
-# 3. Seleção de relatório
-empresa_selecionada = st.selectbox("Escolha o relatório (blob) para analisar", blob_list)
+blob_list = [b["nome"] for b in blobs]
+modo = st.radio("O que analisar?", ["Um relatório", "Todos os relatórios listados"], horizontal=True)
 
-# 4. Download e extração de texto
-texto = ""
-if empresa_selecionada:
-    blob_client = container_client.get_blob_client(empresa_selecionada)
-    pdf_bytes = blob_client.download_blob().readall()
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    texto = "\n".join(page.get_text() for page in doc)
+if modo == "Um relatório":
+    # 3. Seleção de relatório
+    empresa_selecionada = st.selectbox("Escolha o relatório (blob) para analisar", blob_list)
 
-# 5. Extração de recomendações
-KEYWORDS = [
-    # Português
-    "recomenda", "deve ser", "é necessário", "sugerimos",
-    "aconselhamos", "indicamos", "importante que", "é essencial que", "convém que",
-    # Inglês
-    "recommend", "should", "must", "it is necessary", "we suggest",
-    "we recommend", "we advise that", "critical that", "it is essential",
-    "it is recommended that", "you ought to",
-    # Francês
-    "recommande", "doit être", "il est nécessaire", "nous suggérons",
-    "nous conseillons", "nous indiquons", "il est important que",
-    "il est essentiel que", "il faudrait", "nous recommandons", "vous devriez",
-    # Espanhol
-    "recomienda", "debe ser", "es necesario", "sugerimos",
-    "aconsejamos", "indicamos", "es importante que", "es esencial que",
-    "debería", "recomendamos", "conviene que"
-]
+    # 4. Download (só se o ETag mudou) e 5. extração das recomendações, frase a frase
+    if empresa_selecionada:
+        etag = next(b["etag"] for b in blobs if b["nome"] == empresa_selecionada)
+        try:
+            caminho_pdf = baixar_pdf(container_client, empresa_selecionada, etag=etag)
+            frases = list(frases_do_pdf(caminho_pdf))
+        except Exception as e:
+            st.error(f"Erro ao baixar o relatório do Azure Blob: {e}")
+            st.stop()
+        # Um PDF ilegível vem como uma única frase com a mensagem de erro, sem página
+        erros = [f["frase"] for f in frases if f["pagina"] is None]
+        if erros:
+            st.error(erros[0])
+            st.stop()
+        recs = list(MATCHER.extrair_de_frases(frases))
+        st.markdown("### Recomendações encontradas")
+        if recs:
+            for r in recs:
+                st.write(f"- {r['frase']}  _(p. {r['pagina']} · {r['palavra_chave']} · {', '.join(r['idiomas'])})_")
+        else:
+            st.info("Nenhuma recomendação identificada.")
+
+else:
+    workers = st.sidebar.number_input("Processos paralelos", min_value=1, max_value=64, value=workers_padrao())
+    downloads = st.sidebar.number_input("Downloads simultâneos", min_value=1, max_value=64, value=8)
+    perfil = st.sidebar.selectbox("Perfil da execução", [None, *PERFIS], format_func=lambda p: p or "Nenhum")
+    pasta_armazem, formato_armazem = opcoes_armazem()
+
+if modo != "Um relatório" and blobs and st.button(f"🔍 Analisar {len(blobs)} relatórios"):
+    barra = st.progress(0.0)
+    tabela = st.empty()
+
+    def ao_progresso(resultados, feitos, total, etapa):
+        rotulo = "relatórios baixados" if etapa == ETAPA_DOWNLOAD else "relatórios analisados"
+        tabela.dataframe(pd.DataFrame(resultados), use_container_width=True)
+        barra.progress(feitos / total, text=f"{feitos}/{total} {rotulo}")
+
+    cronometro = Cronometro()
+    # Com uma pasta de armazém, os documentos e as recomendações também vão para ela (substituindo o conteúdo)
+    armazem = ArmazemResultados(pasta_armazem, formato_armazem) if pasta_armazem else None
+    try:
+        with cronometro.perfilar(perfil):
+            resultados = executar_blobs(
+                container_client, blobs, max_workers=workers, ao_progresso=ao_progresso, downloads=downloads, cronometro=cronometro,
+                armazem=armazem,
+            )
+    finally:
+        if armazem is not None:
+            armazem.fechar()
+    if armazem is not None:
+        st.success(f"{armazem.documentos} documentos gravados no armazém {pasta_armazem}")
 
-def extrair_recomendacoes(texto):
-    frases = re.split(r'[\.\!?]\s+', texto)
-    return [frase.strip() for frase in frases if any(kw in frase.lower() for kw in KEYWORDS)]
+    st.download_button(
+        label="📥 Baixar Resultado em Excel",
+        data=excel_em_bytes(resultados),
+        file_name="resultado_recomendacoes_azure.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
 
-if texto:
-    recs = extrair_recomendacoes(texto)
-    st.markdown("### Recomendações encontradas")
-    if recs:
-        for r in recs:
-            st.write(f"- {r}")
-    else:
-        st.info("Nenhuma recomendação identificada.")
+    # Tempos por etapa (total e por relatório), para descobrir onde a execução demora
+    mostrar_tempos(cronometro)
@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from difflib import get_close_matches
+
+# O cache em disco do analisador vai para uma pasta própria, definida antes de importá-lo,
+# para que as medições não usem (nem alterem) o .cache da aplicação
+os.environ["ANALISADOR_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_cache_")
+
+import fitz  # PyMuPDF
+
+from analisador.arquivos import IndiceArquivos
+from analisador.cache import DIRETORIO_CACHE, CacheDisco, esquecer_hashes
+from analisador.lote import workers_padrao
+from analisador.pipeline import executar
+from analisador.planilha import ler_planilha, linhas_da_planilha
+from analisador.recomendacoes import KEYWORDS, MATCHER
+from analisador.segmentacao import frases_do_pdf
+from benchmarks.sintetico import gerar_acervo, gerar_pdf, gerar_pdf_grande, paginas_de_exemplo
+
+ESCALAS_PADRAO = "10,100,1000"
+APPS_STREAMLIT = ("app.py", "appv1.py", "appv2.py", "app_ia.py", "app_llama.py", "app_busca.py")
+RAIZ_REPOSITORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGINAS_PDF_GRANDE = 300
+TOLERANCIA_PADRAO = 0.2
+
+
+# Função para medir uma função: roda `repeticoes` vezes e guarda a mediana e o mínimo em segundos.
+# `preparar` roda antes de cada repetição, fora da medição (ex.: esvaziar o cache)
+def medir(funcao, repeticoes, itens=1, preparar=None):
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    mediana = statistics.median(tempos)
+    return {
+        "segundos": round(mediana, 6),
+        "minimo": round(min(tempos), 6),
+        "repeticoes": repeticoes,
+        "itens": itens,
+        "itens_por_segundo": round(itens / mediana, 2) if mediana else None,
+    }
+
+
+# Esvazia os caches do que é lido dos PDFs: frases (análise por palavras-chave), textos (conclusões)
+# e os hashes dos arquivos
+def _limpar_caches_pdf():
+    for nome in ("frases", "textos", "hashes"):
+        caminho = os.path.join(DIRETORIO_CACHE, f"{nome}.sqlite")
+        if os.path.exists(caminho):
+            CacheDisco(caminho).limpar()
+    esquecer_hashes()
+
+
+# Localização como era feita antes do IndiceArquivos: listdir + get_close_matches a cada linha
+def _localizar_original(raiz, empresa, nome_arquivo):
+    pasta_final = os.path.join(raiz, empresa, "FINAL")
+    if not os.path.exists(pasta_final):
+        return None
+    match = get_close_matches(nome_arquivo, os.listdir(pasta_final), n=1, cutoff=0.7)
+    return os.path.join(pasta_final, match[0]) if match else None
+
+
+# Leitura e segmentação em frases, como no pipeline (segmentacao.frases_do_pdf)
+def bench_frases_do_pdf(dados, repeticoes):
+    pequeno = os.path.join(dados, "pequeno.pdf")
+    if not os.path.exists(pequeno):
+        gerar_pdf(pequeno, paginas_de_exemplo()[:2], "pequeno.pdf")
+    grande = gerar_pdf_grande(os.path.join(dados, f"grande_{PAGINAS_PDF_GRANDE}.pdf"), PAGINAS_PDF_GRANDE)
+
+    resultados = {}
+    for rotulo, caminho, paginas in (("pequeno", pequeno, 2), ("grande", grande, PAGINAS_PDF_GRANDE)):
+        # Frio: cache vazio a cada repetição (PyMuPDF e segmentação); quente: frases vindas do cache
+        caches = []
+
+        def novo_cache():
+            caches.append(CacheDisco(os.path.join(DIRETORIO_CACHE, f"bench_{rotulo}_{len(caches)}.sqlite")))
+
+        def ler():
+            return list(frases_do_pdf(caminho, cache=caches[-1]))
+
+        resultados[f"frases_do_pdf.{rotulo}.frio"] = medir(ler, repeticoes, paginas, novo_cache)
+        resultados[f"frases_do_pdf.{rotulo}.quente"] = medir(ler, repeticoes, paginas)
+    return resultados, grande
+
+
+# Busca das palavras-chave nas frases já segmentadas, como no pipeline
+def bench_extracao(caminho_grande, repeticoes):
+    frases = list(frases_do_pdf(caminho_grande))
+    medicao = medir(lambda: list(MATCHER.extrair_de_frases(frases)), repeticoes, len(frases))
+    medicao["palavras_chave"] = len(KEYWORDS)
+    medicao["recomendacoes"] = len(list(MATCHER.extrair_de_frases(frases)))
+    return {"extrair_de_frases.pdf_grande": medicao}
+
+
+def bench_resolucao(raiz, linhas, repeticoes):
+    def com_indice():
+        indice = IndiceArquivos(raiz)
+        return [indice.localizar(e, n) for e, n in linhas]
+
+    indice = IndiceArquivos(raiz)
+    return {
+        # Montagem do índice + todas as linhas; e só as linhas, com o índice já montado
+        f"resolucao.indice.{len(linhas)}": medir(com_indice, repeticoes, len(linhas)),
+        f"resolucao.indice_pronto.{len(linhas)}": medir(
+            lambda: [indice.localizar(e, n) for e, n in linhas], repeticoes, len(linhas)
+        ),
+        f"resolucao.get_close_matches.{len(linhas)}": medir(
+            lambda: [_localizar_original(raiz, e, n) for e, n in linhas], repeticoes, len(linhas)
+        ),
+    }
+
+
+def bench_ponta_a_ponta(raiz, planilha, workers, repeticoes):
+    def rodar():
+        aba = ler_planilha(planilha)
+        linhas = linhas_da_planilha(aba.linhas("Empresa", "Nome do arquivo salvo"))
+        aba.planilha.close()
+        return executar(linhas, raiz=raiz, max_workers=workers)
+
+    n = len(rodar())
+    return {
+        f"ponta_a_ponta.frio.{n}": medir(rodar, repeticoes, n, _limpar_caches_pdf),
+        f"ponta_a_ponta.quente.{n}": medir(rodar, repeticoes, n),
+    }
+
+
+# Roda num processo novo (imports frios): mede quanto tempo o app leva até desenhar o título
+# e até terminar a primeira execução do script, sem planilha enviada
+_SCRIPT_INICIALIZACAO = """
+import json, sys, time
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+marcas = {}
+titulo = st.title
+def title(*args, **kwargs):
+    marcas.setdefault("primeiro_desenho", time.perf_counter() - inicio)
+    return titulo(*args, **kwargs)
+st.title = title
+
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+inicio = time.perf_counter()
+at.run()
+marcas["primeira_execucao"] = time.perf_counter() - inicio
+marcas["erro"] = at.exception[0].message if at.exception else None
+print(json.dumps(marcas))
+"""
+
+
+def _medicao(tempos):
+    return {"segundos": round(statistics.median(tempos), 6), "minimo": round(min(tempos), 6), "repeticoes": len(tempos), "itens": 1}
+
+
+# Função para medir a abertura a frio de cada app Streamlit, cada repetição num processo novo
+def bench_inicializacao(repeticoes):
+    resultados = {}
+    for app in APPS_STREAMLIT:
+        marcas = {"primeiro_desenho": [], "primeira_execucao": []}
+        erro = None
+        for _ in range(repeticoes):
+            saida = subprocess.run(
+                [sys.executable, "-c", _SCRIPT_INICIALIZACAO, os.path.join(RAIZ_REPOSITORIO, app)],
+                capture_output=True, text=True, cwd=RAIZ_REPOSITORIO,
+                env={**os.environ, "PYTHONPATH": RAIZ_REPOSITORIO},
+            )
+            if saida.returncode != 0:
+                erro = saida.stderr.strip().splitlines()[-1] if saida.stderr.strip() else f"código {saida.returncode}"
+                break
+            medida = json.loads(saida.stdout.strip().splitlines()[-1])
+            erro = medida["erro"]
+            for marca in marcas:
+                if medida.get(marca) is not None:
+                    marcas[marca].append(medida[marca])
+        nome = os.path.splitext(app)[0]
+        for marca, tempos in marcas.items():
+            if tempos:
+                medicao = _medicao(tempos)
+                if erro:
+                    medicao["erro"] = erro
+                resultados[f"inicializacao.{nome}.{marca}"] = medicao
+        if erro:
+            print(f"{app}: {erro}", file=sys.stderr)
+    return resultados
+
+
+def _versao_git():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Função para comparar com uma execução anterior; retorna as medições que ficaram
+# mais lentas que a base além da tolerância (0.2 = 20%)
+def comparar(atual, base, tolerancia=TOLERANCIA_PADRAO):
+    regressoes = []
+    for nome, medicao in sorted(atual["resultados"].items()):
+        anterior = base["resultados"].get(nome)
+        if not anterior or not anterior["segundos"]:
+            continue
+        razao = medicao["segundos"] / anterior["segundos"]
+        marca = "  <-- regressão" if razao > 1 + tolerancia else ""
+        print(f"{nome:45} {anterior['segundos']:10.4f}s -> {medicao['segundos']:10.4f}s ({razao - 1:+.0%}){marca}")
+        if marca:
+            regressoes.append(nome)
+    return regressoes
+
+
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.executar",
+        description="Mede leitura de PDF, extração de recomendações, localização de arquivos, a execução "
+        "completa de uma planilha e a abertura dos apps Streamlit sobre acervos sintéticos, e grava os tempos em JSON.",
+    )
+    parser.add_argument("--escalas", default=ESCALAS_PADRAO, help="números de PDFs dos acervos sintéticos (ex.: 10,100,1000,10000)")
+    parser.add_argument("--dados", default=os.path.join(tempfile.gettempdir(), "analisador_bench"), help="pasta dos PDFs e planilhas gerados (reaproveitados entre execuções)")
+    parser.add_argument("--repeticoes", type=int, default=5, help="repetições das medições rápidas")
+    parser.add_argument("--repeticoes-lote", type=int, default=1, help="repetições da execução completa")
+    parser.add_argument("--repeticoes-inicio", type=int, default=3, help="aberturas a frio de cada app Streamlit (0 para não medir)")
+    parser.add_argument("--workers", type=int, default=workers_padrao(), help="processos de leitura de PDF")
+    parser.add_argument("--saida", default="benchmark.json", help="arquivo JSON com os resultados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO, help="aumento de tempo aceito na comparação")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    os.makedirs(args.dados, exist_ok=True)
+    escalas = [int(e) for e in args.escalas.split(",") if e.strip()]
+
+    resultados = {}
+    print("frases_do_pdf...", file=sys.stderr)
+    medicoes, grande = bench_frases_do_pdf(args.dados, args.repeticoes)
+    resultados.update(medicoes)
+    print("extrair_de_frases...", file=sys.stderr)
+    resultados.update(bench_extracao(grande, args.repeticoes))
+    if args.repeticoes_inicio:
+        print("abertura dos apps...", file=sys.stderr)
+        resultados.update(bench_inicializacao(args.repeticoes_inicio))
+
+    for escala in escalas:
+        print(f"acervo de {escala} PDFs...", file=sys.stderr)
+        raiz, planilha = gerar_acervo(os.path.join(args.dados, f"acervo_{escala}"), escala)
+        aba = ler_planilha(planilha)
+        linhas = linhas_da_planilha(aba.linhas("Empresa", "Nome do arquivo salvo"))
+        aba.planilha.close()
+        resultados.update(bench_resolucao(raiz, linhas, args.repeticoes))
+        resultados.update(bench_ponta_a_ponta(raiz, planilha, args.workers, args.repeticoes_lote))
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "commit": _versao_git(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pymupdf": fitz.VersionBind,
+        "workers": args.workers,
+        "resultados": resultados,
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Resultados salvos em {args.saida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regressoes = comparar(relatorio, json.load(f), args.tolerancia)
+        if regressoes:
+            print(f"{len(regressoes)} medições mais lentas que a base", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
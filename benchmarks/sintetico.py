@@ -0,0 +1,89 @@
+import os
+import random
+import unicodedata
+
+import fitz  # PyMuPDF
+from openpyxl import Workbook
+
+# Página A4 e margem usadas nos PDFs sintéticos
+LARGURA, ALTURA = 595, 842
+MARGEM = 50
+
+# Proporção de linhas da planilha com o nome do arquivo levemente diferente do salvo
+# (acentos, caixa, espaços) e com nome de arquivo que não existe no acervo
+FRACAO_NOME_ALTERADO = 0.15
+FRACAO_NOME_INEXISTENTE = 0.05
+
+
+# Função para juntar o texto das páginas dos PDFs de exemplo (pdfs/Empresa A..D, IFG),
+# que serve de matéria-prima para os PDFs sintéticos
+def paginas_de_exemplo(raiz="pdfs"):
+    paginas = []
+    for pasta, _, arquivos in sorted(os.walk(raiz)):
+        for arquivo in sorted(arquivos):
+            if arquivo.lower().endswith(".pdf"):
+                with fitz.open(os.path.join(pasta, arquivo)) as doc:
+                    paginas.extend(t for t in (page.get_text() for page in doc) if t.strip())
+    if not paginas:
+        raise SystemExit(f"Nenhum PDF de exemplo em {raiz}")
+    return paginas
+
+
+# Função para gravar um PDF com as páginas de texto dadas; o identificador no topo
+# de cada página garante conteúdo (e hash) diferente para cada arquivo
+def gerar_pdf(caminho, textos, identificador):
+    doc = fitz.open()
+    caixa = fitz.Rect(MARGEM, MARGEM, LARGURA - MARGEM, ALTURA - MARGEM)
+    for n, texto in enumerate(textos, 1):
+        page = doc.new_page(width=LARGURA, height=ALTURA)
+        page.insert_textbox(caixa, f"{identificador} - página {n}\n\n{texto}", fontsize=9)
+    doc.save(caminho, garbage=3, deflate=True)
+    doc.close()
+
+
+def _nome_alterado(nome):
+    sem_acentos = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    return sem_acentos.replace("_", " ").upper()
+
+
+# Função para gerar um acervo <destino>/pdfs/<Empresa>/FINAL com n_arquivos PDFs e a planilha
+# correspondente (aba "Projetos", colunas Empresa e Nome do arquivo salvo).
+# Retorna (raiz_pdfs, caminho_planilha). Um acervo já gerado com o mesmo tamanho é reaproveitado
+def gerar_acervo(destino, n_arquivos, paginas_por_arquivo=2, arquivos_por_empresa=50, semente=42):
+    raiz = os.path.join(destino, "pdfs")
+    planilha = os.path.join(destino, "projetos.xlsx")
+    if os.path.exists(planilha):
+        return raiz, planilha
+
+    aleatorio = random.Random(semente)
+    paginas = paginas_de_exemplo()
+    n_empresas = max(1, -(-n_arquivos // arquivos_por_empresa))
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Projetos")
+    ws.append(["Empresa", "Nome do arquivo salvo"])
+    for i in range(n_arquivos):
+        empresa = f"Empresa {i % n_empresas + 1:04d}"
+        nome = f"Relatório_{i + 1:05d}.pdf"
+        pasta = os.path.join(raiz, empresa, "FINAL")
+        os.makedirs(pasta, exist_ok=True)
+        textos = [aleatorio.choice(paginas) for _ in range(paginas_por_arquivo)]
+        gerar_pdf(os.path.join(pasta, nome), textos, f"{empresa} {nome}")
+
+        sorteio = aleatorio.random()
+        if sorteio < FRACAO_NOME_INEXISTENTE:
+            nome = f"Inexistente_{i + 1:05d}.pdf"
+        elif sorteio < FRACAO_NOME_INEXISTENTE + FRACAO_NOME_ALTERADO:
+            nome = _nome_alterado(nome)
+        ws.append([empresa, nome])
+    wb.save(planilha)
+    return raiz, planilha
+
+
+# Função para gerar um único PDF com n_paginas, para medir a leitura de relatórios grandes
+def gerar_pdf_grande(caminho, n_paginas, semente=42):
+    if not os.path.exists(caminho):
+        aleatorio = random.Random(semente)
+        paginas = paginas_de_exemplo()
+        gerar_pdf(caminho, [aleatorio.choice(paginas) for _ in range(n_paginas)], os.path.basename(caminho))
+    return caminho
@@ -0,0 +1,130 @@
+# Componentes Streamlit compartilhados pelos apps
+import os
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+from analisador.armazem import FORMATOS
+from analisador.jobs import ESTADOS_FINAIS
+from analisador.pipeline import consolidado_em_bytes, excel_em_bytes, resultados_com_aba
+from analisador.planilha import ler_planilha
+from analisador.tempos import cronometro_de_dict
+
+# Intervalo (s) entre as atualizações da página de um job em execução
+INTERVALO_ATUALIZACAO = 2
+
+
+# Painel com os tempos por etapa (total e por linha), para descobrir onde a execução demora
+def mostrar_tempos(cronometro):
+    with st.expander("⏱️ Tempos da execução"):
+        st.dataframe(pd.DataFrame(cronometro.tabela()), use_container_width=True)
+        st.dataframe(pd.DataFrame(cronometro.linhas), use_container_width=True)
+        col_json, col_prom = st.columns(2)
+        with col_json:
+            st.download_button("📥 Tempos em JSON", cronometro.como_json(), file_name="tempos.json", mime="application/json")
+        with col_prom:
+            st.download_button("📥 Tempos no formato Prometheus", cronometro.como_prometheus(), file_name="tempos.prom", mime="text/plain")
+        if cronometro.perfil:
+            st.code(cronometro.perfil)
+    cronometro.registrar_no_log()
+
+
+# Opções do armazém de resultados (tabelas para BI, ver analisador.armazem) na barra lateral.
+# Retorna (pasta ou None, formato)
+def opcoes_armazem():
+    pasta = st.sidebar.text_input(
+        "Pasta do armazém de resultados (opcional)",
+        help="Grava também uma linha por documento e uma por recomendação, em JSONL ou Parquet",
+    )
+    formato = st.sidebar.selectbox("Formato do armazém", FORMATOS)
+    return pasta.strip() or None, formato
+
+
+# Lista dos últimos jobs na barra lateral; escolher um abre o acompanhamento dele
+def mostrar_lista_jobs(fila):
+    jobs = fila.listar()
+    if not jobs:
+        return
+    st.sidebar.markdown("### Análises recentes")
+    for job in jobs:
+        rotulo = f"{job['descricao'] or job['id']} · {job['estado']} ({job['feitos']}/{job['total']})"
+        if st.sidebar.button(rotulo, key=f"job_{job['id']}"):
+            st.query_params["job"] = job["id"]
+
+
+# Acompanhamento de um job: progresso, resultados parciais e cancelamento; a página se
+# atualiza sozinha enquanto o job roda. O ID fica na URL, então fechar e reabrir a aba
+# (ou um rerun do Streamlit) não perde o job
+def mostrar_job(fila, job_id, nome_resultado="resultado_recomendacoes.xlsx"):
+    job = fila.obter(job_id)
+    if job is None:
+        st.warning(f"Job {job_id} não encontrado.")
+        return
+    em_andamento = job["estado"] not in ESTADOS_FINAIS
+    painel = st.fragment(_painel_job, run_every=INTERVALO_ATUALIZACAO if em_andamento else None)
+    painel(fila, job_id, em_andamento, nome_resultado)
+
+
+def _painel_job(fila, job_id, acompanhando, nome_resultado):
+    job = fila.obter(job_id)
+    if acompanhando and job["estado"] in ESTADOS_FINAIS:
+        # Terminou: a página inteira é refeita, sem a atualização periódica
+        st.rerun()
+
+    st.markdown(f"**Análise `{job_id}`** · {job['descricao']} · _{job['estado']}_")
+    if fila.armazem_do_job(job):
+        st.caption(f"Armazém de resultados: {fila.armazem_do_job(job)}")
+    st.progress(job["feitos"] / max(job["total"], 1), text=f"{job['feitos']}/{job['total']} relatórios analisados")
+    gravados = fila.resultados(job_id)
+    registros = job["parametros"]["registros"]
+    resultados = [resultado for _, resultado in gravados]
+    # Análise de todas as abas: os registros trazem a aba de cada linha
+    todas_as_abas = bool(registros) and len(registros[0]) > 3
+    if todas_as_abas:
+        resultados = resultados_com_aba([registros[indice] for indice, _ in gravados], resultados)
+    st.dataframe(pd.DataFrame(resultados), use_container_width=True)
+
+    if acompanhando:
+        if job["cancelar"]:
+            st.info("Cancelamento pedido; a análise para na próxima linha.")
+        elif st.button("⏹️ Cancelar análise", key=f"cancelar_{job_id}"):
+            fila.cancelar(job_id)
+        return
+
+    if job["erro"]:
+        st.error(f"A análise falhou: {job['erro']}")
+    if not resultados:
+        return
+
+    st.download_button(
+        label="📥 Baixar Resultado em Excel",
+        data=excel_em_bytes(resultados),
+        file_name=nome_resultado,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    if todas_as_abas:
+        st.download_button(
+            label="📥 Baixar consolidado (resumo e uma aba por empresa)",
+            data=consolidado_em_bytes(resultados),
+            file_name="consolidado_recomendacoes.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+    # Planilha original com Status e Recomendações na própria aba, a partir da cópia guardada com o job
+    caminho_planilha = fila.planilha_do_job(job_id)
+    aba_escolhida = job["parametros"]["aba"]
+    if aba_escolhida and os.path.exists(caminho_planilha):
+        por_linha = {registros[indice][0]: resultado for indice, resultado in gravados}
+        aba = ler_planilha(caminho_planilha, aba_escolhida)
+        planilha_com_resultados = BytesIO()
+        aba.gravar_com_resultados(caminho_planilha, por_linha, ["Status", "Recomendações"], planilha_com_resultados)
+        aba.planilha.close()
+        st.download_button(
+            label="📥 Baixar planilha original com as recomendações",
+            data=planilha_com_resultados.getvalue(),
+            file_name=f"{aba_escolhida}_com_recomendacoes.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+    if job["tempos"]:
+        mostrar_tempos(cronometro_de_dict(job["tempos"]))
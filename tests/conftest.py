@@ -0,0 +1,11 @@
+import pytest
+
+
+# Caches em disco (textos, frases, hashes, manifesto) fora do repositório, também nos processos dos pools
+@pytest.fixture(autouse=True)
+def cache_temporario(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANALISADOR_CACHE_DIR", str(tmp_path / "cache"))
+    for modulo in ("cache", "manifesto", "azure_blob"):
+        monkeypatch.setattr(f"analisador.{modulo}.DIRETORIO_CACHE", str(tmp_path / "cache"))
+    monkeypatch.setattr("analisador.cache._caches", {})
+    monkeypatch.setattr("analisador.cache._hashes", {})
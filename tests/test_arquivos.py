@@ -0,0 +1,71 @@
+import pytest
+
+from analisador.arquivos import (
+    STATUS_ARQUIVO_AMBIGUO, STATUS_ARQUIVO_NAO_ENCONTRADO, STATUS_PASTA_NAO_ENCONTRADA, IndiceArquivos,
+    normalizar_nome,
+)
+
+
+# Monta <raiz>/<Empresa>/FINAL com PDFs vazios (o índice só olha os nomes)
+@pytest.fixture
+def raiz(tmp_path):
+    pastas = {
+        "Empresa A": ["Relatório_Sondagem-Bloco.1.pdf", "Laudo Fundações Torre Norte.pdf", "Anexo.txt"],
+        "Empresa B": ["Relatorio Campanha 2021.pdf", "Relatorio Campanha 2022.pdf"],
+        "Geotécnica Sul": ["Parecer.pdf"],
+    }
+    for empresa, arquivos in pastas.items():
+        final = tmp_path / empresa / "FINAL"
+        final.mkdir(parents=True)
+        for arquivo in arquivos:
+            (final / arquivo).write_bytes(b"")
+    (tmp_path / "Empresa C").mkdir()
+    return tmp_path
+
+
+def test_normalizar_nome():
+    assert normalizar_nome("  Relatório_Sondagem-Bloco.1.PDF ") == "relatorio sondagem bloco 1"
+
+
+def test_nome_exato_ignora_acentos_caixa_e_separadores(raiz):
+    localizacao = IndiceArquivos(str(raiz)).localizar("Empresa A", "RELATORIO sondagem bloco 1")
+    assert localizacao.caminho == str(raiz / "Empresa A" / "FINAL" / "Relatório_Sondagem-Bloco.1.pdf")
+    assert localizacao.status is None
+    assert localizacao.candidatos == ["Relatório_Sondagem-Bloco.1.pdf"]
+
+
+def test_nome_parecido(raiz):
+    localizacao = IndiceArquivos(str(raiz)).localizar("Empresa A", "Laudo Fundacao Torre Norte")
+    assert localizacao.caminho == str(raiz / "Empresa A" / "FINAL" / "Laudo Fundações Torre Norte.pdf")
+    assert localizacao.status is None
+
+
+def test_nomes_igualmente_parecidos_sao_ambiguos(raiz):
+    localizacao = IndiceArquivos(str(raiz)).localizar("Empresa B", "Relatorio Campanha 2020")
+    assert localizacao.caminho is None
+    assert localizacao.status == STATUS_ARQUIVO_AMBIGUO
+    assert sorted(localizacao.candidatos) == ["Relatorio Campanha 2021.pdf", "Relatorio Campanha 2022.pdf"]
+
+
+def test_nome_distante_nao_encontrado(raiz):
+    localizacao = IndiceArquivos(str(raiz)).localizar("Empresa A", "Memorial de Cálculo")
+    assert localizacao == (None, STATUS_ARQUIVO_NAO_ENCONTRADO, [])
+
+
+def test_so_arquivos_pdf_sao_indexados(raiz):
+    assert IndiceArquivos(str(raiz)).localizar("Empresa A", "Anexo").status == STATUS_ARQUIVO_NAO_ENCONTRADO
+
+
+def test_pasta_final_ausente(raiz):
+    indice = IndiceArquivos(str(raiz))
+    assert indice.localizar("Empresa C", "Parecer").status == STATUS_PASTA_NAO_ENCONTRADA
+    assert indice.localizar("Empresa Z", "Parecer").status == STATUS_PASTA_NAO_ENCONTRADA
+
+
+def test_empresa_pelo_nome_normalizado(raiz):
+    localizacao = IndiceArquivos(str(raiz)).localizar("geotecnica_sul", "parecer")
+    assert localizacao.caminho == str(raiz / "Geotécnica Sul" / "FINAL" / "Parecer.pdf")
+
+
+def test_raiz_inexistente(tmp_path):
+    assert IndiceArquivos(str(tmp_path / "nada")).localizar("Empresa A", "x").status == STATUS_PASTA_NAO_ENCONTRADA
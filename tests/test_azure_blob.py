@@ -0,0 +1,128 @@
+import os
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("azure.storage.blob")
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from analisador.azure_blob import CacheBlobs, baixar_pdf, baixar_pdfs, empresa_do_blob, listar_pdfs
+
+
+# Container em memória com a parte da API do SDK que o analisador usa
+class _ContainerFalso:
+    container_name = "relatorios"
+    url = "https://conta.blob.core.windows.net/relatorios"
+
+    def __init__(self):
+        self.blobs = {}
+        self.downloads = []
+        self.falhar_no_meio = set()
+
+    def enviar(self, nome, conteudo, modificado=datetime(2024, 1, 1, tzinfo=timezone.utc)):
+        versao = len(self.downloads) + len(self.blobs) + 1
+        self.blobs[nome] = SimpleNamespace(
+            name=nome, etag=f'"{nome}-{versao}-{len(conteudo)}"', size=len(conteudo), last_modified=modificado,
+            conteudo=conteudo,
+        )
+
+    def list_blobs(self, name_starts_with=None):
+        return [b for nome, b in sorted(self.blobs.items()) if not name_starts_with or nome.startswith(name_starts_with)]
+
+    def get_blob_client(self, nome):
+        return _BlobFalso(self, nome)
+
+
+class _BlobFalso:
+    def __init__(self, container, nome):
+        self.container = container
+        self.nome = nome
+
+    def _blob(self):
+        if self.nome not in self.container.blobs:
+            raise ResourceNotFoundError(f"O blob {self.nome} não existe.")
+        return self.container.blobs[self.nome]
+
+    def get_blob_properties(self):
+        return SimpleNamespace(etag=self._blob().etag)
+
+    def download_blob(self, max_concurrency=1):
+        blob = self._blob()
+        self.container.downloads.append(self.nome)
+        falhar = self.nome in self.container.falhar_no_meio
+
+        def readinto(f):
+            f.write(blob.conteudo[: len(blob.conteudo) // 2])
+            if falhar:
+                raise ConnectionError("conexão interrompida")
+            f.write(blob.conteudo[len(blob.conteudo) // 2:])
+            return blob.size
+
+        return SimpleNamespace(readinto=readinto, properties=SimpleNamespace(etag=blob.etag))
+
+
+@pytest.fixture
+def container():
+    container = _ContainerFalso()
+    container.enviar("Empresa A/FINAL/Relatório_1.pdf", b"%PDF-1 um", datetime(2024, 1, 10, tzinfo=timezone.utc))
+    container.enviar("Empresa A/FINAL/anexo.xlsx", b"planilha")
+    container.enviar("Empresa B/FINAL/Laudo.PDF", b"%PDF-1 dois", datetime(2024, 3, 5, tzinfo=timezone.utc))
+    return container
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheBlobs(str(tmp_path / "blobs"))
+
+
+def test_listagem_so_de_pdfs_com_prefixo_e_datas(container):
+    assert [b["nome"] for b in listar_pdfs(container)] == ["Empresa A/FINAL/Relatório_1.pdf", "Empresa B/FINAL/Laudo.PDF"]
+    assert [b["nome"] for b in listar_pdfs(container, prefixo="Empresa B/")] == ["Empresa B/FINAL/Laudo.PDF"]
+    assert [b["nome"] for b in listar_pdfs(container, desde=date(2024, 2, 1))] == ["Empresa B/FINAL/Laudo.PDF"]
+    assert [b["nome"] for b in listar_pdfs(container, ate=date(2024, 2, 1))] == ["Empresa A/FINAL/Relatório_1.pdf"]
+    blob = listar_pdfs(container, prefixo="Empresa A/")[0]
+    assert (blob["etag"], blob["tamanho"]) == (container.blobs[blob["nome"]].etag, 9)
+
+
+def test_download_reaproveitado_enquanto_o_etag_nao_muda(container, cache):
+    nome = "Empresa A/FINAL/Relatório_1.pdf"
+    caminho = baixar_pdf(container, nome, cache=cache)
+    with open(caminho, "rb") as f:
+        assert f.read() == b"%PDF-1 um"
+    assert baixar_pdf(container, nome, etag=container.blobs[nome].etag, cache=cache) == caminho
+    assert container.downloads == [nome]
+
+    container.enviar(nome, b"%PDF-1 nova versao")
+    assert baixar_pdf(container, nome, cache=cache) == caminho
+    with open(caminho, "rb") as f:
+        assert f.read() == b"%PDF-1 nova versao"
+    assert container.downloads == [nome, nome]
+
+
+def test_download_interrompido_nao_deixa_arquivo_parcial(container, cache):
+    nome = "Empresa B/FINAL/Laudo.PDF"
+    container.falhar_no_meio.add(nome)
+    with pytest.raises(ConnectionError):
+        baixar_pdf(container, nome, cache=cache)
+    assert not [a for a in os.listdir(cache.pasta) if a.endswith(".parcial") or a.endswith(".pdf")]
+    assert cache.obter(_ContainerFalso.url, nome, container.blobs[nome].etag) is None
+
+    container.falhar_no_meio.clear()
+    assert os.path.exists(baixar_pdf(container, nome, cache=cache))
+
+
+def test_download_em_paralelo_devolve_erros_por_blob(container, cache, monkeypatch):
+    monkeypatch.setattr("analisador.azure_blob.CacheBlobs", lambda: cache)
+    blobs = listar_pdfs(container) + [{"nome": "Empresa C/FINAL/sumiu.pdf", "etag": None}]
+    resultados = list(baixar_pdfs(container, blobs, max_workers=3))
+    assert [blob["nome"] for blob, _, _ in resultados] == [b["nome"] for b in blobs]
+    assert all(os.path.exists(caminho) and erro is None for _, caminho, erro in resultados[:2])
+    _, caminho, erro = resultados[2]
+    assert caminho is None and isinstance(erro, ResourceNotFoundError)
+
+
+def test_empresa_do_blob():
+    assert empresa_do_blob("Empresa A/FINAL/Relatório_1.pdf") == "Empresa A"
+    assert empresa_do_blob("solto.pdf") == ""
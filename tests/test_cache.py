@@ -0,0 +1,66 @@
+import hashlib
+import sqlite3
+import zlib
+
+from analisador import cache as cache_modulo
+from analisador.cache import CacheDisco, hash_arquivo
+
+
+def _tamanho(valor):
+    return len(zlib.compress(valor.encode("utf-8"), 6))
+
+
+def _soma_real(cache):
+    with sqlite3.connect(cache.caminho) as con:
+        return con.execute("SELECT COALESCE(SUM(tamanho), 0) FROM cache").fetchone()[0]
+
+
+def test_total_acompanha_gravacoes_substituicoes_e_remocoes(tmp_path):
+    cache = CacheDisco(str(tmp_path / "c.sqlite"))
+    cache.guardar("a", "x" * 100)
+    cache.guardar("b", "texto qualquer")
+    cache.guardar("a", "outro valor, maior que o anterior " * 10)
+    cache.remover("b")
+    cache.remover("nao existe")
+    assert cache.tamanho_total() == _soma_real(cache) == _tamanho("outro valor, maior que o anterior " * 10)
+    assert cache.obter("a") == "outro valor, maior que o anterior " * 10
+
+
+def test_despejo_remove_as_menos_usadas(tmp_path):
+    valores = {chave: f"{chave} " + "".join(chr(65 + (i * 7 + ord(chave)) % 26) for i in range(300)) for chave in "abcd"}
+    limite = sum(_tamanho(v) for v in valores.values()) - 1
+    cache = CacheDisco(str(tmp_path / "c.sqlite"), limite_bytes=limite)
+    for chave in "abc":
+        cache.guardar(chave, valores[chave])
+    assert cache.obter("a") == valores["a"]  # "b" passa a ser a menos usada
+    cache.guardar("d", valores["d"])
+    assert cache.obter("b") is None
+    assert all(cache.obter(chave) == valores[chave] for chave in "acd")
+    assert cache.tamanho_total() == _soma_real(cache) <= limite
+
+
+def test_total_de_um_cache_antigo_e_calculado_na_abertura(tmp_path):
+    caminho = str(tmp_path / "c.sqlite")
+    cache = CacheDisco(caminho)
+    cache.guardar("a", "valor")
+    with sqlite3.connect(caminho) as con:
+        con.execute("DROP TABLE meta")
+    assert CacheDisco(caminho).tamanho_total() == _tamanho("valor")
+
+
+def test_hash_so_e_recalculado_quando_o_arquivo_muda(tmp_path, monkeypatch):
+    calculados = []
+    calcular = cache_modulo._calcular_hash
+    monkeypatch.setattr(cache_modulo, "_calcular_hash", lambda caminho: calculados.append(caminho) or calcular(caminho))
+    arquivo = tmp_path / "r.pdf"
+    arquivo.write_bytes(b"primeira versao")
+    primeiro = hash_arquivo(str(arquivo))
+    assert hash_arquivo(str(arquivo)) == primeiro
+    # Outro processo (memória vazia) reaproveita o hash do cache em disco
+    monkeypatch.setattr(cache_modulo, "_hashes", {})
+    assert hash_arquivo(str(arquivo)) == primeiro
+    assert len(calculados) == 1
+
+    arquivo.write_bytes(b"segunda versao, maior")
+    assert hash_arquivo(str(arquivo)) == hashlib.sha256(b"segunda versao, maior").hexdigest()
+    assert len(calculados) == 2
@@ -0,0 +1,74 @@
+import threading
+
+import fitz  # PyMuPDF
+import pytest
+
+from analisador.indice import IndiceBusca
+
+
+# Gera pdfs/<Empresa>/FINAL/<arquivo> com um parágrafo por página
+def _pdf(raiz, empresa, arquivo, *paginas):
+    pasta = raiz / empresa / "FINAL"
+    pasta.mkdir(parents=True, exist_ok=True)
+    documento = fitz.open()
+    for texto in paginas:
+        documento.new_page().insert_text((72, 72), texto)
+    documento.save(pasta / arquivo)
+    documento.close()
+
+
+@pytest.fixture
+def indice(tmp_path):
+    indice = IndiceBusca(str(tmp_path / "indice.sqlite"))
+    yield indice
+    indice.fechar()
+
+
+def test_recomendacao_que_atravessa_a_pagina_fica_inteira(tmp_path, indice):
+    _pdf(tmp_path / "pdfs", "Empresa A", "Relatorio.pdf", "Nada a declarar. Recomenda-se monitorar o", "recalque das estacas. Fim.")
+    assert indice.atualizar(str(tmp_path / "pdfs"), max_workers=1)["novos"] == 1
+    resultados = indice.buscar("estacas", somente_recomendacoes=True)
+    assert [(r["arquivo"], r["pagina"]) for r in resultados] == [("Relatorio.pdf", 1)]
+    assert "Recomenda-se monitorar o" in resultados[0]["trecho"]
+    assert [r["pagina"] for r in indice.buscar("estacas")] == [2]
+
+
+def test_atualizacao_incremental(tmp_path, indice):
+    raiz = tmp_path / "pdfs"
+    _pdf(raiz, "Empresa A", "Um.pdf", "Sugerimos drenar o talude.")
+    _pdf(raiz, "Empresa B", "Dois.pdf", "Sem recomendações aqui.")
+    assert indice.atualizar(str(raiz), max_workers=1) == {"novos": 2, "alterados": 0, "removidos": 0, "inalterados": 0}
+    (raiz / "Empresa B" / "FINAL" / "Dois.pdf").unlink()
+    assert indice.atualizar(str(raiz), max_workers=1) == {"novos": 0, "alterados": 0, "removidos": 1, "inalterados": 1}
+    assert indice.empresas() == ["Empresa A"]
+
+
+def test_buscas_e_atualizacoes_em_varias_threads(tmp_path, indice):
+    raiz = tmp_path / "pdfs"
+    for i in range(6):
+        _pdf(raiz, f"Empresa {i % 2}", f"R{i}.pdf", f"Relatório {i}. Recomenda-se drenar o talude {i}.")
+    erros = []
+
+    def em_thread(funcao):
+        def rodar():
+            try:
+                funcao()
+            except Exception as e:
+                erros.append(e)
+        return threading.Thread(target=rodar)
+
+    def buscar():
+        for _ in range(20):
+            indice.buscar("talude")
+            indice.empresas()
+            indice.total_documentos()
+
+    threads = [em_thread(buscar) for _ in range(4)]
+    threads += [em_thread(lambda: indice.atualizar(str(raiz), max_workers=1)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert erros == []
+    assert indice.total_documentos() == 6
+    assert len(indice.buscar("talude", somente_recomendacoes=True)) == 6
@@ -0,0 +1,56 @@
+import fitz  # PyMuPDF
+
+from analisador.armazem import FORMATO_PARQUET, ler_tabela, linhas_do_armazem
+from analisador.jobs import ESTADO_CONCLUIDO, FilaJobs
+
+
+def _pdf(raiz, empresa, arquivo, texto):
+    pasta = raiz / empresa / "FINAL"
+    pasta.mkdir(parents=True, exist_ok=True)
+    documento = fitz.open()
+    documento.new_page().insert_text((72, 72), texto)
+    documento.save(pasta / arquivo)
+    documento.close()
+
+
+# Executa o próximo job pendente na própria thread do teste, sem iniciar os workers
+def _rodar_proximo(fila):
+    fila._executar(fila._proximo())
+
+
+def test_job_grava_no_armazem_e_o_refaz_ao_ser_retomado(tmp_path):
+    raiz = tmp_path / "pdfs"
+    _pdf(raiz, "Empresa A", "Um.pdf", "Recomenda-se drenar o talude. Sugerimos monitorar.")
+    _pdf(raiz, "Empresa A", "Dois.pdf", "Nada a declarar.")
+    registros = [(2, "Empresa A", "Um"), (3, "Empresa A", "Dois"), (4, "Empresa B", "Tres")]
+    fila = FilaJobs(str(tmp_path / "jobs.sqlite"))
+    job_id = fila.enviar(registros, raiz=str(raiz), max_workers=1, armazem=str(tmp_path / "armazem"), formato_armazem=FORMATO_PARQUET)
+
+    _rodar_proximo(fila)
+    job = fila.obter(job_id)
+    assert job["estado"] == ESTADO_CONCLUIDO and job["feitos"] == 3
+    pasta = fila.armazem_do_job(job)
+    assert pasta == str(tmp_path / "armazem" / job_id)
+    assert [(linha["Arquivo"], linha["Status"]) for linha in linhas_do_armazem(pasta)] == [
+        (resultado["Arquivo"], resultado["Status"]) for _, resultado in fila.resultados(job_id)
+    ]
+    assert len(list(ler_tabela(pasta, "recomendacoes"))) == 2
+
+    # Retomado (ex.: o processo morreu no meio), o job refaz o armazém com todas as linhas
+    with fila._conectar() as con:
+        con.execute("DELETE FROM resultados WHERE job_id = ? AND indice = 2", (job_id,))
+        con.execute("UPDATE jobs SET estado = 'pendente' WHERE id = ?", (job_id,))
+    _rodar_proximo(fila)
+    assert fila.obter(job_id)["feitos"] == 3
+    assert len(list(linhas_do_armazem(pasta))) == 3
+    assert len(list(ler_tabela(pasta, "recomendacoes"))) == 2
+
+
+def test_job_sem_armazem(tmp_path):
+    fila = FilaJobs(str(tmp_path / "jobs.sqlite"))
+    job_id = fila.enviar([(2, "Empresa A", "Um")], raiz=str(tmp_path / "pdfs"), max_workers=1)
+    _rodar_proximo(fila)
+    job = fila.obter(job_id)
+    assert job["estado"] == ESTADO_CONCLUIDO
+    assert fila.armazem_do_job(job) is None
+    assert fila.resultados(job_id)[0][1]["Status"] == "Pasta FINAL não encontrada"
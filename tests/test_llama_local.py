@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("llama_cpp")
+
+from analisador import llama_local
+from analisador.cache import CacheDisco
+from analisador.llama_local import CABECALHO_PROMPT, RODAPE_PROMPT, PoolLlama
+
+
+# Modelo falso: um token por caractere, sem carregar nenhum arquivo GGUF
+class _LlamaFalso:
+    def __init__(self, **_):
+        pass
+
+    def tokenize(self, texto, add_bos=False):
+        return list(texto)
+
+    def detokenize(self, tokens):
+        return bytes(tokens)
+
+    def __call__(self, prompt, max_tokens, stop):
+        return {"choices": [{"text": "- Drenar."}]}
+
+
+@pytest.fixture(autouse=True)
+def llama_falso(monkeypatch):
+    monkeypatch.setattr(llama_local, "Llama", _LlamaFalso)
+
+
+def _pool(tmp_path, **opcoes):
+    return PoolLlama(caminho_modelo="modelo.gguf", cache=CacheDisco(str(tmp_path / "respostas.sqlite")), **opcoes)
+
+
+@pytest.mark.parametrize("n_ctx", [512, 600, 800])
+def test_contexto_sem_espaco_para_o_texto_e_recusado(tmp_path, n_ctx):
+    with pytest.raises(ValueError, match="aumente n_ctx ou reduza max_tokens"):
+        _pool(tmp_path, n_ctx=n_ctx, max_tokens=512)
+
+
+def test_prompts_cabem_no_contexto(tmp_path):
+    pool = _pool(tmp_path, n_ctx=1024, max_tokens=256)
+    try:
+        prompts = pool.montar_prompts("x" * 2000)
+        assert len(prompts) > 1
+        assert all(p.startswith(CABECALHO_PROMPT) and p.endswith(RODAPE_PROMPT) for p in prompts)
+        assert all(pool.contar_tokens(p) + 1 + pool.max_tokens <= pool.n_ctx for p in prompts)
+        assert "".join(p[len(CABECALHO_PROMPT):-len(RODAPE_PROMPT)] for p in prompts) == "x" * 2000
+    finally:
+        pool.fechar()
@@ -0,0 +1,41 @@
+import fitz  # PyMuPDF
+
+from analisador.lote import processar_em_lote
+from analisador.manifesto import Manifesto
+from analisador.tempos import Cronometro
+
+
+def _pdf(raiz, empresa, arquivo, texto):
+    pasta = raiz / empresa / "FINAL"
+    pasta.mkdir(parents=True, exist_ok=True)
+    documento = fitz.open()
+    documento.new_page().insert_text((72, 72), texto)
+    documento.save(pasta / arquivo)
+    documento.close()
+
+
+def _executar(raiz, linhas, manifesto):
+    cronometro = Cronometro()
+    resultados = list(processar_em_lote(linhas, str(raiz), max_workers=1, manifesto=manifesto, cronometro=cronometro, ocr_workers=0))
+    return resultados, cronometro
+
+
+def test_linhas_repetidas_sao_reaproveitadas_do_manifesto(tmp_path):
+    raiz = tmp_path / "pdfs"
+    _pdf(raiz, "Empresa A", "Relatório_1.pdf", "Recomenda-se drenar o talude.")
+    _pdf(raiz, "Empresa A", "Laudo.pdf", "Nada a declarar.")
+    linhas = [("Empresa A", "Relatório_1"), ("Empresa A", "Laudo"), ("Empresa A", "relatorio 1"), ("Empresa A", "RELATORIO-1.pdf")]
+    manifesto = Manifesto(str(tmp_path / "manifesto.sqlite"))
+    try:
+        resultados, cronometro = _executar(raiz, linhas, manifesto)
+        assert [r["Arquivo"] for r in resultados] == [nome for _, nome in linhas]
+        assert [len(r["recomendacoes"]) for r in resultados] == [1, 0, 1, 1]
+        assert cronometro.contadores["linhas_repetidas"] == 2
+
+        resultados, cronometro = _executar(raiz, linhas, manifesto)
+        assert all(r["reaproveitado"] for r in resultados)
+        assert [r["Arquivo"] for r in resultados] == [nome for _, nome in linhas]
+        assert cronometro.contadores["linhas_reaproveitadas"] == 4
+        assert "extracao_pdf" not in cronometro.etapas
+    finally:
+        manifesto.fechar()
@@ -0,0 +1,196 @@
+import asyncio
+import threading
+
+import pytest
+
+openai = pytest.importorskip("openai")
+web = pytest.importorskip("aiohttp.web")
+
+from analisador import openai_cliente
+from analisador.cache import CacheDisco
+from analisador.openai_cliente import ClienteOpenAI, LimitadorTaxa
+
+MENSAGENS = [{"role": "user", "content": "Texto"}]
+
+_sleep_original = asyncio.sleep
+
+
+# Relógio falso: time.monotonic lê dele e asyncio.sleep só o adianta, sem esperar de verdade.
+# Vale só para a thread do teste; a thread da API falsa continua com o asyncio de verdade
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+        self.thread = threading.current_thread()
+
+    def monotonic(self):
+        return self.agora
+
+    async def sleep(self, segundos, *args, **kwargs):
+        if threading.current_thread() is not self.thread:
+            return await _sleep_original(segundos, *args, **kwargs)
+        self.agora += segundos
+        await _sleep_original(0)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = _Relogio()
+    monkeypatch.setattr(openai_cliente.time, "monotonic", relogio.monotonic)
+    monkeypatch.setattr(openai_cliente.asyncio, "sleep", relogio.sleep)
+    return relogio
+
+
+# API falsa da OpenAI num servidor HTTP local (aiohttp, numa thread à parte): responde
+# /v1/chat/completions com as respostas dadas em ordem e guarda os pedidos recebidos
+class _ApiFalsa:
+    def __init__(self):
+        self.respostas = []
+        self.pedidos = []
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def responder(self, *respostas):
+        self.respostas.extend(respostas)
+
+    async def _completions(self, request):
+        self.pedidos.append({"corpo": await request.json(), "headers": dict(request.headers)})
+        resposta = self.respostas.pop(0)
+        if isinstance(resposta, str):
+            corpo = {"choices": [{"index": 0, "message": {"role": "assistant", "content": resposta}}]}
+            return web.json_response(corpo)
+        status, mensagem, headers = resposta
+        corpo = {"error": {"message": mensagem, "type": "erro", "param": None, "code": None}}
+        return web.json_response(corpo, status=status, headers=headers)
+
+    async def _iniciar(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._completions)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        porta = self.runner.addresses[0][1]
+        return f"http://127.0.0.1:{porta}/v1"
+
+    def iniciar(self):
+        self.thread.start()
+        return asyncio.run_coroutine_threadsafe(self._iniciar(), self.loop).result(10)
+
+    def parar(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+        self.loop.close()
+
+
+def _erro(status, mensagem="falha", **headers):
+    return status, mensagem, headers
+
+
+@pytest.fixture
+def api():
+    api = _ApiFalsa()
+    api.base = api.iniciar()
+    yield api
+    api.parar()
+
+
+@pytest.fixture
+def cliente(tmp_path, api):
+    return ClienteOpenAI("chave", max_tentativas=3, api_base=api.base,
+                         cache=CacheDisco(str(tmp_path / "respostas.sqlite")))
+
+
+def test_limitador_espera_a_janela_de_requisicoes(relogio):
+    limitador = LimitadorTaxa(rpm=2, tpm=10_000)
+
+    async def tres_requisicoes():
+        inicios = []
+        for _ in range(3):
+            await limitador.aguardar(10)
+            inicios.append(relogio.agora)
+        return inicios
+
+    assert asyncio.run(tres_requisicoes()) == [0.0, 0.0, 60.0]
+
+
+def test_limitador_espera_a_janela_de_tokens(relogio):
+    limitador = LimitadorTaxa(rpm=100, tpm=100)
+
+    async def duas_requisicoes():
+        await limitador.aguardar(60)
+        relogio.agora = 10.0
+        await limitador.aguardar(60)
+        return relogio.agora
+
+    # A primeira só sai da janela 60 s depois de entrar
+    assert asyncio.run(duas_requisicoes()) == 60.0
+
+
+def test_pedido_maior_que_o_tpm_nao_trava(relogio):
+    limitador = LimitadorTaxa(rpm=10, tpm=100)
+    asyncio.run(limitador.aguardar(1000))
+    assert limitador.tokens_na_janela == 100
+
+
+def test_pedido_vai_pela_api_base(relogio, api, cliente):
+    api.responder(" Recomendação ")
+    assert cliente.completar_em_lote([MENSAGENS]) == ["Recomendação"]
+    [pedido] = api.pedidos
+    assert pedido["corpo"]["model"] == cliente.modelo
+    assert pedido["corpo"]["messages"] == MENSAGENS
+    assert pedido["headers"]["Authorization"] == "Bearer chave"
+
+
+def test_429_e_tentado_de_novo(relogio, api, cliente):
+    api.responder(_erro(429, "limite"), "ok")
+    assert cliente.completar_em_lote([MENSAGENS]) == ["ok"]
+    assert len(api.pedidos) == 2
+
+
+def test_retry_after_e_respeitado(relogio, api, cliente):
+    api.responder(_erro(429, "limite", **{"Retry-After": "7"}), "ok")
+    cliente.completar_em_lote([MENSAGENS])
+    assert relogio.agora == 7.0
+
+
+def test_backoff_exponencial_sem_retry_after(monkeypatch, relogio, api, cliente):
+    monkeypatch.setattr(openai_cliente.random, "uniform", lambda a, b: 0.0)
+    api.responder(_erro(429, "limite"), _erro(503, "fora do ar"), "ok")
+    assert cliente.completar_em_lote([MENSAGENS]) == ["ok"]
+    # 1 s depois da primeira falha, 2 s depois da segunda
+    assert relogio.agora == 3.0
+
+
+def test_erro_5xx_e_tentado_de_novo(relogio, api, cliente):
+    api.responder(_erro(502), "ok")
+    assert cliente.completar_em_lote([MENSAGENS]) == ["ok"]
+    assert len(api.pedidos) == 2
+
+
+def test_400_nao_e_tentado_de_novo(relogio, api, cliente):
+    api.responder(_erro(400, "pedido inválido"), "ok")
+    [resposta] = cliente.completar_em_lote([MENSAGENS])
+    assert resposta.startswith("[Erro ao usar OpenAI")
+    assert "pedido inválido" in resposta
+    assert len(api.pedidos) == 1
+
+
+def test_desiste_depois_de_max_tentativas(relogio, api, cliente):
+    api.responder(*[_erro(429, "limite") for _ in range(3)])
+    [resposta] = cliente.completar_em_lote([MENSAGENS])
+    assert resposta.startswith("[Erro ao usar OpenAI")
+    assert len(api.pedidos) == 3
+
+
+def test_resposta_em_cache_nao_chama_a_api(relogio, api, cliente):
+    cliente.cache.guardar(cliente.chave_cache(MENSAGENS), "guardada")
+    assert cliente.completar_em_lote([MENSAGENS]) == ["guardada"]
+    assert api.pedidos == []
+
+
+def test_resposta_nova_vai_para_o_cache(relogio, api, cliente):
+    api.responder("nova")
+    assert cliente.completar_em_lote([MENSAGENS]) == ["nova"]
+    assert cliente.completar_em_lote([MENSAGENS]) == ["nova"]
+    assert len(api.pedidos) == 1
@@ -0,0 +1,44 @@
+from openpyxl import Workbook, load_workbook
+
+from analisador.planilha import ler_planilha
+
+
+def _planilha(caminho):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Projetos"
+    ws.append(["Relação de projetos"])
+    ws.append(["Empresa", "Nome do arquivo salvo", "Páginas"])
+    ws.append(["Empresa A", "Relatório_1", 10])
+    ws.append(["Empresa B", "Relatório_2", "=C3*2"])
+    ws.merge_cells("A1:C1")
+    outra = wb.create_sheet("Resumo")
+    outra.append(["Total", "=SUM(Projetos!C3:C4)"])
+    wb.save(caminho)
+
+
+def _gravar(tmp_path, **opcoes):
+    origem, destino = tmp_path / "origem.xlsx", tmp_path / "destino.xlsx"
+    _planilha(origem)
+    aba = ler_planilha(str(origem), "Projetos")
+    resultados = {3: {"Status": "OK", "Recomendações": "1. Drenar."}, 4: {"Status": "Erro"}}
+    aba.gravar_com_resultados(str(origem), resultados, ["Status", "Recomendações"], str(destino), **opcoes)
+    aba.planilha.close()
+    return load_workbook(destino)
+
+
+def test_copia_em_streaming_mantem_formulas_e_acrescenta_colunas(tmp_path):
+    wb = _gravar(tmp_path)
+    ws = wb["Projetos"]
+    assert [c.value for c in ws[2]] == ["Empresa", "Nome do arquivo salvo", "Páginas", "Status", "Recomendações"]
+    assert [c.value for c in ws[3]] == ["Empresa A", "Relatório_1", 10, "OK", "1. Drenar."]
+    assert [c.value for c in ws[4]] == ["Empresa B", "Relatório_2", "=C3*2", "Erro", None]
+    assert wb["Resumo"]["B1"].value == "=SUM(Projetos!C3:C4)"
+
+
+def test_preservar_formatacao_mantem_celulas_mescladas(tmp_path):
+    wb = _gravar(tmp_path, preservar_formatacao=True)
+    ws = wb["Projetos"]
+    assert [str(r) for r in ws.merged_cells.ranges] == ["A1:C1"]
+    assert [c.value for c in ws[4]] == ["Empresa B", "Relatório_2", "=C3*2", "Erro", None]
+    assert wb["Resumo"]["B1"].value == "=SUM(Projetos!C3:C4)"
@@ -0,0 +1,59 @@
+import random
+import re
+
+from analisador.recomendacoes import KEYWORDS, MATCHER, MatcherPalavrasChave
+
+PALAVRAS = ["o", "ensaio", "Relatório", "solo", "3.5", "the", "pile", "Fig", "é", "debe", "ser", "NOUS", "m"]
+SEPARADORES = [" ", " ", " ", ". ", "! ", "? ", ".", "\n", ".\n", "  "]
+
+
+# Extração original dos apps, antes do matcher com uma regex só
+def _extrair_antigo(texto):
+    frases = re.split(r'[\.!?]\s+', texto)
+    return [frase.strip() for frase in frases if any(kw in frase.lower() for kw in KEYWORDS)]
+
+
+def _texto_aleatorio(rng):
+    partes = []
+    for _ in range(rng.randint(0, 40)):
+        if rng.random() < 0.2:
+            kw = rng.choice(KEYWORDS)
+            partes.append(kw.upper() if rng.random() < 0.3 else kw)
+        else:
+            partes.append(rng.choice(PALAVRAS))
+        partes.append(rng.choice(SEPARADORES))
+    return "".join(partes)
+
+
+def test_mesmas_frases_que_a_extracao_antiga():
+    rng = random.Random(3)
+    for _ in range(2000):
+        texto = _texto_aleatorio(rng)
+        assert [r["frase"] for r in MATCHER.extrair(texto)] == _extrair_antigo(texto), texto
+
+
+def test_palavras_chave_e_idiomas_de_cada_frase():
+    recomendacoes = MATCHER.extrair("Nada aqui. We recommend that it is necessary to drain. Sugerimos e indicamos drenar.")
+    assert [r["frase"] for r in recomendacoes] == [
+        "We recommend that it is necessary to drain", "Sugerimos e indicamos drenar.",
+    ]
+    assert recomendacoes[0]["palavras_chave"] == ["we recommend", "it is necessary"]
+    assert recomendacoes[0]["idioma"] == "en"
+    assert recomendacoes[1]["palavras_chave"] == ["sugerimos", "indicamos"]
+    assert recomendacoes[1]["idiomas"] == ["pt", "es"]
+
+
+def test_alternativa_mais_longa_vence():
+    matcher = MatcherPalavrasChave({"en": ["recommend", "we recommend"]})
+    assert [kw for _, _, kw, _ in matcher.ocorrencias("We recommend it")] == ["we recommend"]
+
+
+def test_frases_ja_segmentadas_mantem_pagina():
+    frases = [
+        {"frase": "Sem nada.", "pagina": 1, "bbox": (0, 0, 1, 1)},
+        {"frase": "Recomenda-se drenar.", "pagina": 2, "bbox": (0, 2, 1, 3)},
+    ]
+    recomendacoes = list(MATCHER.extrair_de_frases(frases))
+    assert len(recomendacoes) == 1
+    assert recomendacoes[0]["pagina"] == 2
+    assert recomendacoes[0]["palavra_chave"] == "recomenda"
@@ -0,0 +1,101 @@
+import random
+
+from analisador.segmentacao import segmentar_paginas
+
+
+# Página no formato de get_text("dict"), só com o que a segmentação usa: um bloco por parágrafo
+def _pagina(*paragrafos):
+    return {
+        "blocks": [
+            {"lines": [{"bbox": (0, 10 * i, 100, 10 * i + 8), "spans": [{"text": linha}]} for i, linha in enumerate(linhas)]}
+            for linhas in paragrafos
+        ]
+    }
+
+
+def _frases(*paginas):
+    return [f["frase"] for f in segmentar_paginas(list(enumerate(paginas, 1)))]
+
+
+def test_unidade_metro_encerra_frase_em_portugues():
+    assert _frases(_pagina(["O valor é 3.5 m. Próxima frase."])) == ["O valor é 3.5 m.", "Próxima frase."]
+
+
+def test_minutos_e_maximo_encerram_frase():
+    assert _frases(_pagina(["A leitura levou 15 min. O recalque chegou ao max. Depois estabilizou."])) == [
+        "A leitura levou 15 min.", "O recalque chegou ao max.", "Depois estabilizou.",
+    ]
+
+
+def test_frase_aberta_na_quebra_de_pagina_nao_vira_inicio_de_paragrafo():
+    assert _frases(_pagina(["Ver item. 3.2."]), _pagina(["Conclusões"])) == ["Ver item.", "3.2.", "Conclusões"]
+
+
+def test_bloco_continua_na_pagina_seguinte_quando_comeca_em_minuscula():
+    frases = segmentar_paginas([
+        (1, _pagina(["Título"], ["Recomenda-se monitorar o"])),
+        (2, _pagina(["recalque da estaca. Fim."])),
+    ])
+    assert [(f["frase"], f["pagina"]) for f in frases] == [
+        ("Título", 1), ("Recomenda-se monitorar o recalque da estaca.", 1), ("Fim.", 2),
+    ]
+
+
+def test_bloco_terminado_em_pontuacao_ou_seguido_de_maiuscula_nao_continua():
+    assert _frases(_pagina(["Resultados:"], ["os ensaios"], ["Conclusões"])) == ["Resultados:", "os ensaios", "Conclusões"]
+
+
+def test_hifenizacao_desfeita_na_quebra_de_linha():
+    assert _frases(_pagina(["A estabi-", "lidade do talude e o pré-", "Carregamento."])) == [
+        "A estabilidade do talude e o pré- Carregamento.",
+    ]
+
+
+def test_abreviacoes_iniciais_e_numeracao_nao_encerram_frase():
+    assert _frases(_pagina(["Conforme a Fig. 3 e a Tab. 2, ver J. Silva et al. Nova frase."], ["3.2. Conclusões"])) == [
+        "Conforme a Fig. 3 e a Tab. 2, ver J. Silva et al. Nova frase.", "3.2. Conclusões",
+    ]
+    assert _frases(_pagina(["Use e.g. drains. Done."])) == ["Use e.g. drains.", "Done."]
+
+
+def test_continuacao_em_minuscula_nao_encerra_frase():
+    assert _frases(_pagina(["O solo é mole. portanto recomenda-se estacas! E fim? Sim."])) == [
+        "O solo é mole. portanto recomenda-se estacas!", "E fim?", "Sim.",
+    ]
+
+
+def test_pagina_e_retangulo_de_origem():
+    pagina = {"blocks": [{"lines": [
+        {"bbox": (10, 20, 50, 28), "spans": [{"text": "Primeira frase. Segunda"}]},
+        {"bbox": (10, 30, 90, 38), "spans": [{"text": "frase"}, {"text": " continua."}]},
+    ]}]}
+    frases = list(segmentar_paginas([(7, pagina)]))
+    assert [(f["frase"], f["pagina"], f["bbox"]) for f in frases] == [
+        ("Primeira frase.", 7, (10, 20, 50, 28)),
+        ("Segunda frase continua.", 7, (10, 20, 90, 38)),
+    ]
+
+
+def test_paginas_sem_texto():
+    sem_texto = []
+    vazia = {"blocks": [{"type": 1}, {"lines": [{"bbox": (0, 0, 1, 1), "spans": [{"text": "  "}]}]}]}
+    frases = [f["frase"] for f in segmentar_paginas([(1, _pagina(["Um."])), (2, vazia), (3, _pagina(["Dois."]))], sem_texto)]
+    assert frases == ["Um.", "Dois."]
+    assert sem_texto == [2]
+
+
+LINHAS = [
+    "O ensaio", "mostrou recalque.", "Ver Fig.", "3 e o anexo", "estabi-", "lidade", "do talude!", "Conclusões",
+    "3.2.", "Recomenda-se", "drenar. e", "monitorar?", "J. Silva", "concluiu", "que", "deve ser.", "Fim", "pré-",
+]
+
+
+# Equivalência da segmentação em fluxo: distribuir os mesmos blocos em páginas de qualquer
+# forma (só a frase aberta passa de uma página para a outra) dá as mesmas frases que uma página só
+def test_divisao_em_paginas_nao_muda_as_frases():
+    rng = random.Random(15)
+    for _ in range(5000):
+        blocos = [[rng.choice(LINHAS) for _ in range(rng.randint(1, 4))] for _ in range(rng.randint(1, 8))]
+        cortes = sorted(rng.sample(range(len(blocos) + 1), rng.randint(0, len(blocos) + 1)))
+        paginas = [_pagina(*blocos[a:b]) for a, b in zip([0] + cortes, cortes + [len(blocos)])]
+        assert _frases(*paginas) == _frases(_pagina(*blocos)), blocos